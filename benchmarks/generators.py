@@ -0,0 +1,137 @@
+"""Synthetic lab generators for the clab-terminal-launcher benchmarks
+
+Each generator builds a deterministic lab of the requested size in one of the formats consumed by the utility
+(e.g., `clab inspect --details` output, Containerlab API responses, topology-data.json files or credentials files).
+"""
+import json
+from typing import Any
+from xml.etree import ElementTree as ET
+
+import yaml
+
+NODES_PER_LAB = 50
+KINDS = [("nokia_srlinux", "ghcr.io/nokia/srlinux:latest"),
+         ("cisco_c8000v", "vrnetlab/cisco_c8000v:17.11"),
+         ("arista_ceos", "ceos:4.32.0F"),
+         ("linux", "ghcr.io/srl-labs/network-multitool:latest"),
+         ("linux", "alpine:latest")]
+
+def lab_layout(nodes: int) -> dict[str, list[dict[str, Any]]]:
+    """Return the basic attributes of each node, grouped by lab; every 10th node is exited"""
+    labs: dict[str, list[dict[str, Any]]] = {}
+    for index in range(nodes):
+        lab = f"lab{index // NODES_PER_LAB}"
+        kind, image = KINDS[index % len(KINDS)]
+        labs.setdefault(lab, []).append({"index": index,
+                                         "lab": lab,
+                                         "name": f"clab-{lab}-node{index % NODES_PER_LAB}",
+                                         "kind": kind,
+                                         "image": image,
+                                         "state": "exited" if index % 10 == 9 else "running",
+                                         "ipv4_address": f"172.{20 + index // 65536}.{index // 256 % 256}.{index % 256}",
+                                         "ipv6_address": f"3fff:172:20::{index:x}"})
+    return labs
+
+def inspect_output(nodes: int) -> dict[str, Any]:
+    """Return `clab inspect --all --details` output, including the labels/network settings that the utility ignores"""
+    return {lab: [{"Names": [node["name"]],
+                   "ID": f"{node['index']:064x}",
+                   "ShortID": f"{node['index']:012x}",
+                   "Image": node["image"],
+                   "State": node["state"],
+                   "Status": "Up 2 hours" if node["state"] == "running" else "Exited (0) 1 hour ago",
+                   "Labels": {"clab-node-kind": node["kind"],
+                              "clab-node-lab-dir": f"/home/user/labs/clab-{lab}/{node['name']}",
+                              "clab-node-longname": node["name"],
+                              "clab-node-name": node["name"].rsplit("-", 1)[-1],
+                              "clab-node-type": "",
+                              "clab-owner": "user",
+                              "clab-topo-file": f"/home/user/labs/{lab}.clab.yml",
+                              "containerlab": lab},
+                   "Pid": 1000 + node["index"],
+                   "NetworkName": "clab",
+                   "NetworkSettings": {"IPv4addr": node["ipv4_address"], "IPv4pLen": 24, "IPv4Gw": "172.20.20.1",
+                                       "IPv6addr": node["ipv6_address"], "IPv6pLen": 64, "IPv6Gw": "3fff:172:20:20::1"},
+                   "Mounts": [{"Source": f"/home/user/labs/clab-{lab}/{node['name']}/config", "Destination": "/etc/opt"}],
+                   "Ports": []}
+                  for node in labNodes]
+            for lab, labNodes in lab_layout(nodes).items()}
+
+def api_labs(nodes: int) -> dict[str, list[dict[str, Any]]]:
+    """Return the response of the Containerlab API for all labs (/api/v1/labs)"""
+    return {lab: [{"name": node["name"], "container_id": f"{node['index']:012x}", "image": node["image"], "kind": node["kind"],
+                   "state": node["state"], "status": "Up 2 hours", "ipv4_address": f"{node['ipv4_address']}/24",
+                   "ipv6_address": f"{node['ipv6_address']}/64", "lab_name": lab, "labPath": f"{lab}.clab.yml",
+                   "group": "", "owner": "user"}
+                  for node in labNodes]
+            for lab, labNodes in lab_layout(nodes).items()}
+
+def topology_data(nodes: int) -> dict[str, dict[str, Any]]:
+    """Return the topology-data.json file that Containerlab writes to the lab directory of each lab, by lab"""
+    return {lab: {"name": lab, "type": "clab",
+                  "nodes": {node["name"].rsplit("-", 1)[-1]: {"index": str(node["index"] % NODES_PER_LAB),
+                                                              "shortname": node["name"].rsplit("-", 1)[-1],
+                                                              "longname": node["name"], "fqdn": f"{node['name']}.{lab}.io",
+                                                              "group": "", "labdir": f"/home/user/labs/clab-{lab}/{node['name']}",
+                                                              "kind": node["kind"], "image": node["image"], "mgmt-net": "",
+                                                              "mgmt-intf": "", "mgmt-ipv4-address": node["ipv4_address"],
+                                                              "mgmt-ipv4-prefix-length": 24, "mgmt-ipv6-address": node["ipv6_address"],
+                                                              "mgmt-ipv6-prefix-length": 64, "mac-address": "", "labels": {}}
+                            for node in labNodes},
+                  "links": []}
+            for lab, labNodes in lab_layout(nodes).items()}
+
+def rendered_nodes(nodes: int, host: str = "clab.example.com") -> dict[str, Any]:
+    """Return rendered node data, as written by the node-data commands (running nodes only)"""
+    return {"_metadata_": {"clabHost": host}} | {
+        lab: [{"name": node["name"], "image": node["image"], "kind": node["kind"], "state": node["state"],
+               "ipv4_address": node["ipv4_address"], "ipv6_address": node["ipv6_address"], "ports": {"ssh": 22}, "method": None}
+              for node in labNodes if node["state"] == "running"]
+        for lab, labNodes in lab_layout(nodes).items()}
+
+def ports_file(nodes: int, every: int = 4) -> dict[str, dict[str, dict[str, int]]]:
+    """Return a port file that customizes the SSH port of every nth running node"""
+    ports: dict[str, dict[str, dict[str, int]]] = {}
+    for labNodes in lab_layout(nodes).values():
+        for node in labNodes:
+            if node["index"] % every == 0 and node["state"] == "running":
+                ports.setdefault(node["lab"], {})[node["name"]] = {"ssh": 10000 + node["index"]}
+    return ports
+
+def creds_file(nodes: int) -> dict[str, Any]:
+    """Return a credentials file with a realistic mix of filters: a few exact node entries per lab, node patterns,
+    image/kind entries, per-lab overrides (for every 5th lab) and a default"""
+    creds: dict[str, Any] = {"default": {"username": "admin", "password": "admin"},
+                             "kind=nokia_srlinux": {"username": "admin", "password": "NokiaSrl1!"},
+                             "kind=arista_ceos": {"username": "admin", "password": "admin"},
+                             "image=alpine:latest": {"username": "root", "password": None},
+                             "node=clab-*-node1?": {"username": "ops", "password": "ops"},
+                             "node~^clab-lab[0-9]*7-": {"username": "ops7", "password": "ops7"}}
+    for lab, labNodes in lab_layout(nodes).items():
+        creds[f"node={labNodes[0]['name']}"] = {"username": "special", "password": "special"}
+        if int(lab[3:]) % 5 == 0:
+            creds[f"lab={lab}"] = {"kind=linux": {"username": "user", "password": "user"},
+                                   "default": {"username": "labadmin", "password": "labadmin"}}
+    return creds
+
+def mtputty_config(nodes: int, existing: float = 0.5) -> ET.ElementTree:
+    """Return an MTPuTTY configuration that already contains sessions for the given fraction of the running nodes
+    (as after an earlier run) plus some unrelated sessions"""
+    root = ET.Element("MTPutty")
+    servers = ET.SubElement(ET.SubElement(root, "Servers"), "Putty")
+    names = [node["name"] for labNodes in lab_layout(nodes).values() for node in labNodes if node["state"] == "running"]
+    for name in [f"unrelated{index}" for index in range(10)] + names[:int(len(names) * existing)]:
+        server = ET.SubElement(servers, "Node", Type="1")
+        ET.SubElement(server, "SavedSession").text = "Default Settings"
+        ET.SubElement(server, "DisplayName").text = name
+        ET.SubElement(server, "ServerName").text = name
+        ET.SubElement(server, "Port").text = "22"
+    return ET.ElementTree(root)
+
+def write_json(filename: str, data: Any, indent: int | None = 4) -> None:
+    with open(filename, "w") as f:
+        json.dump(data, f, indent=indent)
+
+def write_yaml(filename: str, data: Any) -> None:
+    with open(filename, "w") as f:
+        yaml.safe_dump(data, f, sort_keys=False)
@@ -0,0 +1,76 @@
+"""Import-time benchmark for the clab-terminal-launcher CLI
+
+Reports the import time of common CLI invocations (using `python -X importtime`) and fails if one imports a module
+it shouldn't need or exceeds the optional time budget. Run it from the repository root after installing the package:
+
+    python benchmarks/import_time.py [--runs 5] [--budget-ms 150] [--json]
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+# Modules that are slow to import and only needed by specific commands
+HEAVY_MODULES = ["requests", "urllib3", "yaml", "dotenv", "xml.etree.ElementTree", "asyncio"]
+
+# Invocation label -> (CLI arguments, heavy modules that this invocation must NOT import)
+SCENARIOS = {
+    "help": (["--help"], HEAVY_MODULES),
+    "launch help": (["launch", "--help"], HEAVY_MODULES),
+    "launch native-openssh help": (["launch", "native-openssh", "--help"], HEAVY_MODULES),
+    "launch securecrt help": (["launch", "securecrt", "--help"], HEAVY_MODULES),
+    "node-data help": (["node-data", "--help"], ["yaml", "xml.etree.ElementTree", "asyncio"]),
+}
+
+RUNNER = """
+import sys
+sys.argv = ["clab-terminal-launcher", *sys.argv[1:]]
+from clab_terminal_launcher.main import main
+main()
+"""
+
+def measure(arguments: list[str]) -> tuple[float, set[str]]:
+    """Run the CLI once in a fresh interpreter; returns the total import time in milliseconds and the imported modules"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", RUNNER, *arguments],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"CLI invocation {arguments} failed with exit code {result.returncode}:\n{result.stderr}")
+
+    total = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        # Format: "import time: <self us> | <cumulative us> | <indented module name>"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        selfTime, _, name = line[len("import time:"):].split("|")
+        total += int(selfTime)
+        modules.add(name.strip())
+    return total / 1000, modules
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="number of runs per invocation; the fastest run is reported (default: 5)")
+    parser.add_argument("--budget-ms", type=float, default=None, help="fail if any invocation spends longer than this importing modules")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per invocation instead of a table")
+    args = parser.parse_args()
+
+    failed = False
+    for label, (arguments, forbidden) in SCENARIOS.items():
+        runs = [measure(arguments) for _ in range(args.runs)]
+        fastest = min(time for time, _ in runs)
+        unexpected = sorted(module for module in forbidden if module in runs[0][1])
+        overBudget = args.budget_ms is not None and fastest > args.budget_ms
+        failed |= bool(unexpected) or overBudget
+
+        if args.json:
+            print(json.dumps({"benchmark": "import_time", "invocation": label, "import_ms": round(fastest, 2),
+                              "modules": len(runs[0][1]), "unexpected_imports": unexpected, "over_budget": overBudget}))
+        else:
+            status = "FAIL" if unexpected or overBudget else "ok"
+            print(f"{label:<30} {fastest:8.1f} ms  {len(runs[0][1]):4d} modules  {status}"
+                  f"{f'  unexpected imports: {", ".join(unexpected)}' if unexpected else ''}")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
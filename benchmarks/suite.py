@@ -0,0 +1,278 @@
+"""Benchmark suite for the clab-terminal-launcher node-data, credential resolution and launch code paths
+
+Times the utility's node-data, credential resolution and launch code paths against synthetic labs of each requested
+size (with process creation stubbed out), writing one JSON object per benchmark and size so commits can be compared.
+Run it from the repository root after installing the package:
+
+    python benchmarks/suite.py [--sizes 10,100,1000,10000,50000] [--repeat 3] [--only launch_putty,...] [--output results.jsonl]
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import generators
+
+from clab_terminal_launcher.launch import helpers as launchHelpers
+from clab_terminal_launcher.launch.commands import SecureCRT, PuTTY, MTPuTTY, native_OpenSSH, OpenSSH_config
+from clab_terminal_launcher.launch.helpers import parse_lab_devices
+from clab_terminal_launcher.launch.selectors import NodeSelector
+from clab_terminal_launcher.node_data.commands import retrieve_from_api, parse_inspect_output, read_local_labs, inject_custom_ports
+from clab_terminal_launcher.quick.commands import quick
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 50000]
+
+BENCHMARKS: dict[str, Callable[[str, int, contextlib.ExitStack], tuple[Callable[[], Any], Callable[[], None] | None]]] = {}
+
+def benchmark(f: Callable) -> Callable:
+    """Register a benchmark; the function prepares its input files in the provided working directory and returns the
+    function to time, along with an optional function to run (untimed) before each run to reset its inputs"""
+    BENCHMARKS[f.__name__] = f
+    return f
+
+class StubProcess:
+    """Stands in for subprocess.Popen while benchmarking launch commands; the "process" exits immediately"""
+    pids = itertools.count(1)
+
+    def __init__(self, args: list[str], *_, **__) -> None:
+        self.args = args
+        self.pid = next(self.pids)
+        self.returncode = 0
+
+    def poll(self) -> int:
+        return self.returncode
+
+class StandInAPIHandler(BaseHTTPRequestHandler):
+    """Serves pre-rendered responses for the Containerlab API endpoints used by the utility"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True # otherwise, small responses are held back by delayed ACKs
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def reply(self, body: bytes, status: int = 200) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.reply(b'{"token": "benchmark"}')
+
+    def do_GET(self) -> None:
+        responses = self.server.responses
+        if self.path in responses:
+            self.reply(responses[self.path])
+        else:
+            self.reply(b'{"error": "not found"}', status=404)
+
+def start_api(labs: dict[str, Any], stack: contextlib.ExitStack) -> tuple[str, int]:
+    """Start a stand-in Containerlab API serving the provided labs on an ephemeral port in a background thread; returns
+    its address and port"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInAPIHandler)
+    server.daemon_threads = True
+    server.responses = {"/api/v1/labs": json.dumps(labs).encode()} | {
+        f"/api/v1/labs/{lab}": json.dumps(nodes).encode() for lab, nodes in labs.items()}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stack.callback(server.server_close)
+    stack.callback(server.shutdown)
+    return server.server_address[:2]
+
+def launch_files(workdir: str, nodes: int) -> dict[str, str]:
+    """Write the rendered node data and credentials files used by the launch benchmarks"""
+    files = {"inputfile": os.path.join(workdir, "nodes.json"), "creds": os.path.join(workdir, "creds.yml")}
+    generators.write_json(files["inputfile"], generators.rendered_nodes(nodes))
+    generators.write_yaml(files["creds"], generators.creds_file(nodes))
+    return files
+
+@benchmark
+def parse_inspect_output_(workdir: str, nodes: int, stack: contextlib.ExitStack):
+    inputfile = os.path.join(workdir, "inspect.json")
+    generators.write_json(inputfile, generators.inspect_output(nodes))
+    return lambda: parse_inspect_output.callback(inputfile=inputfile, outputfile=os.path.join(workdir, "out.json"),
+                                                 clabHost="localhost", cache=False), None
+
+@benchmark
+def retrieve_from_api_all_labs(workdir: str, nodes: int, stack: contextlib.ExitStack):
+    host, port = start_api(labs=generators.api_labs(nodes), stack=stack)
+    return lambda: retrieve_from_api.callback(envfile=None, clabHost=host, port=port, outputfile=os.path.join(workdir, "out.json"),
+                                              labs=None, username="benchmark", password="benchmark", tokenCache=False,
+                                              cache=False), None
+
+@benchmark
+def retrieve_from_api_lab_list(workdir: str, nodes: int, stack: contextlib.ExitStack):
+    labs = generators.api_labs(nodes)
+    host, port = start_api(labs=labs, stack=stack)
+    return lambda: retrieve_from_api.callback(envfile=None, clabHost=host, port=port, outputfile=os.path.join(workdir, "out.json"),
+                                              labs=",".join(labs), username="benchmark", password="benchmark",
+                                              tokenCache=False, cache=False), None
+
+@benchmark
+def read_local_labs_topology(workdir: str, nodes: int, stack: contextlib.ExitStack):
+    for lab, data in generators.topology_data(nodes).items():
+        os.makedirs(os.path.join(workdir, f"clab-{lab}"), exist_ok=True)
+        generators.write_json(os.path.join(workdir, f"clab-{lab}", "topology-data.json"), data)
+    return lambda: read_local_labs.callback(outputfile=os.path.join(workdir, "out.json"), topologies=os.path.join(workdir, "clab-*"),
+                                            cache=False), None
+
+@benchmark
+def inject_custom_ports_(workdir: str, nodes: int, stack: contextlib.ExitStack):
+    datafile = os.path.join(workdir, "nodes.json")
+    portfile = os.path.join(workdir, "ports.yml")
+    generators.write_json(datafile, generators.rendered_nodes(nodes))
+    generators.write_yaml(portfile, generators.ports_file(nodes))
+    return lambda: inject_custom_ports.callback(output=os.path.join(workdir, "out.json"), portfile=portfile,
+                                                datafile=datafile, cache=False), None
+
+@benchmark
+def parse_lab_devices_(workdir: str, nodes: int, stack: contextlib.ExitStack):
+    files = launch_files(workdir=workdir, nodes=nodes)
+    return lambda: parse_lab_devices(devicesFile=files["inputfile"], credsFile=files["creds"], method="dns"), None
+
+@benchmark
+def parse_lab_devices_cached(workdir: str, nodes: int, stack: contextlib.ExitStack):
+    files = launch_files(workdir=workdir, nodes=nodes)
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_lab_devices(devicesFile=files["inputfile"], credsFile=files["creds"], method="dns", useCache=True)
+    return lambda: parse_lab_devices(devicesFile=files["inputfile"], credsFile=files["creds"], method="dns", useCache=True), None
+
+@benchmark
+def launch_mtputty(workdir: str, nodes: int, stack: contextlib.ExitStack):
+    files = launch_files(workdir=workdir, nodes=nodes)
+    config = os.path.join(workdir, "mtputty.xml")
+    return (lambda: MTPuTTY.callback(**files, method="ipv4", jumphost="jumphost", config=config, backups=5, cache=False),
+            lambda: generators.mtputty_config(nodes).write(config))
+
+def launch_benchmark(command: Any, **options) -> Callable:
+    """Return the setup function for a benchmark of a launch command that starts one process per device"""
+    def setup(workdir: str, nodes: int, stack: contextlib.ExitStack):
+        files = launch_files(workdir=workdir, nodes=nodes)
+        stack.enter_context(stub_processes())
+        return lambda: command.callback(**files, method="ipv4", jumphost="jumphost", cache=False, **options), None
+    return setup
+
+@contextlib.contextmanager
+def stub_processes():
+    """Replace process creation in the launch helpers with StubProcess"""
+    original = launchHelpers.Popen
+    launchHelpers.Popen = StubProcess
+    try:
+        yield
+    finally:
+        launchHelpers.Popen = original
+
+BENCHMARKS["launch_securecrt"] = launch_benchmark(SecureCRT, executable="securecrt")
+BENCHMARKS["launch_putty"] = launch_benchmark(PuTTY, executable="putty")
+BENCHMARKS["launch_native_openssh"] = launch_benchmark(native_OpenSSH, executable="ssh", terminal="xterm -e", sshconfig=None)
+BENCHMARKS["launch_securecrt_batched"] = launch_benchmark(SecureCRT, executable="securecrt", batch=True)
+BENCHMARKS["launch_native_openssh_batched"] = launch_benchmark(native_OpenSSH, executable="ssh", terminal="wt", sshconfig=None, batch=True)
+BENCHMARKS["launch_securecrt_selected"] = launch_benchmark(SecureCRT, executable="securecrt", selector=NodeSelector(expression="lab=lab0,kind=nokia_srlinux"))
+
+@benchmark
+def launch_openssh_config(workdir: str, nodes: int, stack: contextlib.ExitStack):
+    files = launch_files(workdir=workdir, nodes=nodes)
+    return lambda: OpenSSH_config.callback(**files, method="ipv4", jumphost="jumphost", cache=False,
+                                           outputfile=os.path.join(workdir, "ssh_config"), controlPath="~/.ssh/clab-%C",
+                                           controlPersist="10m", includeUserConfig=True), None
+
+@benchmark
+def quick_inspect_putty(workdir: str, nodes: int, stack: contextlib.ExitStack):
+    """The whole quick pipeline: parsing clab inspect output, injecting custom ports and launching PuTTY sessions"""
+    files = launch_files(workdir=workdir, nodes=nodes)
+    generators.write_json(os.path.join(workdir, "inspect.json"), generators.inspect_output(nodes))
+    generators.write_yaml(os.path.join(workdir, "ports.yml"), generators.ports_file(nodes))
+    config = os.path.join(workdir, "config.env")
+    with open(config, "w") as f:
+        f.write("BASIC_RETRIEVAL_METHOD=inspect\nBASIC_LAUNCH_METHOD=putty\n"
+                "RETRIEVE_INSPECT_INPUT=inspect.json\nRETRIEVE_INSPECT_OUTPUT=out.json\nRETRIEVE_INSPECT_CACHE=false\n"
+                "RETRIEVE_PORTS_FILE=ports.yml\nRETRIEVE_PORTS_CACHE=false\n"
+                f"LAUNCH_PUTTY_CREDS={files['creds']}\nLAUNCH_PUTTY_CACHE=false\n")
+    stack.enter_context(stub_processes())
+    return lambda: quick.main(args=["--config", config], standalone_mode=False), None
+
+def run_quietly(run: Callable[[], Any]) -> None:
+    """Run a benchmarked function with its output discarded, turning the utility exiting on an error into an exception"""
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            run()
+    except SystemExit as e:
+        raise RuntimeError(f"exited with status {e.code}: {output.getvalue().strip().splitlines()[-1:]}")
+
+def run_benchmark(name: str, nodes: int, repeat: int) -> dict[str, Any]:
+    """Run one benchmark for one lab size; returns its result record"""
+    record = {"benchmark": name.rstrip("_"), "nodes": nodes}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="clab-benchmark-") as workdir, contextlib.ExitStack() as stack:
+        os.chdir(workdir) # some commands (e.g., MTPuTTY backups) write to the current directory
+        stack.callback(os.chdir, cwd)
+        try:
+            run, reset = BENCHMARKS[name](workdir, nodes, stack)
+            times = []
+            for _ in range(repeat):
+                if reset is not None:
+                    reset()
+                start = time.perf_counter()
+                run_quietly(run)
+                times.append(time.perf_counter() - start)
+
+            # Measure memory separately, as tracing allocations slows everything down
+            if reset is not None:
+                reset()
+            tracemalloc.start()
+            try:
+                run_quietly(run)
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        except Exception as e:
+            return record | {"error": f"{type(e).__name__}: {e}"}
+
+    return record | {"runs": repeat,
+                     "seconds": round(min(times), 6),
+                     "median_seconds": round(statistics.median(times), 6),
+                     "nodes_per_second": round(nodes / min(times), 1),
+                     "peak_kib": round(peak / 1024, 1),
+                     "python": platform.python_version()}
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help=f"comma-separated list of lab sizes (number of nodes) to benchmark (default: {','.join(str(size) for size in DEFAULT_SIZES)})")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs per benchmark and size; the fastest is reported (default: 3)")
+    parser.add_argument("--only", help=f"comma-separated list of benchmarks to run (available: {', '.join(name.rstrip('_') for name in BENCHMARKS)})")
+    parser.add_argument("--output", help="append the results to this file instead of writing them to stdout")
+    args = parser.parse_args()
+
+    selected = [name for name in BENCHMARKS if args.only is None or name.rstrip("_") in args.only.split(",")]
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    failed = False
+    with (open(args.output, "a") if args.output else contextlib.nullcontext(sys.stdout)) as output:
+        for name, nodes in itertools.product(selected, sizes):
+            record = run_benchmark(name=name, nodes=nodes, repeat=args.repeat)
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            failed |= "error" in record
+            summary = (f"error: {record['error']}" if "error" in record else
+                       f"{record['seconds'] * 1000:10.1f} ms {record['nodes_per_second']:12.0f} nodes/s {record['peak_kib'] / 1024:9.1f} MiB peak")
+            print(f"{record['benchmark']:<28} {nodes:>6} nodes  {summary}", file=sys.stderr)
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,169 @@
+import os
 import shutil
-from functools import wraps
-from typing import Callable
+import time
+from functools import partial, wraps
+from typing import Any, Callable
 import shlex
-from xml.etree import ElementTree as ET
-from shutil import copy
+from subprocess import run, PIPE
 import click
-import os
-import re
-from .helpers import parse_lab_devices, run_command
+from .selectors import NodeSelector, NodeSelectorType
+from .helpers import (batch_securecrt, batch_tmux, batch_windows_terminal, is_windows_terminal, openssh_command, parse_lab_devices,
+                      probe_devices, rotate_backups, set_child_text, start_control_master, tmux_windows, LaunchPlan, LaunchScheduler, Password,
+                      MTPUTTY_BACKUP, PLAN_FORMATS)
+from ..misc.helpers import write_file_atomically
+from ..misc.instrumentation import phase
+from ..misc.models import Device
+
+CONFIG_LAUNCHERS = ["MTPuTTY", "OpenSSH_config"] # launchers that only write a configuration file for all of the devices
+MULTIPLEXER_LAUNCHERS = ["tmux"] # launchers that open a window for each device in one session with a few commands
 
 def launch_type(f: Callable) -> Callable:
     """Returns a wrapper function/decorator that includes standardized functionality for all launch types/methods (i.e., all terminal emulators, etc.)"""
-    @click.option("--creds", "-c", required=True,
-                  help="Specify the path to the input YAML file containing device credentials")
-    @click.option("--inputfile", "-i", required=True,
-                  help="Specify the path to the input JSON file containing running nodes")
-    @click.option("--method", "-m", type=click.Choice(["dns", "ipv4", "ipv6"]), default="dns",
-                  help="Specifies whether to use DNS hostnames, IPv4 addresses, or IPv6 addresses to connect to lab devices in Containerlab; default is DNS")
+    # Options for planning and running launch commands are only offered for the launch methods they apply to: MTPuTTY and
+    # OpenSSH config only write a configuration file, and tmux opens all of its windows with a few tmux commands, so only
+    # checking the devices (--probe) and printing the commands (--dry-run) apply to it
+    sessions = f.__name__ not in CONFIG_LAUNCHERS + MULTIPLEXER_LAUNCHERS
+    commands = f.__name__ not in CONFIG_LAUNCHERS
+    options = [
+        click.option("--creds", "-c", required=True,
+                     help="Specify the path to the input YAML file containing device credentials"),
+        click.option("--inputfile", "-i", required=True,
+                     help="Specify the path to the input JSON file containing running nodes"),
+        click.option("--method", "-m", type=click.Choice(["dns", "ipv4", "ipv6"]), default="dns",
+                     help="Specifies whether to use DNS hostnames, IPv4 addresses, or IPv6 addresses to connect to lab devices in Containerlab; default is DNS"),
+        click.option("--select", "selector", type=NodeSelectorType(),
+                     help=f"Only {'launch sessions to' if sessions else 'open windows for' if commands else 'write entries for'} the lab devices that match a selector, i.e., a comma-separated list of conditions on the lab, name, kind, image or group of the nodes, such as lab=core,kind=nokia_srlinux,name=spine*; <field>=<value> matches exactly (or as a glob, with wildcards), <field>~<regex> searches for a regular expression anywhere in the value (e.g., name~spine matches spine1 and superspine1; use ^ and $ to match the whole value, as * isn't a wildcard here), and != or !~ exclude the matching nodes. Conditions on different fields must all match, while conditions on the same field match if any of them does; default: all lab devices"),
+        click.option("--cache/--no-cache", default=False,
+                     help="Enable/disable loading the input file from the compact cache file next to it (with a .cache extension) while it is unchanged, (re)writing the cache file otherwise; the credentials file is never cached, as it may contain passwords; default: disabled")]
+    if sessions:
+        options += [
+            click.option("--max-in-flight", "maxInFlight", type=click.IntRange(min=0), default=0,
+                         help="Specify the maximum number of launched processes that may still be running at the same time; new sessions wait until an earlier process exits. Only useful for executables that hand sessions off to an existing window/instance and exit (e.g., SecureCRT with tabs); default: 0 (unlimited)"),
+            click.option("--rate", "-r", type=click.FloatRange(min=0), default=0,
+                         help="Specify the maximum number of sessions to launch per second (e.g., 5 to launch a session every 200 ms), to avoid overwhelming the desktop or the jumphost's SSH server; default: 0 (unlimited)")]
+    if commands:
+        options += [
+            click.option("--probe", is_flag=True, default=False,
+                         help=f"Check that the SSH port of each device accepts connections (all devices are checked at the same time) and only {'launch sessions to' if sessions else 'open windows for'} the devices that are ready; the checks are made directly from this machine, so the device addresses must be reachable without the jumphost"),
+            click.option("--probe-timeout", "probeTimeout", type=click.FloatRange(min=0, min_open=True), default=2.0,
+                         help="Specify the number of seconds to wait for each device to respond to the --probe check; default: 2"),
+            click.option("--probe-banner", "probeBanner", is_flag=True, default=False,
+                         help="With --probe, only consider a device to be ready once its SSH server sends its identification banner, rather than as soon as the TCP connection is accepted")]
+    if sessions:
+        options += [
+            click.option("--wait", "-w", type=click.FloatRange(min=0), default=0,
+                         help="With --probe, keep checking devices that aren't ready yet (with an increasing delay between checks) for up to this many seconds, launching sessions to them as they come up; default: 0 (don't wait)"),
+            click.option("--batch", is_flag=True, default=False,
+                         help="Combine the sessions into as few launch commands as possible, for launchers that can open multiple sessions with one command (which is much faster than starting a process for each session): SecureCRT opens the sessions in tabs using a small SecureCRT script (written to the temporary directory), and native OpenSSH sessions are opened in tabs if the terminal is Windows Terminal (wt); not applicable to PuTTY")]
+    if commands:
+        options += [
+            click.option("--dry-run", "dryRun", is_flag=True, default=False,
+                         help="Print the commands that would be run to launch the sessions (with passwords masked) instead of running them" if sessions else "Print the tmux commands that would be run to open the windows instead of running them")]
+    if sessions:
+        options += [
+            click.option("--export", "exportFile",
+                         help="Write the commands that would be run to launch the sessions to this file as a launch plan instead of running them, so that they can be run later or on another machine; passwords are replaced with CLAB_PASSWORD_<n> environment variables that must be set when running the plan"),
+            click.option("--export-format", "exportFormat", type=click.Choice(["json", "sh", "ps1"]),
+                         help="Specify the format of the launch plan written with --export: json, sh (shell script), or ps1 (PowerShell script); default: based on the extension of the export file (.json, .sh or .ps1), otherwise json")]
+
     @wraps(f)
-    def wrapper(inputfile: str, creds: str, method: str, jumphost: str | None = None, **kwargs):
-        devices = parse_lab_devices(devicesFile=inputfile, credsFile=creds, method=method)
+    def wrapper(inputfile: str | None, creds: str, method: str, jumphost: str | None = None, maxInFlight: int = 0, rate: float = 0,
+                probe: bool = False, probeTimeout: float = 2.0, probeBanner: bool = False, wait: float = 0, cache: bool = False,
+                batch: bool = False, dryRun: bool = False, exportFile: str | None = None, exportFormat: str | None = None,
+                selector: NodeSelector | None = None, nodeData: dict[str, Any] | None = None, **kwargs):
+        # nodeData isn't a command-line option; it is passed by the quick command with the rendered node data it already
+        # has in memory, in which case the input file isn't read (and doesn't need to exist). The names of the devices
+        # that sessions couldn't be launched to (i.e., that weren't ready or whose launch command failed) are returned,
+        # so that the watch command can try them again on its next poll
+        if nodeData is not None:
+            inputfile = "the retrieved node data"
+        devices = parse_lab_devices(devicesFile=inputfile, credsFile=creds, method=method, useCache=cache, data=nodeData, selector=selector)
+
+        if f.__name__ in CONFIG_LAUNCHERS:
+            with phase(name=f"write the {f.__name__.replace('_', ' ')} configuration"):
+                f(**kwargs, jumphost=jumphost, devices=devices)
+            return set()
 
-        if f.__name__ in ["MTPuTTY"]:
-            f(**kwargs, jumphost=jumphost, devices=devices)
-            return
+        if f.__name__ in MULTIPLEXER_LAUNCHERS:
+            skipped = []
+            if probe and not dryRun:
+                print(f"Checking whether {len(devices)} devices are ready to accept SSH connections...")
+                ready = probe_devices(devices=devices, timeout=probeTimeout, banner=probeBanner)
+                skipped = [name for name in devices if name not in ready]
+                devices = {name: node for name, node in devices.items() if name in ready}
+            elif probe:
+                print("Not checking whether devices are ready to accept SSH connections, as windows are only being planned")
+            if devices or not skipped:
+                with phase(name=f"open the {f.__name__} windows"):
+                    f(**kwargs, jumphost=jumphost, devices=devices, dryRun=dryRun)
+            if skipped:
+                print(f"Warning: skipped {len(skipped)} devices that weren't ready to accept SSH connections: {", ".join(skipped)}")
+            return set(skipped)
 
-        print(f"Preparing to launch {f.__name__.replace('_', ' ')} sessions for {len(devices)} devices from {inputfile}...")
+        # The commands for all of the sessions are planned before any of them are run, so that they can be combined into
+        # fewer commands, or printed/exported instead of being run
+        launcher = f.__name__.replace('_', ' ')
+        batcher = None
+        if batch:
+            if f.__name__ == "SecureCRT":
+                batcher = partial(batch_securecrt, executable=kwargs["executable"])
+            elif f.__name__ == "native_OpenSSH" and is_windows_terminal(terminal=shlex.split(kwargs["terminal"])):
+                batcher = partial(batch_windows_terminal, terminal=shlex.split(kwargs["terminal"]))
+            else:
+                print(f"Warning: {launcher}{' (without Windows Terminal)' if f.__name__ == 'native_OpenSSH' else ''} can't open multiple sessions with one command; launching a process for each session")
+
+        if dryRun or exportFile is not None:
+            if probe:
+                print("Not checking whether devices are ready to accept SSH connections, as sessions are only being planned")
+            plan = LaunchPlan(launcher=launcher, batcher=batcher)
+            for node in devices.values():
+                plan.add(device=node, cmd=f(**kwargs, jumphost=jumphost, node=node))
+            if dryRun:
+                plan.print()
+            if exportFile is not None:
+                plan.export(filename=exportFile, format=exportFormat or PLAN_FORMATS.get(os.path.splitext(exportFile)[1].lower(), "json"))
+            return set()
+
+        print(f"Preparing to launch {launcher} sessions for {len(devices)} devices from {inputfile}...")
         print(f"Using jumphost: {jumphost}" if jumphost is not None else "Not using a jumphost; connecting via localhost")
 
-        for name, node in devices.items():
-            print(f'Launching SSH session to device {name} using address {node["address"]}, port {node["ports"]["ssh"]}, username {node["username"]}{f", password {node["password"]}" if node["password"] is not None else ""}')
-            f(**kwargs, jumphost=jumphost, node=node)
+        if kwargs.get("sshconfig") is not None and jumphost is not None:
+            start_control_master(executable=kwargs["executable"], sshconfig=kwargs["sshconfig"], jumphost=jumphost)
+
+        scheduler = LaunchScheduler(maxInFlight=maxInFlight, rate=rate)
+        pending = devices
+        deadline = time.monotonic() + wait
+        delay = 1.0
+        while pending:
+            if probe:
+                print(f"Checking whether {len(pending)} devices are ready to accept SSH connections...")
+                ready = probe_devices(devices=pending, timeout=probeTimeout, banner=probeBanner)
+            else:
+                ready = set(pending)
+
+            plan = LaunchPlan(launcher=launcher, batcher=batcher)
+            for name, node in pending.items():
+                if name in ready:
+                    print(f'Launching SSH session to device {name} using address {node.address}, port {node.ports["ssh"]}, username {node.username}{", password *****" if node.password is not None else ""}')
+                    plan.add(device=node, cmd=f(**kwargs, jumphost=jumphost, node=node))
+            with phase(name="launch sessions"):
+                plan.run(scheduler=scheduler, executable=kwargs["executable"])
+
+            pending = {name: node for name, node in pending.items() if name not in ready}
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+            print(f"Waiting for {len(pending)} devices that aren't ready yet: {", ".join(pending)}")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 30)
+
+        if pending:
+            print(f"Warning: skipped {len(pending)} devices that weren't ready to accept SSH connections: {", ".join(pending)}")
+        scheduler.summarize()
+        return set(pending) | set(scheduler.failed)
+
+    for option in reversed(options):
+        wrapper = option(wrapper)
     return wrapper
 
 @click.group()
@@ -44,14 +177,14 @@ def launch() -> None:
               help="Specify the path/command to run the SecureCRT executable; default: securecrt")
 @click.option("--session", "-s", "jumphost",
               help="Specify the name of the jumphost session in SecureCRT (e.g., the session for the Containerlab host itself) using path notation (i.e., a session called s stored under a folder called f would be notated as f\\s")
-def SecureCRT(jumphost: str | None, executable: str, node: dict[str, str]) -> None:
+def SecureCRT(jumphost: str | None, executable: str, node: Device) -> list[str]:
     """Launch SecureCRT terminals to lab devices"""
-    cmd = [f'{executable}', '/T', '/ssh2', f'{node["address"]}', '/l', f'{node["username"]}', '/P', f'{node["ports"]["ssh"]}', '/accepthostkeys']
-    if node["password"] is not None:
-        cmd[6:6] = ['/password', f'{node["password"]}']
+    cmd = [f'{executable}', '/T', '/ssh2', f'{node.address}', '/l', f'{node.username}', '/P', f'{node.ports["ssh"]}', '/accepthostkeys']
+    if node.password is not None:
+        cmd[6:6] = ['/password', Password(node.password)]
     if jumphost is not None:
         cmd.insert(1, f'/firewall=Session:{jumphost}')
-    run_command(cmd=cmd, executable=executable)
+    return cmd
 
 @launch.command()
 @launch_type
@@ -59,42 +192,34 @@ def SecureCRT(jumphost: str | None, executable: str, node: dict[str, str]) -> No
               help="Specify the path/command to run the PuTTY executable; default: putty")
 @click.option("--session", "-s", "jumphost",
               help="Specify the name of the jumphost session in PuTTY (e.g., the session for the Containerlab host itself)")
-def PuTTY(jumphost: str | None, executable: str, node: dict[str, str]) -> None:
+def PuTTY(jumphost: str | None, executable: str, node: Device) -> list[str]:
     """Launch windowed PuTTY terminals to lab devices"""
-    cmd = [f'{executable}', '-ssh', '-P', f'{node["ports"]["ssh"]}', f'{node["address"]}', '-l', f'{node["username"]}', '-loghost', f'{node["name"]}']
-    if node["password"] is not None:
-        cmd[7:7] = ['-pw', f'{node["password"]}']
+    cmd = [f'{executable}', '-ssh', '-P', f'{node.ports["ssh"]}', f'{node.address}', '-l', f'{node.username}', '-loghost', f'{node.name}']
+    if node.password is not None:
+        cmd[7:7] = ['-pw', Password(node.password)]
     if jumphost is not None:
         cmd[1:1] = ['-load', f'{jumphost}']
-    run_command(cmd=cmd, executable=executable)
+    return cmd
 
 @launch.command()
 @launch_type
+@click.option("--backups", "-b", type=click.IntRange(min=0), default=5,
+              help="Specify the number of backups of the MTPuTTY configuration file to keep in the current directory (mtputty_backup1.xml being the most recent); a new backup is made each time the configuration is modified and the oldest backup beyond this number is deleted; use 0 to disable backups; default: 5")
 @click.option("--config", "-f", default="%appdata%\\TTYPlus\\mtputty.xml",
               help="Specify the path/location of the mtputty.xml configuration file; defaults to the normal location (%appdata%\\TTYPlus\\mtputty.xml); unless you are using the portable version or the XML file is referenced in a different place on your system (e.g., if you are running this script from WSL), you likely don't need to specify this option")
 @click.option("--session", "-s", "jumphost",
               help="Specify the name of the jumphost session in PuTTY (e.g., the session for the Containerlab host itself)")
-def MTPuTTY(jumphost: str | None, config: str, devices: dict[str, dict[str, str]]) -> None:
+def MTPuTTY(jumphost: str | None, config: str, backups: int, devices: dict[str, Device]) -> None:
     """Create MTPuTTY terminal sessions for lab devices (sessions must still be manually launched from MTPuTTY GUI)"""
+    from xml.etree import ElementTree as ET
     try:
-        existingBackups = []
-        for file in os.listdir("."):
-            isBackup = re.search(r"(?<=^mtputty_backup)[1-9][0-9]*(?=\.xml$)", file)
-            if isBackup:
-                existingBackups.append(int(isBackup.group()))
-
-        existingBackups.sort()
-
-        try:
-            backupFileName = f"mtputty_backup{existingBackups[-1] + 1}.xml"
-        except IndexError:
-            backupFileName = "mtputty_backup1.xml"
-        copy(src=config, dst=backupFileName)
+        backupFileName = rotate_backups(filename=config, backupName=MTPUTTY_BACKUP, count=backups)
     except (OSError, shutil.SameFileError) as e:
-        print(f"Error while creating a backup of the MTPuTTY configuration at {backupFileName} in the current directory: {e}")
+        print(f"Error while creating a backup of the MTPuTTY configuration in the current directory: {e}")
         exit(-1)
 
-    print(f"Backup of the MTPuTTY configuration successfully created in the {backupFileName} file in the current directory")
+    if backupFileName is not None:
+        print(f"Backup of the MTPuTTY configuration successfully created in the {backupFileName} file in the current directory")
 
     try:
         tree = ET.parse(config)
@@ -103,10 +228,17 @@ def MTPuTTY(jumphost: str | None, config: str, devices: dict[str, dict[str, str]
         if servers is None:
             raise ET.ParseError("<Servers><Putty> NOT found under the root XML element")
 
+        # Index the existing sessions for the lab devices by name in a single pass, so that they can be updated in place;
+        # any duplicate sessions for a lab device are removed
+        sessions = {}
         for server in list(servers):
-            if server.find("DisplayName").text in devices:
-                print(f"Removing existing session {server.find("DisplayName").text} from MTPuTTY database...")
-                servers.remove(server)
+            name = server.findtext("DisplayName")
+            if name in devices:
+                if name in sessions:
+                    print(f"Removing duplicate session {name} from MTPuTTY database...")
+                    servers.remove(server)
+                else:
+                    sessions[name] = server
     except (ET.ParseError, TypeError, AttributeError, FileNotFoundError) as e:
         print(f"Error while parsing the provided MTPuTTY XML configuration file: {e}")
         exit(-1)
@@ -114,20 +246,26 @@ def MTPuTTY(jumphost: str | None, config: str, devices: dict[str, dict[str, str]
     print(f"Using jumphost: {jumphost}" if jumphost is not None else "Not using a jumphost; connecting via localhost")
 
     for name, node in devices.items():
-        server = ET.SubElement(servers, "Node")
-        server.attrib["Type"] = "1"
-        ET.SubElement(server, "SavedSession").text = jumphost if jumphost is not None else "Default Settings"
-        ET.SubElement(server, "DisplayName").text = name
-        ET.SubElement(server, "ServerName").text = node["address"]
-        ET.SubElement(server, "Port").text = str(node["ports"]["ssh"])
-        ET.SubElement(server, "UserName").text = node["username"]
-        if node["password"] is not None:
-            ET.SubElement(server, "Password").text = node["password"]
-        ET.SubElement(server, "CLParams").text = f'{f"-load {jumphost} " if jumphost is not None else ""}-P {node["ports"]["ssh"]} -l {node["username"]}{" -pw *****" if node["password"] is not None else ""} {node["address"]}'
-        print(f"Creating session {name} in MTPuTTY database with address {node['address']}, port {node['ports']['ssh']}, username {node['username']}{f", password {node['password']}" if node["password"] is not None else ""}...")
+        fields = {"SavedSession": jumphost if jumphost is not None else "Default Settings",
+                  "DisplayName": name,
+                  "ServerName": node.address,
+                  "Port": str(node.ports["ssh"]),
+                  "UserName": node.username,
+                  "Password": node.password,
+                  "CLParams": f'{f"-load {jumphost} " if jumphost is not None else ""}-P {node.ports["ssh"]} -l {node.username}{" -pw *****" if node.password is not None else ""} {node.address}'}
+        if name in sessions:
+            for tag, text in fields.items():
+                set_child_text(element=sessions[name], tag=tag, text=text)
+        else:
+            server = ET.SubElement(servers, "Node")
+            server.attrib["Type"] = "1"
+            for tag, text in fields.items():
+                if text is not None:
+                    ET.SubElement(server, tag).text = text
+        print(f"{'Updating' if name in sessions else 'Creating'} session {name} in MTPuTTY database with address {node.address}, port {node.ports['ssh']}, username {node.username}{", password *****" if node.password is not None else ""}...")
 
     try:
-        tree.write(config)
+        write_file_atomically(filename=config, content=ET.tostring(tree.getroot()))
     except OSError as e:
         print(f"Error writing the new MTPuTTY configuration file to {config}: {e}")
         exit(-1)
@@ -141,11 +279,114 @@ def MTPuTTY(jumphost: str | None, config: str, devices: dict[str, dict[str, str]
               help="Specify the name of the jumphost (i.e., your Containerlab host), as defined in the OpenSSH client config file")
 @click.option("--terminal", "-t", required=True,
               help="Specify the exact command to execute your terminal of choice, INCLUDING any flags/options/parameters; this will be prepended to the OpenSSH command (i.e., <terminal command> <ssh command>)")
-def native_OpenSSH(jumphost: str | None, executable: str, node: dict[str, str], terminal: str) -> None:
+@click.option("--sshconfig", "-F",
+              help="Specify the path to an OpenSSH client config file generated by the \"launch openssh-config\" command; sessions are launched as \"ssh -F <file> <node name>\" using the settings in that file instead of building the full SSH command for each device, and, if a jumphost is specified, a single shared connection to it is opened first and reused by all sessions")
+def native_OpenSSH(jumphost: str | None, executable: str, node: Device, terminal: str, sshconfig: str | None) -> list[str]:
     """Launch terminal sessions to lab devices using OpenSSH and your native terminal of choice (NOTE: password autofill is NOT available for this option)"""
-    ssh_cmd = [f'{executable}', '-l', f'{node["username"]}', '-p', f'{node["ports"]["ssh"]}', f'{node["address"]}']
+    return shlex.split(terminal) + openssh_command(executable=executable, jumphost=jumphost, node=node, sshconfig=sshconfig)
+
+@launch.command()
+@launch_type
+@click.option("--executable", "-e", default="tmux",
+              help="Specify the path/command to run the tmux executable; default: tmux")
+@click.option("--ssh", default="ssh",
+              help="Specify the path/command to run the OpenSSH client executable in each tmux window; default: ssh")
+@click.option("--session", "-s", "jumphost",
+              help="Specify the name of the jumphost (i.e., your Containerlab host), as defined in the OpenSSH client config file")
+@click.option("--name", "-n", default="clab",
+              help="Specify the name of the tmux session to open the windows for the lab devices in; if the session already exists, windows are only added for the lab devices that don't have one yet (and restarted for the lab devices whose SSH session has ended); default: clab")
+@click.option("--sshconfig", "-F",
+              help="Specify the path to an OpenSSH client config file generated by the \"launch openssh-config\" command; sessions are launched as \"ssh -F <file> <node name>\" using the settings in that file instead of building the full SSH command for each device, and, if a jumphost is specified, a single shared connection to it is opened first and reused by all sessions")
+@click.option("--attach", is_flag=True, default=False,
+              help="Attach to the tmux session once the windows are opened (or switch to it, if this command is run from inside tmux); by default, the command to attach to the session is printed instead")
+def tmux(jumphost: str | None, executable: str, ssh: str, name: str, sshconfig: str | None, attach: bool, devices: dict[str, Device],
+         dryRun: bool = False) -> None:
+    """Open a window for each lab device in a single tmux session, using OpenSSH (NOTE: password autofill is NOT available for this option)"""
+    print(f"Using jumphost: {jumphost}" if jumphost is not None else "Not using a jumphost; connecting via localhost")
+    if sshconfig is not None and jumphost is not None and not dryRun:
+        start_control_master(executable=ssh, sshconfig=sshconfig, jumphost=jumphost)
+
+    # Windows are named after the lab devices and opened in the order of the labs, so the windows for each lab are next
+    # to each other; all of the windows are opened by one tmux command (or a few, for very large labs)
+    existing = tmux_windows(executable=executable, session=name)
+    windows = {deviceName: openssh_command(executable=ssh, jumphost=jumphost, node=node, sshconfig=sshconfig)
+               for deviceName, node in devices.items()}
+    for deviceName, node in devices.items():
+        if existing is None or deviceName not in existing:
+            print(f'{"Would open" if dryRun else "Opening"} window for device {deviceName} using address {node.address}, port {node.ports["ssh"]}, username {node.username}')
+        elif existing[deviceName]:
+            print(f"{'Would restart' if dryRun else 'Restarting'} window for device {deviceName}, as its SSH session has ended")
+
+    commands = batch_tmux(executable=executable, session=name, windows=windows, existing=existing)
+    if dryRun:
+        for cmd in commands:
+            print(f"Would run: {shlex.join(cmd)}")
+        return
+    for cmd in commands:
+        result = run(cmd, stderr=PIPE, text=True)
+        if result.returncode != 0:
+            print(f"Error running launch command {executable}: {result.stderr.strip()}")
+            exit(-1)
+
+    opened = sum(1 for deviceName in devices if existing is None or deviceName not in existing)
+    restarted = sum(1 for deviceName in devices if existing is not None and existing.get(deviceName, False))
+    if opened or restarted:
+        print(f"Opened {opened} and restarted {restarted} windows in tmux session {name} ({len(commands)} tmux command{'s' if len(commands) != 1 else ''})")
+    else:
+        print(f"All lab devices already have a window in tmux session {name}")
+    if attach:
+        run([executable, "switch-client" if os.environ.get("TMUX") else "attach-session", "-t", f"={name}"])
+    else:
+        print(f"Attach to the tmux session using \"{executable} attach -t {name}\"")
+
+@launch.command()
+@launch_type
+@click.option("--outputfile", "-o", default="clab_ssh_config",
+              help="Specify the path of the OpenSSH client config file to generate; default: clab_ssh_config in the current directory")
+@click.option("--session", "-s", "jumphost",
+              help="Specify the name of the jumphost (i.e., your Containerlab host), as defined in your OpenSSH client config file; sessions to lab devices will use it as their ProxyJump and share a single multiplexed connection to it")
+@click.option("--control-path", "controlPath", default="~/.ssh/clab-%C",
+              help="Specify the ControlPath (i.e., the location of the socket for the shared connection) to use for the jumphost; default: ~/.ssh/clab-%C")
+@click.option("--control-persist", "controlPersist", default="10m",
+              help="Specify how long the shared connection to the jumphost should stay open after the last session using it is closed, in the ControlPersist format (e.g., 30s, 10m, 1h, yes to keep it open indefinitely); default: 10m")
+@click.option("--include-user-config/--no-include-user-config", "includeUserConfig", default=True,
+              help="Include your own OpenSSH client config file (~/.ssh/config) at the end of the generated file, so that the jumphost and any global settings defined there still apply when the generated file is used with \"ssh -F\"; disable this if you include the generated file from ~/.ssh/config instead; default: enabled")
+def OpenSSH_config(jumphost: str | None, outputfile: str, controlPath: str, controlPersist: str, includeUserConfig: bool,
+                   devices: dict[str, Device]) -> None:
+    """Generate an OpenSSH client config file with an entry for each lab device, sharing one connection to the jumphost (sessions must then be launched with "ssh <node name>")"""
+    print(f"Using jumphost: {jumphost}" if jumphost is not None else "Not using a jumphost; connecting via localhost")
+
+    lines = [f"# Generated by clab-terminal-launcher for {len(devices)} lab devices; regenerate instead of editing by hand", ""]
+    for name, node in devices.items():
+        print(f'Creating entry {name} with address {node.address}, port {node.ports["ssh"]}, username {node.username}...')
+        lines += [f"Host {name}",
+                  f'    HostName {node.address.split("/")[0]}',
+                  f'    Port {node.ports["ssh"]}',
+                  f'    User {node.username}']
+        if jumphost is not None:
+            lines.append(f"    ProxyJump {jumphost}")
+        # Lab devices get new host keys each time they are redeployed, so don't record/verify them
+        lines += ["    StrictHostKeyChecking no",
+                  "    UserKnownHostsFile /dev/null",
+                  "    LogLevel ERROR",
+                  ""]
+
     if jumphost is not None:
-        ssh_cmd[1:1] = ['-J', f'{jumphost}']
+        lines += [f"Host {jumphost}",
+                  "    ControlMaster auto",
+                  f"    ControlPath {controlPath}",
+                  f"    ControlPersist {controlPersist}",
+                  ""]
 
-    cmd = shlex.split(terminal) + ssh_cmd
-    run_command(cmd=cmd, executable=executable)
\ No newline at end of file
+    if includeUserConfig:
+        lines += ["Match all",
+                  "    Include ~/.ssh/config",
+                  ""]
+
+    try:
+        with open(outputfile, "w") as file:
+            file.write("\n".join(lines))
+    except OSError as e:
+        print(f"Error writing the OpenSSH client config file to {outputfile}: {e}")
+        exit(-1)
+    print(f"OpenSSH client config successfully written to {outputfile}; connect to lab devices using \"ssh -F {outputfile} <node name>\" or the native-openssh command with \"--sshconfig {outputfile}\"")
\ No newline at end of file
@@ -0,0 +1,149 @@
+import os
+import shutil
+import time
+
+from dataclasses import dataclass
+from subprocess import run, PIPE, DEVNULL
+
+from ..misc.instrumentation import phase
+
+BACKENDS = ("keyring", "pass", "http", "file") # credential backends that passwords in the credentials file can refer to
+CREDENTIAL_TTL = 300 # number of seconds that passwords retrieved from credential backends are cached for, within one run
+SECRETS_URL_VARIABLE = "CLAB_SECRETS_URL" # environment variable containing the URL of the HTTP secrets endpoint
+SECRETS_TOKEN_VARIABLE = "CLAB_SECRETS_TOKEN" # environment variable containing the (optional) bearer token for the HTTP secrets endpoint
+PASS_CONCURRENCY = 8 # maximum number of pass processes to run at the same time
+
+@dataclass(frozen=True, slots=True)
+class SecretReference:
+    """A password stored in a credential backend, as referenced by an entry of the credentials file (e.g., password: {keyring: clab});
+    the username of the entry is part of the reference, as the keyring backend stores passwords by service and username"""
+    backend: str
+    reference: str
+    username: str | None
+
+    def __str__(self) -> str:
+        return f"{self.backend}:{self.reference}"
+
+class SecretCache:
+    """Passwords retrieved from credential backends, kept for a limited time, so that commands that launch sessions
+    repeatedly within the same process (e.g., the watch command) don't retrieve the same passwords every time"""
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self.entries: dict[SecretReference, tuple[str | None, float]] = {}
+
+    def get(self, reference: SecretReference) -> tuple[bool, str | None]:
+        """Returns whether the password for the reference is cached and, if so, the password"""
+        entry = self.entries.get(reference)
+        if entry is None or entry[1] < time.monotonic():
+            return False, None
+        return True, entry[0]
+
+    def set(self, reference: SecretReference, password: str | None) -> None:
+        self.entries[reference] = (password, time.monotonic() + self.ttl)
+
+CACHE = SecretCache(ttl=CREDENTIAL_TTL)
+
+def parse_secret_reference(value: dict, username: str | None) -> SecretReference:
+    """Helper function to convert the password of a credentials file entry that refers to a credential backend (i.e., a
+    mapping of one backend to the reference) into a SecretReference; raises ValueError if the reference is invalid"""
+    if len(value) != 1:
+        raise ValueError(f"password references must contain exactly one of: {', '.join(BACKENDS)}")
+    backend, reference = next(iter(value.items()))
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown credential backend {backend} (available backends: {', '.join(BACKENDS)})")
+    if not isinstance(reference, str) or not reference:
+        raise ValueError(f"the reference for the {backend} credential backend must be a non-empty string")
+    if backend == "file" and "#" not in reference:
+        raise ValueError("references for the file credential backend must be in the format <file>#<key>")
+    return SecretReference(backend=backend, reference=reference, username=username)
+
+def lookup_keyring(references: list[SecretReference]) -> dict[SecretReference, str | None]:
+    """Helper function to retrieve passwords from the OS keyring (e.g., Windows Credential Manager, macOS Keychain,
+    Secret Service), using the reference as the service name and the username of the entry"""
+    try:
+        import keyring # optional dependency, only imported when the keyring backend is actually used
+    except ImportError:
+        raise RuntimeError("the keyring package isn't installed (install it using pip install clab-terminal-launcher[keyring])")
+    return {reference: keyring.get_password(reference.reference, reference.username or "") for reference in references}
+
+def lookup_pass(references: list[SecretReference]) -> dict[SecretReference, str | None]:
+    """Helper function to retrieve passwords from pass (the standard Unix password manager), using the reference as the
+    name of the password in the password store; as with pass itself, only the first line of each entry is used"""
+    executable = shutil.which("pass")
+    if executable is None:
+        raise RuntimeError("the pass executable wasn't found")
+
+    def show(reference: SecretReference) -> str | None:
+        result = run([executable, "show", reference.reference], stdout=PIPE, stderr=DEVNULL, text=True)
+        return result.stdout.split("\n", 1)[0] if result.returncode == 0 and result.stdout else None
+
+    # pass can only show one entry at a time, so the entries are retrieved in parallel; each lookup runs in a copy of the
+    # caller's context, so that anything printed by it is held back along with the caller's messages by the quick command
+    from concurrent.futures import ThreadPoolExecutor
+    from contextvars import copy_context
+    contexts = [copy_context() for _ in references]
+    with ThreadPoolExecutor(max_workers=min(PASS_CONCURRENCY, len(references))) as executor:
+        return dict(zip(references, executor.map(lambda context, reference: context.run(show, reference), contexts, references)))
+
+def lookup_http(references: list[SecretReference]) -> dict[SecretReference, str | None]:
+    """Helper function to retrieve passwords from the HTTP secrets endpoint at the URL in the CLAB_SECRETS_URL environment
+    variable, POSTing the names of all of the secrets in a single request"""
+    url = os.environ.get(SECRETS_URL_VARIABLE)
+    if not url:
+        raise RuntimeError(f"the {SECRETS_URL_VARIABLE} environment variable isn't set")
+    import requests # only imported when the HTTP backend is actually used, as it is slow to import
+    token = os.environ.get(SECRETS_TOKEN_VARIABLE)
+    response = requests.post(url, json={"secrets": sorted({reference.reference for reference in references})},
+                             headers={"Authorization": f"Bearer {token}"} if token else {}, timeout=10)
+    response.raise_for_status()
+    secrets = response.json().get("secrets")
+    if not isinstance(secrets, dict):
+        raise ValueError("the response doesn't contain a mapping of secrets")
+    return {reference: str(secrets[reference.reference]) if secrets.get(reference.reference) is not None else None
+            for reference in references}
+
+def lookup_file(references: list[SecretReference]) -> dict[SecretReference, str | None]:
+    """Helper function to retrieve passwords from local YAML/JSON files mapping keys to passwords, referenced as <file>#<key>;
+    each file is only read once"""
+    import yaml # only imported when the file backend is actually used, as it is slow to import
+    files = {}
+    passwords = {}
+    for reference in references:
+        filename, _, key = reference.reference.rpartition("#")
+        if filename not in files:
+            try:
+                with open(filename, "r") as f:
+                    files[filename] = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+            except (OSError, yaml.YAMLError) as e:
+                print(f"Warning: Unable to read passwords from {filename}: {e}")
+                files[filename] = None
+        secrets = files[filename]
+        passwords[reference] = str(secrets[key]) if isinstance(secrets, dict) and secrets.get(key) is not None else None
+    return passwords
+
+LOOKUPS = {"keyring": lookup_keyring, "pass": lookup_pass, "http": lookup_http, "file": lookup_file}
+
+def resolve_secrets(references: set[SecretReference]) -> dict[SecretReference, str | None]:
+    """Helper function to retrieve the passwords that aren't cached yet for the provided references, with a single lookup per
+    credential backend; passwords that can't be retrieved are None, and those of a failed backend aren't cached"""
+    passwords = {}
+    pending: dict[str, list[SecretReference]] = {}
+    for reference in references:
+        cached, password = CACHE.get(reference)
+        if cached:
+            passwords[reference] = password
+        else:
+            pending.setdefault(reference.backend, []).append(reference)
+
+    for backend, backendReferences in pending.items():
+        try:
+            with phase(name=f"retrieve passwords from the {backend} credential backend"):
+                retrieved = LOOKUPS[backend](backendReferences)
+        except Exception as e:
+            print(f"Warning: Unable to retrieve passwords from the {backend} credential backend: {e}")
+            passwords |= dict.fromkeys(backendReferences)
+            continue
+        for reference, password in retrieved.items():
+            CACHE.set(reference=reference, password=password)
+        passwords |= retrieved
+    return passwords
@@ -1,81 +1,600 @@
+import fnmatch
 import json
+import os
+import re
+import shlex
+import shutil
+import stat
+import time
 
-import yaml
-from subprocess import Popen
+from dataclasses import dataclass, field
+from subprocess import list2cmdline, Popen, run, DEVNULL, PIPE
 
-from ..misc.helpers import read_object_from_structured_data, retrieve_and_delete_metadata, check_if_list, handle_dict_access_errors
+from typing import Any, Callable
 
+from ..misc.helpers import read_object_from_structured_data, retrieve_and_delete_metadata, handle_dict_access_errors, write_file_atomically
+from ..misc.instrumentation import count, observe, phase
+from ..misc.models import load_nodes, Device
+from .credentials import parse_secret_reference, resolve_secrets, SecretReference
+from .selectors import NodeSelector
+
+PROBE_CONCURRENCY = 256 # maximum number of simultaneous reachability probes, to stay well within open file limits
+MTPUTTY_BACKUP = "mtputty_backup{}.xml" # names of the backups of the MTPuTTY configuration, in the current directory
+PLAN_FORMATS = {".json": "json", ".sh": "sh", ".ps1": "ps1"} # launch plan export formats, by file extension
+PASSWORD_VARIABLE = "CLAB_PASSWORD_" # prefix of the variables that replace passwords in printed/exported launch plans
+ESCAPED_SUFFIX = "_ESCAPED" # suffix of the variables holding the value of another variable escaped for a quoted SecureCRT connection argument
+BATCH_COMMAND_LIMIT = 8000 # maximum length of a batched command line, well within the Windows limit of 32767 characters
+TMUX_COMMAND_LIMIT = 12000 # maximum length of a batched tmux command line, as tmux sends it to its server in one message of at most 16 KiB
+SECURECRT_SCRIPT = ("CLAB_SECURECRT_SCRIPT", "clab_securecrt_connect.py", # variable, file name and contents of the SecureCRT script used to batch sessions
+                    '# $language = "Python3"\n'
+                    '# $interface = "1.0"\n'
+                    '# Generated by clab-terminal-launcher; opens a tab for the connection arguments passed with each /ARG\n'
+                    'for index in range(crt.Arguments.Count):\n'
+                    '    crt.Session.ConnectInTab(crt.Arguments[index], False)\n')
+
+class CredentialResolver:
+    """Resolves the credentials for lab devices from a credentials file that is indexed by filter once (node, node pattern,
+    image, kind, default, lab-scoped first); entries without a username are skipped and an empty entry excludes the device"""
+    def __init__(self, creds: dict[str, Any], credsFile: str) -> None:
+        self.credsFile = credsFile
+        self.scopes: dict[str | None, dict[str, Any]] = {}
+        self.scopes[None] = self.index_scope(entries=creds, scopeName=None)
+        self.cache: dict[tuple[str | None, str, str], list[tuple[str | None, str | SecretReference | None] | None]] = {}
+
+    @classmethod
+    def from_file(cls, credsFile: str) -> "CredentialResolver":
+        # The credentials file is never cached, as the cache would be another copy of any passwords stored in it
+        try:
+            return cls(creds=read_object_from_structured_data(filename=credsFile, expected_format="yaml"), credsFile=credsFile)
+        except Exception as e:
+            import yaml # already imported, as the credentials file was parsed
+            if not isinstance(e, yaml.YAMLError):
+                raise
+            print(f"Error while importing lab device credentials from {credsFile}: {e}")
+            exit(-1)
+
+    def validate_entry(self, condition: str, entry: Any) -> tuple[str | None, str | SecretReference | None] | None:
+        if entry is None: # empty entries exclude the devices that match them
+            return None
+        if not isinstance(entry, dict):
+            handle_dict_access_errors(exception=TypeError(f"credentials for {condition} are {type(entry).__name__}"),
+                                      errorString=f"Error while processing credentials for {condition} in {self.credsFile}")
+        username = str(entry["username"]) if entry.get("username") is not None else None
+        password = entry.get("password")
+        if isinstance(password, dict): # a reference to a password stored in a credential backend
+            try:
+                return username, parse_secret_reference(value=password, username=username)
+            except ValueError as e:
+                print(f"Error while processing credentials for {condition} in {self.credsFile}: {e}")
+                exit(-1)
+        return username, str(password) if password is not None else None
+
+    def index_scope(self, entries: dict[str, Any], scopeName: str | None) -> dict[str, Any]:
+        scope = {"node": {}, "patterns": [], "image": {}, "kind": {}, "default": []}
+        for condition, entry in entries.items():
+            filterType, separator, value = re.match(r"^([a-z]*)([=~]?)(.*)$", str(condition), re.DOTALL).groups()
+            match filterType, separator:
+                case "default", "":
+                    scope["default"] = [self.validate_entry(condition=condition, entry=entry)]
+                case "node", "=" if not any(char in value for char in "*?["):
+                    scope["node"][value] = self.validate_entry(condition=condition, entry=entry)
+                case "node", "=":
+                    scope["patterns"].append((re.compile(f"^{fnmatch.translate(value)}"), self.validate_entry(condition=condition, entry=entry)))
+                case "node", "~":
+                    try:
+                        scope["patterns"].append((re.compile(value), self.validate_entry(condition=condition, entry=entry)))
+                    except re.error as e:
+                        print(f"Error while processing credentials for {condition} in {self.credsFile}: invalid regular expression; {e}")
+                        exit(-1)
+                case ("image" | "kind"), "=":
+                    scope[filterType][value] = self.validate_entry(condition=condition, entry=entry)
+                case "lab", "=" if scopeName is None:
+                    if not isinstance(entry, dict):
+                        print(f"Error while processing credentials for {condition} in {self.credsFile}: lab filters must contain a mapping of filters")
+                        exit(-1)
+                    self.scopes[value] = self.index_scope(entries=entry, scopeName=value)
+                case _:
+                    print(f"Warning: Ignoring unrecognized filter {condition}{f" under lab={scopeName}" if scopeName is not None else ""} in {self.credsFile}")
+        return scope
+
+    def resolve(self, lab: str, name: str, image: str, kind: str) -> tuple[str | None, str | SecretReference | None] | None:
+        """Returns the credentials for the device, or None if no filter with a username matches the device"""
+        scopes = [self.scopes[scope] for scope in (lab, None) if scope in self.scopes]
+        entries = [scope["node"][name] for scope in scopes if name in scope["node"]]
+        entries += [creds for scope in scopes for pattern, creds in scope["patterns"] if pattern.search(name)]
+
+        # The image, kind and default entries only depend on the lab, image and kind of the device, so they are shared
+        cacheKey = (lab, image, kind)
+        if cacheKey not in self.cache:
+            self.cache[cacheKey] = ([scope[filterType][value] for filterType, value in (("image", image), ("kind", kind))
+                                     for scope in scopes if value in scope[filterType]]
+                                    + [creds for scope in scopes for creds in scope["default"]])
+
+        fallback = None
+        for creds in entries + self.cache[cacheKey]:
+            if creds is None:
+                break
+            if creds[0] is None:
+                continue
+            if creds[1] is not None:
+                return creds
+            fallback = fallback or creds
+        return fallback
+
+@phase(name="load lab devices and credentials")
 def parse_lab_devices(devicesFile: str,
                       credsFile: str,
-                      method: str) -> dict[str, dict[str, str]]:
-    """Helper function to parse the rendered JSON file from the node-data commands in this utility
-    to extract the required information for connectivity to lab devices"""
-    try:
-        devices = read_object_from_structured_data(filename=devicesFile, expected_format="json")
-        creds = read_object_from_structured_data(filename=credsFile, expected_format="yaml")
-    except (json.JSONDecodeError, ValueError) as e:
-        print(f"Error while importing lab devices from {devicesFile}: {e}")
-        exit(-1)
-    except yaml.YAMLError as e:
-        print(f"Error while importing lab device credentials from {credsFile}: {e}")
-        exit(-1)
-
-    metadata = retrieve_and_delete_metadata(data=devices, filename=devicesFile)
+                      method: str,
+                      useCache: bool = False,
+                      data: dict[str, Any] | None = None,
+                      selector: NodeSelector | None = None) -> dict[str, Device]:
+    """Helper function to parse the rendered JSON file from the node-data commands in this utility (or the provided in-memory
+    node data) to extract the required information for connectivity to the lab devices that match the selector, if any"""
+    if data is not None:
+        nodes = dict(data) # the metadata is removed below, which must not affect the caller's copy
+        metadata = retrieve_and_delete_metadata(data=nodes, filename=devicesFile)
+    else:
+        try:
+            devices = read_object_from_structured_data(filename=devicesFile, expected_format="json", useCache=useCache)
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Error while importing lab devices from {devicesFile}: {e}")
+            exit(-1)
+        metadata = retrieve_and_delete_metadata(data=devices, filename=devicesFile)
+        if selector is not None: # the nodes of labs that the selector excludes aren't loaded at all
+            devices = {lab: devices[lab] for lab in selector.labs(labs=devices)}
+        nodes = load_nodes(data=devices, filename=devicesFile)
+    if selector is not None:
+        nodes = selector.select(nodes=nodes)
+        print(f"Selected {sum(map(len, nodes.values()))} lab devices matching {selector}")
+    resolver = CredentialResolver.from_file(credsFile=credsFile)
 
     output = {}
-    for lab, deviceList in devices.items():
-        for idx, device in enumerate(check_if_list(data=deviceList, errorString=f"Error parsing device list for {lab} in {devicesFile}")):
-            deviceDict = {}
-            try:
-                deviceDict["name"] = device["name"]
-                if device["method"] == "clabHost":
-                    deviceDict["address"] = metadata["clabHost"]
-                else:
-                    match method:
-                        case "dns":
-                            deviceDict["address"] = device["name"]
-                        case "ipv4":
-                            deviceDict["address"] = device["ipv4_address"]
-                        case "ipv6":
-                            deviceDict["address"] = device["ipv6_address"]
-
-                deviceDict["ports"] = device["ports"]
-
-                conditions = [f'node={device["name"]}', f'image={device["image"]}', f'kind={device["kind"]}', "default"]
-            except (KeyError, TypeError) as e:
-                handle_dict_access_errors(exception=e, errorString=f"Error parsing data for device #{idx + 1} in {devicesFile}")
-
-            for condition in conditions:
-                try:
-                    for val in ["username", "password"]:
-                        deviceDict[val] = creds[condition][val]
-                    break
-                except KeyError:
-                    continue
-                except TypeError as e:
-                    if creds[condition] is None:
-                        break
-                    handle_dict_access_errors(exception=e, errorString=f"Error while processing credentials for {condition} in {credsFile}")
+    references = {}
+    for lab, labNodes in nodes.items():
+        for node in labNodes:
+            if node.method == "clabHost":
+                address = node.clabHost if node.clabHost is not None else metadata.get("clabHost")
+                if address is None:
+                    handle_dict_access_errors(exception=KeyError("clabHost"), errorString=f"Error parsing the metadata in {devicesFile}")
+            else:
+                match method:
+                    case "dns":
+                        address = node.name
+                    case "ipv4":
+                        address = node.ipv4_address
+                    case "ipv6":
+                        address = node.ipv6_address
 
-            if "username" not in deviceDict:
-                print(f'Error: Unable to retrieve username for device {device["name"]}; skipping device...')
+            username, password = resolver.resolve(lab=lab, name=node.name, image=node.image, kind=node.kind) or (None, None)
+            if username is None:
+                print(f'Error: Unable to retrieve username for device {node.name}; skipping device...')
                 continue
 
-            if "password" not in deviceDict:
-                deviceDict["password"] = None
-                print(f'Warning: Unable to retrieve password for device {device["name"]}. Password autofill won\'t be available for this device')
+            if isinstance(password, SecretReference):
+                references[node.name] = password
+                password = None
+            elif password is None:
+                print(f'Warning: Unable to retrieve password for device {node.name}. Password autofill won\'t be available for this device')
 
-            output[device["name"]] = deviceDict
+            output[node.name] = Device(name=node.name, address=address, ports=node.ports, username=username, password=password)
 
+    # Passwords stored in credential backends are retrieved together once all of the devices are known, so that each
+    # password is only retrieved once, however many devices (e.g., of the same kind/image) share it
+    if references:
+        passwords = resolve_secrets(references=set(references.values()))
+        for name, reference in references.items():
+            output[name].password = passwords.get(reference)
+            if output[name].password is None:
+                print(f'Warning: Unable to retrieve password for device {name} from {reference}. Password autofill won\'t be available for this device')
+
+    count(name="lab devices loaded", value=len(output))
     return output
 
-def run_command(cmd: list[str], executable: str) -> None:
-    """Helper function used by launch commands to run a command/start a process using
-    the provided list of arguments and executable name and handle standard errors"""
+async def probe_device(address: str, port: int, timeout: float, banner: bool) -> bool:
+    """Helper function to check whether a device is ready to accept SSH connections by opening a TCP connection to
+    its SSH port (and, optionally, waiting for the SSH server to send its identification banner) within the timeout"""
+    import asyncio
+    try:
+        async with asyncio.timeout(timeout):
+            reader, writer = await asyncio.open_connection(host=address.split("/")[0], port=port)
+            try:
+                return (await reader.readline()).startswith(b"SSH-") if banner else True
+            finally:
+                writer.close()
+    except (OSError, TimeoutError, ValueError):
+        return False
+
+@phase(name="probe devices")
+def probe_devices(devices: dict[str, Device], timeout: float, banner: bool) -> set[str]:
+    """Helper function to probe the SSH ports of all of the provided devices concurrently; returns the names of the devices
+    that are ready to accept SSH connections"""
+    import asyncio # only imported when probing, as it is slow to import
+
+    async def probe_all() -> list[bool]:
+        semaphore = asyncio.Semaphore(PROBE_CONCURRENCY)
+
+        async def probe(device: Device) -> bool:
+            async with semaphore:
+                return await probe_device(address=device.address, port=int(device.ports["ssh"]), timeout=timeout, banner=banner)
+
+        return await asyncio.gather(*(probe(device) for device in devices.values()))
+
+    return {name for name, ready in zip(devices, asyncio.run(probe_all())) if ready}
+
+def run_command(cmd: list[str], executable: str) -> Popen | None:
+    """Helper function used by launch commands to run a command/start a process using the provided list of arguments
+    and executable name and handle standard errors; returns the started process, or None if it couldn't be started"""
+    startTime = time.perf_counter()
     try:
-        Popen(cmd)
+        return Popen(cmd)
     except FileNotFoundError:
         print(f"Error running launch command: {executable} not found. Try the following steps:\n(1) Running the executable provided directly in the shell to test its functionality\n(2) Using an absolute path, if you are using a relative path\n(3) Confirming that the file exists and that your user has permission to view/execute it")
         exit(-1)
     except OSError as e:
-        print(f"Error running launch command {executable}: {e}")
\ No newline at end of file
+        print(f"Error running launch command {executable}: {e}")
+        return None
+    finally:
+        observe(name="launch process start", seconds=time.perf_counter() - startTime)
+
+def start_control_master(executable: str, sshconfig: str, jumphost: str) -> bool:
+    """Helper function used by the native OpenSSH launch command to open the shared (ControlMaster) connection to the jumphost
+    before any sessions are launched, using the provided SSH config file; returns whether a master connection is available"""
+    try:
+        if run([executable, "-F", sshconfig, "-O", "check", jumphost], stdout=DEVNULL, stderr=DEVNULL).returncode == 0:
+            print(f"Reusing the existing shared connection to jumphost {jumphost}")
+            return True
+
+        print(f"Opening a shared connection to jumphost {jumphost} for all sessions to use...")
+        if run([executable, "-F", sshconfig, "-f", "-N", jumphost]).returncode == 0:
+            return True
+    except OSError as e:
+        print(f"Error running {executable} to open the shared connection to jumphost {jumphost}: {e}")
+
+    print(f"Warning: unable to open a shared connection to jumphost {jumphost}; each session will connect to the jumphost separately")
+    return False
+
+def rotate_backups(filename: str, backupName: str, count: int) -> str | None:
+    """Helper function to back up a file into a bounded, rotating set of backups named using the backupName template (backup 1
+    is the most recent one, and the oldest one is dropped); returns the name of the new backup, or None if count is 0"""
+    if count == 0:
+        return None
+    os.stat(filename) # make sure the file exists before any of the existing backups are rotated
+    for index in range(count - 1, 0, -1):
+        if os.path.exists(backupName.format(index)):
+            os.replace(backupName.format(index), backupName.format(index + 1))
+    shutil.copy(src=filename, dst=backupName.format(1))
+    return backupName.format(1)
+
+def set_child_text(element: Any, tag: str, text: str | None) -> None:
+    """Helper function to set the text of the first child XML element with the provided tag, creating the child element
+    (at the end) if it doesn't exist yet, or removing it if the text is None"""
+    child = element.find(tag)
+    if text is None:
+        if child is not None:
+            element.remove(child)
+        return
+    if child is None:
+        child = element.makeelement(tag, {})
+        element.append(child)
+    child.text = text
+
+class LaunchScheduler:
+    """Starts launch command processes, optionally limiting the number of started processes that may still be running
+    at the same time (maxInFlight) and the number of processes started per second (rate), and reaps processes as they exit"""
+    def __init__(self, maxInFlight: int = 0, rate: float = 0) -> None:
+        self.maxInFlight = maxInFlight
+        self.interval = 1 / rate if rate > 0 else 0
+        self.running: dict[int, tuple[list[str], Popen]] = {}
+        self.launched = 0
+        self.failed: list[str] = []
+        self.lastLaunch: float | None = None
+        self.startTime = time.monotonic()
+
+    def reap(self) -> None:
+        for pid, (devices, process) in list(self.running.items()):
+            returnCode = process.poll()
+            if returnCode is not None:
+                del self.running[pid]
+                if returnCode != 0:
+                    print(f"Warning: launch command for device{'s' if len(devices) != 1 else ''} {', '.join(devices)} exited with status {returnCode}")
+                    self.failed += devices
+
+    def launch(self, devices: list[str], cmd: list[str], executable: str) -> None:
+        """Start the command that launches sessions to the provided devices, once the limits allow it"""
+        self.reap()
+        while self.maxInFlight and len(self.running) >= self.maxInFlight:
+            time.sleep(0.05)
+            self.reap()
+
+        if self.interval and self.lastLaunch is not None:
+            delay = self.lastLaunch + self.interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        process = run_command(cmd=cmd, executable=executable)
+        self.lastLaunch = time.monotonic()
+        if process is None:
+            self.failed += devices
+        else:
+            self.running[process.pid] = (devices, process)
+            self.launched += len(devices)
+            count(name="sessions launched", value=len(devices))
+
+    def summarize(self) -> None:
+        self.reap()
+        print(f"Launched {self.launched} sessions in {time.monotonic() - self.startTime:.2f} seconds; "
+              f"{len(self.failed)} failed{f" ({", ".join(self.failed)})" if self.failed else ""}, {len(self.running)} still running")
+
+def variable(name: str) -> str:
+    """Helper function to return a reference to a variable (e.g., a masked password) to embed in launch plan commands,
+    which is rendered for each output (see LaunchPlan.render)"""
+    return f"\0{name}\0"
+
+def quote_argument(value: str) -> str:
+    """Helper function to quote a value for a Windows-style command line (e.g., the arguments of a SecureCRT /ARG), escaping
+    any double quotes with a backslash and doubling the backslashes that precede them or the closing quote"""
+    return '"' + re.sub(r'(\\*)("|$)', lambda match: match.group(1) * 2 + ('\\"' if match.group(2) else ""), value) + '"'
+
+class Password(str):
+    """A password in a launch command, as built by a launcher, so that only that token of the command is masked
+    (rather than every token that happens to be equal to the password, such as a username)"""
+    __slots__ = ()
+
+@dataclass(slots=True)
+class LaunchStep:
+    """A command in a launch plan for one or more lab devices, along with the positions of its passwords and the files
+    (by the variable that refers to their path) to write to a private directory before it is run"""
+    devices: list[str]
+    cmd: list[str]
+    passwords: list[int] = field(default_factory=list)
+    files: dict[str, tuple[str, str]] = field(default_factory=dict)
+
+class LaunchPlan:
+    """Commands to launch sessions to lab devices, computed up front so that they can be batched, run, printed or exported
+    (as JSON or a shell/PowerShell script), with each distinct password masked as a CLAB_PASSWORD_<n> variable"""
+    def __init__(self, launcher: str, batcher: Callable[[list[LaunchStep]], LaunchStep] | None = None) -> None:
+        self.launcher = launcher
+        self.batcher = batcher
+        self.steps: list[LaunchStep] = []
+
+    def add(self, device: Device, cmd: list[str]) -> None:
+        self.steps.append(LaunchStep(devices=[device.name], cmd=cmd, passwords=[index for index, token in enumerate(cmd) if isinstance(token, Password)]))
+
+    def commands(self, mask: bool = False) -> list[LaunchStep]:
+        """Returns the commands to run, with the passwords replaced with variables if mask is set, combining the commands
+        for consecutive devices (while the combined command line stays within BATCH_COMMAND_LIMIT) if there is a batcher"""
+        steps = self.steps
+        if mask:
+            passwords = self.passwords()
+            steps = [LaunchStep(devices=step.devices, cmd=[variable(passwords[token]) if index in step.passwords else token for index, token in enumerate(step.cmd)],
+                                files=step.files) for step in steps]
+        if self.batcher is None:
+            return steps
+
+        batched, chunk, length = [], [], 0
+        for step in steps:
+            stepLength = len(list2cmdline(step.cmd))
+            if chunk and length + stepLength > BATCH_COMMAND_LIMIT:
+                batched.append(self.batcher(chunk))
+                chunk, length = [], 0
+            chunk.append(step)
+            length += stepLength
+        if chunk:
+            batched.append(self.batcher(chunk))
+        return batched
+
+    def passwords(self) -> dict[str, str]:
+        """Returns the variable that replaces each distinct password when the plan is masked"""
+        passwords = {}
+        for step in self.steps:
+            for index in step.passwords:
+                passwords.setdefault(step.cmd[index], f"{PASSWORD_VARIABLE}{len(passwords) + 1}")
+        return passwords
+
+    @staticmethod
+    def render(token: str, style: str, values: dict[str, str] | None = None) -> str:
+        """Render a command token to run it ("run", with the provided values of the variables), print it ("print", masked),
+        or export it ("json", "sh" or "ps1", with references to the variables in the syntax of the format)"""
+        parts = token.split("\0") # literal text alternating with variable names
+        match style:
+            case "sh" if len(parts) == 1:
+                return shlex.quote(token)
+            case "sh":
+                return '"' + "".join(re.sub(r'([\\"$`])', r"\\\1", part) if index % 2 == 0 else f"${{{part}}}" for index, part in enumerate(parts)) + '"'
+            case "ps1":
+                return '"' + "".join(re.sub(r'([`"$])', r"`\1", part) if index % 2 == 0 else f"$env:{part}" for index, part in enumerate(parts)) + '"'
+            case "run":
+                return "".join(part if index % 2 == 0 else values[part] for index, part in enumerate(parts))
+            case "print":
+                return "".join(part if index % 2 == 0 else "*****" if part.startswith(PASSWORD_VARIABLE) else f"${{{part}}}" for index, part in enumerate(parts))
+            case "json":
+                return "".join(part if index % 2 == 0 else f"${{{part}}}" for index, part in enumerate(parts))
+
+    def run(self, scheduler: "LaunchScheduler", executable: str) -> None:
+        """Run the commands in the plan using the provided scheduler, writing any files that they need first (into a
+        directory that only the current user can access, so that other users can't replace them before they are used)"""
+        values = {}
+        for step in self.commands():
+            for name, (fileName, contents) in step.files.items():
+                if name in values:
+                    continue
+                try:
+                    values[name] = os.path.join(private_directory(), fileName)
+                    write_file_atomically(filename=values[name], content=contents.encode(), mode=0o600)
+                except OSError as e:
+                    print(f"Error writing {fileName}, which is needed to launch sessions: {e}")
+                    exit(-1)
+            scheduler.launch(devices=step.devices, cmd=[self.render(token=token, style="run", values=values) for token in step.cmd],
+                             executable=executable)
+
+    def print(self) -> None:
+        """Print the commands in the plan (with the passwords masked) instead of running them"""
+        for step in self.commands(mask=True):
+            print(f"Would launch {len(step.devices)} session{'s' if len(step.devices) != 1 else ''} ({', '.join(step.devices)}) with: "
+                  f"{shlex.join(self.render(token=token, style='print') for token in step.cmd)}")
+
+    def export(self, filename: str, format: str) -> None:
+        """Write the plan (with the passwords masked) to the provided file in the provided format (json, sh or ps1)"""
+        steps = self.commands(mask=True)
+        passwords = self.passwords()
+        users = {} # the devices whose commands use each password variable
+        for step in self.steps:
+            for secret in dict.fromkeys(step.cmd[index] for index in step.passwords):
+                users.setdefault(passwords[secret], []).extend(step.devices)
+        files = {name: entry for step in steps for name, entry in step.files.items()}
+        # Variables holding the escaped value of a password variable, by the password variable (see batch_securecrt)
+        escaped = {name: name.removesuffix(ESCAPED_SUFFIX) for step in steps for token in step.cmd
+                   for name in token.split("\0")[1::2] if name.endswith(ESCAPED_SUFFIX)}
+
+        match format:
+            case "json":
+                content = json.dumps({"launcher": self.launcher,
+                                      "variables": users,
+                                      "escapedVariables": escaped,
+                                      "files": {name: {"name": fileName, "contents": contents} for name, (fileName, contents) in files.items()},
+                                      "commands": [{"devices": step.devices, "cmd": [self.render(token=token, style="json") for token in step.cmd]}
+                                                   for step in steps]}, indent=4)
+            case "sh":
+                lines = ["#!/bin/sh", f"# Launch plan generated by clab-terminal-launcher ({self.launcher}, {len(self.steps)} devices)"]
+                if users:
+                    lines.append("# Set the following environment variables to the passwords of these lab devices before running this script:")
+                lines += [f"#   {name}: {', '.join(devices)}" for name, devices in users.items()]
+                lines += [f': "${{{name}:?set {name} to the password of the lab devices listed at the top of this script}}"' for name in users]
+                lines += [f"""{name}=$(printf '%s\\n' "${{{original}}}" | sed -e 's/\\(\\\\*\\)"/\\1\\1\\\\"/g' -e 's/\\(\\\\*\\)$/\\1\\1/')"""
+                          for name, original in escaped.items()]
+                if files: # files are written to a new directory that only the current user can access
+                    lines.append('CLAB_DIRECTORY=$(mktemp -d "${TMPDIR:-/tmp}/clab-terminal-launcher.XXXXXX") || exit 1')
+                for name, (fileName, contents) in files.items():
+                    lines += [f'{name}="${{CLAB_DIRECTORY}}/{fileName}"', f'cat > "${{{name}}}" <<\'CLAB_EOF\'', contents.rstrip("\n"), "CLAB_EOF"]
+                lines += [f"{' '.join(self.render(token=token, style='sh') for token in step.cmd)} &" for step in steps]
+                content = "\n".join(lines) + "\n"
+            case "ps1":
+                lines = [f"# Launch plan generated by clab-terminal-launcher ({self.launcher}, {len(self.steps)} devices)"]
+                if users:
+                    lines.append("# Set the following environment variables to the passwords of these lab devices before running this script:")
+                lines += [f"#   {name}: {', '.join(devices)}" for name, devices in users.items()]
+                lines += [f'if (-not $env:{name}) {{ throw "Set {name} to the password of the lab devices listed at the top of this script" }}' for name in users]
+                lines += [f"""$env:{name} = $env:{original} -replace '(\\\\*)"', '$1$1\\"' -replace '(\\\\*)$', '$1$1'""" for name, original in escaped.items()]
+                if files: # files are written to a new directory, so that they can't be created by anyone else beforehand
+                    lines.append("$ClabDirectory = New-Item -ItemType Directory -Path (Join-Path ([System.IO.Path]::GetTempPath()) ([System.IO.Path]::GetRandomFileName()))")
+                for name, (fileName, contents) in files.items():
+                    lines += [f'$env:{name} = Join-Path $ClabDirectory.FullName "{fileName}"',
+                              f"Set-Content -LiteralPath $env:{name} -Value @'", contents.rstrip("\n"), "'@"]
+                lines += [f"& {' '.join(self.render(token=token, style='ps1') for token in step.cmd)}" for step in steps]
+                content = "\r\n".join(lines) + "\r\n"
+
+        try:
+            with open(filename, "w", newline="") as f:
+                f.write(content)
+        except OSError as e:
+            print(f"Error writing the launch plan to {filename}: {e}")
+            exit(-1)
+        if format == "sh":
+            os.chmod(filename, os.stat(filename).st_mode | 0o111)
+        print(f"Launch plan for {len(self.steps)} devices ({len(steps)} command{'s' if len(steps) != 1 else ''}) successfully written to {filename}"
+              f"{f'; set {", ".join(users)} to the passwords of the lab devices before running it' if users and format != 'json' else ''}")
+
+def private_directory() -> str:
+    """Helper function to return the per-user directory (under the temporary directory) for the files needed to launch
+    sessions, creating it if needed; raises OSError if the directory is owned by or accessible to another user"""
+    import tempfile # only imported when files are actually written, as it is slow to import
+    getuid = getattr(os, "getuid", None)
+    directory = os.path.join(tempfile.gettempdir(), f"clab-terminal-launcher-{getuid()}" if getuid is not None else "clab-terminal-launcher")
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or (getuid is not None and (info.st_uid != getuid() or info.st_mode & 0o077)):
+        raise OSError(f"{directory} isn't a directory that only the current user can access")
+    return directory
+
+def batch_securecrt(steps: list[LaunchStep], executable: str) -> LaunchStep:
+    """Helper function to combine SecureCRT launch commands into a single command that runs a SecureCRT script, which
+    opens a tab for each session using the arguments of the original commands (passed to the script with /ARG)"""
+    name, fileName, contents = SECURECRT_SCRIPT
+    cmd = [executable, "/SCRIPT", variable(name)]
+    for step in steps:
+        arguments = []
+        for token in step.cmd[1:]:
+            if token == "/T":
+                continue
+            # Values are always quoted, as a password may contain spaces or quotes; a masked password (i.e., a variable)
+            # is quoted using a variable holding its escaped value, which is set when the plan is run (see LaunchPlan)
+            if token.startswith("\0") and token.endswith("\0") and token.count("\0") == 2:
+                arguments.append(f'"{variable(f"{token.strip(chr(0))}{ESCAPED_SUFFIX}")}"')
+            elif token.startswith("/") and not re.search(r'[\s"]', token):
+                arguments.append(token)
+            else:
+                arguments.append(quote_argument(value=token))
+        cmd += ["/ARG", " ".join(arguments)]
+    return LaunchStep(devices=[device for step in steps for device in step.devices], cmd=cmd, files={name: (fileName, contents)})
+
+def batch_windows_terminal(steps: list[LaunchStep], terminal: list[str]) -> LaunchStep:
+    """Helper function to combine native OpenSSH launch commands that use Windows Terminal into a single Windows
+    Terminal command that opens a new tab for each session (i.e., <terminal> <ssh command> ; new-tab <ssh command> ...)"""
+    cmd = list(steps[0].cmd)
+    passwords = list(steps[0].passwords)
+    for step in steps[1:]:
+        offset = len(cmd) + 2 - len(terminal)
+        cmd += [";", "new-tab"] + step.cmd[len(terminal):]
+        passwords += [index + offset for index in step.passwords]
+    return LaunchStep(devices=[device for step in steps for device in step.devices], cmd=cmd, passwords=passwords)
+
+def is_windows_terminal(terminal: list[str]) -> bool:
+    """Helper function to determine whether a terminal command runs Windows Terminal (wt/wt.exe)"""
+    return bool(terminal) and re.split(r"[\\/]", terminal[0])[-1].lower() in ("wt", "wt.exe")
+
+def openssh_command(executable: str, jumphost: str | None, node: Device, sshconfig: str | None) -> list[str]:
+    """Helper function to build the OpenSSH client command for a session to a lab device, either from the settings of
+    the device or using its entry in an OpenSSH client config file generated by the "launch openssh-config" command"""
+    if sshconfig is not None:
+        return [f'{executable}', '-F', f'{sshconfig}', f'{node.name}']
+
+    cmd = [f'{executable}', '-l', f'{node.username}', '-p', f'{node.ports["ssh"]}', f'{node.address}']
+    if jumphost is not None:
+        cmd[1:1] = ['-J', f'{jumphost}']
+    return cmd
+
+def tmux_windows(executable: str, session: str) -> dict[str, bool] | None:
+    """Helper function to list the windows in a tmux session, along with whether the command running in each window has
+    exited (i.e., the window was kept open after its session ended); returns None if the session doesn't exist"""
+    try:
+        result = run([executable, "list-windows", "-t", f"={session}", "-F", "#{pane_dead}\t#{window_name}"],
+                     stdout=PIPE, stderr=DEVNULL, text=True)
+    except FileNotFoundError:
+        print(f"Error running launch command: {executable} not found; make sure that tmux is installed and on your PATH, or specify the path to it")
+        exit(-1)
+    if result.returncode != 0:
+        return None
+    return {name: dead == "1" for dead, _, name in (line.partition("\t") for line in result.stdout.splitlines())}
+
+def batch_tmux(executable: str, session: str, windows: dict[str, list[str]], existing: dict[str, bool] | None) -> list[list[str]]:
+    """Helper function to build the few chained tmux commands that open a window for each of the provided windows, creating
+    the session if it doesn't exist yet (existing is None) and restarting windows that are already open but have ended"""
+    commands = []
+    cmd = [executable]
+    length = len(executable)
+    for name, command in windows.items():
+        target = f"={session}:={name}"
+        if existing is None:
+            subcommand = ["new-session", "-d", "-s", session, "-n", name, shlex.join(command)]
+            existing = {}
+        elif name not in existing:
+            subcommand = ["new-window", "-d", "-t", f"={session}:", "-n", name, shlex.join(command)]
+        elif existing[name]:
+            subcommand = ["respawn-window", "-k", "-t", target, shlex.join(command)]
+        else:
+            continue
+        subcommand += [";", "set-option", "-w", "-t", target, "remain-on-exit", "on"]
+
+        subcommandLength = sum(len(token) + 1 for token in subcommand) + 2
+        if len(cmd) > 1 and length + subcommandLength > TMUX_COMMAND_LIMIT:
+            commands.append(cmd)
+            cmd = [executable]
+            length = len(executable)
+        cmd += ([";"] if len(cmd) > 1 else []) + subcommand
+        length += subcommandLength
+    if len(cmd) > 1:
+        commands.append(cmd)
+    return commands
@@ -0,0 +1,120 @@
+import click
+import fnmatch
+import re
+
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from ..misc.models import Node
+
+SELECTOR_FIELDS = {"lab": "lab", "name": "name", "node": "name", "kind": "kind", "image": "image", "group": "group"} # selector fields (and aliases), by the node attribute they match
+
+@dataclass(frozen=True, slots=True)
+class SelectorTerm:
+    """A single condition of a node selector, e.g., kind=nokia_srlinux, name=spine* (a glob), name~^leaf[0-9]+$ (a
+    regular expression) or lab!=core (negated)"""
+    field: str
+    value: str
+    pattern: re.Pattern | None
+    negated: bool
+
+    def matches(self, value: str | None) -> bool:
+        if value is None:
+            return False
+        return bool(self.pattern.search(value)) if self.pattern is not None else value == self.value
+
+class NodeIndex:
+    """Nodes grouped by lab, indexed by the value of each selector field that is looked up, so that conditions on that
+    field are evaluated with a lookup per condition rather than by checking every node"""
+    def __init__(self, nodes: dict[str, list[Node]]) -> None:
+        self.nodes = [(lab, node) for lab, labNodes in nodes.items() for node in labNodes]
+        self.values: dict[str, dict[str | None, Any]] = {"lab": {}}
+        position = 0
+        for lab, labNodes in nodes.items():
+            self.values["lab"][lab] = range(position, position + len(labNodes))
+            position += len(labNodes)
+
+    def lookup(self, term: SelectorTerm) -> set[int]:
+        """Returns the positions of the nodes whose field matches the term (ignoring whether the term is negated)"""
+        if term.field not in self.values:
+            values = self.values[term.field] = {}
+            for position, (_, node) in enumerate(self.nodes):
+                values.setdefault(getattr(node, term.field), []).append(position)
+        values = self.values[term.field]
+        if term.pattern is None:
+            return set(values.get(term.value, ()))
+        return {position for value, positions in values.items() if term.matches(value=value) for position in positions}
+
+class NodeSelector:
+    """A node selector expression: comma-separated <field>=<value|glob>, <field>~<regex> (unanchored) and negated != / !~
+    conditions on the lab, name, kind, image or group; conditions on the same field are ORed, different fields are ANDed"""
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.terms: dict[str, list[SelectorTerm]] = {}
+        for condition in (condition.strip() for condition in expression.split(",")):
+            if not condition:
+                continue
+            match = re.match(r"^([a-z]+)\s*(!?)([=~])\s*(.*)$", condition, re.DOTALL)
+            if match is None:
+                raise ValueError(f"invalid condition {condition} (expected <field>=<value> or <field>~<regex>)")
+            field, negated, operator, value = match.groups()
+            if field not in SELECTOR_FIELDS:
+                raise ValueError(f"unknown field {field} in {condition} (available fields: {', '.join(SELECTOR_FIELDS)})")
+            pattern = None
+            if operator == "~":
+                try:
+                    pattern = re.compile(value)
+                except re.error as e:
+                    raise ValueError(f"invalid regular expression in {condition}; {e}")
+            elif any(char in value for char in "*?["):
+                pattern = re.compile(f"^{fnmatch.translate(value)}")
+            self.terms.setdefault(SELECTOR_FIELDS[field], []).append(SelectorTerm(field=SELECTOR_FIELDS[field], value=value,
+                                                                                  pattern=pattern, negated=bool(negated)))
+        if not self.terms:
+            raise ValueError("the selector doesn't contain any conditions")
+
+    def __str__(self) -> str:
+        return self.expression
+
+    def match_field(self, field: str, value: str | None) -> bool:
+        """Returns whether a value of the field satisfies the selector's conditions on that field"""
+        terms = self.terms[field]
+        included = [term for term in terms if not term.negated]
+        return ((not included or any(term.matches(value=value) for term in included))
+                and not any(term.matches(value=value) for term in terms if term.negated))
+
+    def labs(self, labs: Iterable[str]) -> list[str]:
+        """Returns the labs that may contain matching nodes, so that the nodes of other labs don't need to be loaded"""
+        return [lab for lab in labs if "lab" not in self.terms or self.match_field(field="lab", value=lab)]
+
+    def select(self, nodes: dict[str, list[Node]]) -> dict[str, list[Node]]:
+        """Returns the nodes that match the selector, grouped by lab, in their original order; the cheapest field is looked up
+        using an index, and only the nodes it selects are checked against the conditions on the other fields"""
+        index = NodeIndex(nodes=nodes)
+        fields = sorted(self.terms, key=lambda field: (field != "lab", any(term.pattern is not None for term in self.terms[field])))
+        terms = self.terms[fields[0]]
+        included = [term for term in terms if not term.negated]
+        selected = set().union(*(index.lookup(term=term) for term in included)) if included else set(range(len(index.nodes)))
+        for term in terms:
+            if term.negated:
+                selected -= index.lookup(term=term)
+
+        result: dict[str, list[Node]] = {}
+        for position in sorted(selected):
+            lab, node = index.nodes[position]
+            if all(self.match_field(field=field, value=getattr(node, field)) for field in fields[1:]):
+                result.setdefault(lab, []).append(node)
+        return result
+
+class NodeSelectorType(click.ParamType):
+    """Click parameter type for node selector expressions, so that invalid selectors are reported before anything is
+    loaded (both on the command line and in the configuration file of the quick command)"""
+    name = "selector"
+
+    def convert(self, value: object, param: click.Parameter | None, ctx: click.Context | None) -> NodeSelector:
+        if isinstance(value, NodeSelector):
+            return value
+        try:
+            return NodeSelector(expression=str(value))
+        except ValueError as e:
+            self.fail(f"invalid node selector {value!r}: {e}", param, ctx)
@@ -1,17 +1,62 @@
 import click
-from .node_data.commands import node_data
-from .launch.commands import launch
-from .quick.commands import quick
+from importlib import import_module
 
-@click.group()
-def main():
+def truncate_help(text: str, limit: int) -> str:
+    """Helper function to shorten the help text of a subcommand to fit within the provided number of characters, cutting
+    it at the end of a word and adding "..." (the same way Click shortens the help of the subcommands it has loaded)"""
+    if len(text) <= limit:
+        return text
+    shortened = text[:max(limit - 3, 0)]
+    if " " in shortened:
+        shortened = shortened.rsplit(" ", 1)[0]
+    return f"{shortened.rstrip(' ,.;:')}..."
+
+class LazyGroup(click.Group):
+    """Click group that only imports the module containing a subcommand when that subcommand is run; subcommands are
+    registered as "name": ("module path", "attribute name", "short help") so that listing them imports nothing"""
+    def __init__(self, *args, lazySubcommands: dict[str, tuple[str, str, str]] | None = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.lazySubcommands = lazySubcommands or {}
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazySubcommands))
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if cmd_name in self.lazySubcommands and cmd_name not in self.commands:
+            modulePath, attribute, _ = self.lazySubcommands[cmd_name]
+            self.add_command(getattr(import_module(modulePath, package=__package__), attribute), name=cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        limit = formatter.width - 6 - max((len(name) for name in self.list_commands(ctx)), default=0)
+        rows = [(name, truncate_help(text=self.lazySubcommands[name][2], limit=limit) if name not in self.commands
+                 else self.commands[name].get_short_help_str(limit=limit))
+                for name in self.list_commands(ctx)]
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+@click.group(cls=LazyGroup, lazySubcommands={
+    "launch": (".launch.commands", "launch", "Automatically launch sessions to connect to lab devices"),
+    "node-data": (".node_data.commands", "node_data", "Process data for running Containerlab nodes"),
+    "quick": (".quick.commands", "quick", "Quickly perform all commands required to launch sessions to connect to lab devices, based on a configuration file"),
+    "watch": (".watch.commands", "watch", "Keep watching for running nodes and automatically launch sessions to nodes as they start running, based on a configuration file"),
+})
+@click.option("--profile", is_flag=True, default=False,
+              help="Record the time taken by each phase of the command, the latencies of Containerlab API requests and launched processes, and counts such as the number of running nodes, and report them when the command finishes")
+@click.option("--profile-format", "profileFormat", type=click.Choice(["text", "jsonl"]), default="text",
+              help="Specify the format of the --profile report: text (a human-readable summary) or jsonl (one JSON object per line for each metric, e.g., for tracking regressions over many runs); default: text")
+@click.option("--profile-output", "profileOutput",
+              help="Append the --profile report to this file instead of writing it to stderr")
+@click.option("--profile-capture", "profileCaptures", type=click.Choice(["cprofile", "tracemalloc"]), multiple=True,
+              help="With --profile, also run cProfile (the functions with the highest cumulative time) and/or tracemalloc (peak memory and the largest allocation sites) for the command and include them in the report; can be specified multiple times. Both slow the command down noticeably")
+@click.pass_context
+def main(ctx: click.Context, profile: bool, profileFormat: str, profileOutput: str | None, profileCaptures: tuple[str, ...]):
     """Containerlab (clab) Terminal Launcher -- A solution to take the hassle out of
     launching sessions and connecting to virtualized network devices running in Containerlab"""
-    pass
-
-main.add_command(node_data)
-main.add_command(launch)
-main.add_command(quick)
+    if profile:
+        from .misc.instrumentation import start_profiling
+        ctx.call_on_close(start_profiling(format=profileFormat, output=profileOutput, captures=profileCaptures))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
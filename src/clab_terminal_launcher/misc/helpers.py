@@ -1,7 +1,14 @@
 import json
-import yaml
+import marshal
+import os
+import struct
+import sys
 from typing import Any
 
+CACHE_SUFFIX = ".cache" # appended to the name of a JSON/YAML file to get the name of its cache file
+CACHE_FORMAT = 1 # bump whenever the layout of cache files changes
+CACHE_HEADER = struct.Struct("<I") # length of the marshalled signature at the start of each cache file
+
 def check_if_list(data: Any, errorString: str) -> list[Any]:
     """Helper function to check whether the provided data is of the list type; print an error message
     and exit the program if not"""
@@ -20,11 +27,66 @@ def handle_dict_access_errors(exception: Exception, errorString: str) -> None:
         print(f"{errorString}: invalid type, the item is not a dictionary/object/mapping; {exception}")
     exit(-1)
 
-def read_object_from_structured_data(expected_format: str, filename: str) -> dict[str, Any] | None:
+def cache_signature(filename: str) -> tuple[Any, ...]:
+    """Helper function to return the values identifying the current contents of a file (and the Python version, as the
+    marshal format is version-specific), used to tell whether its cache file is still fresh"""
+    stat = os.stat(filename)
+    return CACHE_FORMAT, sys.implementation.cache_tag, stat.st_mtime_ns, stat.st_size
+
+def read_cache(filename: str) -> Any | None:
+    """Helper function to load the data for a file from its cache file, if one exists and is still fresh; returns None
+    otherwise, in which case the file itself should be parsed"""
+    try:
+        with open(f"{filename}{CACHE_SUFFIX}", "rb") as f:
+            # The signature is stored separately before the data, so a stale cache is rejected without loading the data
+            (signatureLength,) = CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+            if marshal.loads(f.read(signatureLength)) != cache_signature(filename):
+                return None
+            return marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError, struct.error):
+        return None
+
+def write_file_atomically(filename: str, content: bytes, mode: int | None = None) -> None:
+    """Helper function to replace the contents of a file atomically (via a temporary file renamed over it), keeping its
+    permissions unless a mode is provided; raises OSError if the file can't be written"""
+    import tempfile # only imported when a file is actually written, as it is slow to import
+    if mode is None:
+        try:
+            mode = os.stat(filename).st_mode & 0o777
+        except FileNotFoundError:
+            pass
+    fd, tempName = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), prefix=f".{os.path.basename(filename)}-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        if mode is not None:
+            os.chmod(tempName, mode)
+        os.replace(tempName, filename)
+    except BaseException:
+        os.unlink(tempName)
+        raise
+
+def write_cache(filename: str, data: Any) -> None:
+    """Helper function to atomically write the parsed data for a file to its cache file in the marshal format, with the same
+    permissions as the original file; failures only result in a warning"""
+    cachefile = f"{filename}{CACHE_SUFFIX}"
+    try:
+        signature = marshal.dumps(cache_signature(filename))
+        write_file_atomically(filename=cachefile, content=CACHE_HEADER.pack(len(signature)) + signature + marshal.dumps(data),
+                              mode=os.stat(filename).st_mode & 0o777)
+    except (OSError, ValueError) as e:
+        print(f"WARNING: Unable to write the cache for {filename} to {cachefile}: {e}")
+
+def read_object_from_structured_data(expected_format: str, filename: str, useCache: bool = False) -> dict[str, Any] | None:
     """Helper function to read objects/mappings from structured data formats (e.g., JSON/YAML)
     and return them in dictionary form, raising an exception if the provided data is not an object/mapping
-    and handling other exceptions that arise while reading the file"""
+    and handling other exceptions that arise while reading the file; if useCache is set, a fresh cache file is used instead"""
     errorString = f"Error while reading {filename}"
+    if useCache:
+        data = read_cache(filename=filename)
+        if isinstance(data, dict):
+            return data
+
     match expected_format:
         case "json":
             try:
@@ -32,23 +94,27 @@ def read_object_from_structured_data(expected_format: str, filename: str) -> dic
                     data = json.load(f)
                     if not isinstance(data, dict):
                         raise ValueError("Invalid format: NOT a JSON object")
-                    return data
             except OSError as e:
                 print(f"{errorString}: {e}")
                 exit(-1)
         case "yaml":
+            import yaml # only imported when a YAML file is actually parsed, as it is slow to import
             try:
                 with open(filename, "r") as f:
-                    data = yaml.safe_load(f)
+                    # Use the LibYAML-based loader where PyYAML was built with it; it parses large files many times faster
+                    data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
                     if not isinstance(data, dict):
                         raise yaml.YAMLError("Invalid format: NOT a YAML mapping/object")
-                    return data
             except OSError as e:
                 print(f"{errorString}: {e}")
                 exit(-1)
         case _:
             return None
 
+    if useCache:
+        write_cache(filename=filename, data=data)
+    return data
+
 def retrieve_and_delete_metadata(data: dict[str, Any], filename: str) -> dict[str, Any]:
     """Helper function to return the data contained as the value of the _metadata_ key from JSON objects rendered
     by this utility and delete the _metadata_ key in the original JSON object, such that other functions
@@ -0,0 +1,152 @@
+import sys
+import time
+
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Callable, Iterator, TextIO
+
+PROFILE_TOP = 20 # number of functions/allocation sites included in the report of a cProfile/tracemalloc capture
+
+class Metrics:
+    """Phase timings, operation latencies and counters recorded (from any thread) by the commands while they run, when
+    profiling is enabled with --profile; otherwise, nothing is recorded"""
+    def __init__(self) -> None:
+        self.enabled = False
+        self.lock = Lock()
+        self.phases: dict[str, list[float]] = {}
+        self.latencies: dict[str, list[float]] = {}
+        self.counters: dict[str, int] = {}
+        self.startTime = time.perf_counter()
+
+    def record(self, kind: dict[str, list[float]], name: str, seconds: float) -> None:
+        with self.lock:
+            kind.setdefault(name, []).append(seconds)
+
+    def count(self, name: str, value: int) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> list[dict[str, Any]]:
+        """Returns the recorded metrics as a list of records (one per metric, preceded by one for the whole run)"""
+        records = [{"type": "run", "command": " ".join(sys.argv[1:]), "timestamp": round(time.time(), 3),
+                    "seconds": round(time.perf_counter() - self.startTime, 6)}]
+        for kind, metrics in (("phase", self.phases), ("latency", self.latencies)):
+            for name, samples in metrics.items():
+                ordered = sorted(samples)
+                records.append({"type": kind, "name": name, "count": len(ordered), "total_seconds": round(sum(ordered), 6),
+                                "mean_seconds": round(sum(ordered) / len(ordered), 6),
+                                "p50_seconds": round(ordered[len(ordered) // 2], 6),
+                                "p95_seconds": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 6),
+                                "max_seconds": round(ordered[-1], 6)})
+        records.extend({"type": "counter", "name": name, "value": value} for name, value in self.counters.items())
+        return records
+
+METRICS = Metrics()
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Context manager to record the time taken by a phase of a command, when profiling is enabled"""
+    if not METRICS.enabled:
+        yield
+        return
+    startTime = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.record(kind=METRICS.phases, name=name, seconds=time.perf_counter() - startTime)
+
+def observe(name: str, seconds: float) -> None:
+    """Helper function to record the duration of a single operation, when profiling is enabled"""
+    if METRICS.enabled:
+        METRICS.record(kind=METRICS.latencies, name=name, seconds=seconds)
+
+def count(name: str, value: int = 1) -> None:
+    """Helper function to add to a counter, when profiling is enabled"""
+    if METRICS.enabled:
+        METRICS.count(name=name, value=value)
+
+def format_seconds(seconds: float) -> str:
+    return f"{seconds * 1000:.1f} ms" if seconds < 1 else f"{seconds:.2f} s"
+
+def write_text_report(records: list[dict[str, Any]], file: TextIO) -> None:
+    """Helper function to write the recorded metrics (and any captures) as a human-readable summary"""
+    sections = {"phase": "Phases", "latency": "Latencies", "counter": "Counters", "function": "Functions (cProfile, by cumulative time)",
+                "allocation": "Allocations (tracemalloc, by size)"}
+    width = max((len(record.get("name", "")) for record in records), default=0)
+    print(f"\nProfile for {records[0]['command'] or 'clab-terminal-launcher'}: {format_seconds(records[0]['seconds'])} in total", file=file)
+    for kind, title in sections.items():
+        kindRecords = [record for record in records if record["type"] == kind]
+        if not kindRecords:
+            continue
+        print(f"{title}:", file=file)
+        for record in kindRecords:
+            match kind:
+                case "phase":
+                    details = f"{format_seconds(record['total_seconds'])}" + (f" ({record['count']} times)" if record["count"] > 1 else "")
+                case "latency":
+                    details = (f"{record['count']} times, mean {format_seconds(record['mean_seconds'])}, p50 {format_seconds(record['p50_seconds'])}, "
+                               f"p95 {format_seconds(record['p95_seconds'])}, max {format_seconds(record['max_seconds'])}")
+                case "counter":
+                    details = str(record["value"])
+                case "function":
+                    details = f"{record['calls']} calls, {format_seconds(record['cumulative_seconds'])} cumulative, {format_seconds(record['own_seconds'])} own"
+                case "allocation":
+                    details = f"{record['kib']:.1f} KiB in {record['blocks']} blocks"
+            print(f"  {record['name'].ljust(width)}  {details}", file=file)
+    for record in records:
+        if record["type"] == "memory":
+            print(f"Peak traced memory: {record['peak_kib']:.1f} KiB", file=file)
+
+def start_profiling(format: str, output: str | None, captures: tuple[str, ...]) -> Callable[[], None]:
+    """Helper function to enable the recording of metrics (and the requested cProfile/tracemalloc captures) for the rest of
+    the run; returns the function that stops profiling and writes the report to stderr or appends it to the output file"""
+    METRICS.enabled = True
+    METRICS.startTime = time.perf_counter()
+    profiler = None
+    if "cprofile" in captures:
+        import cProfile # only imported when capturing, as it is only needed then
+        profiler = cProfile.Profile()
+        profiler.enable()
+    if "tracemalloc" in captures:
+        import tracemalloc
+        tracemalloc.start()
+
+    def stop_profiling() -> None:
+        records = METRICS.report()
+        if profiler is not None:
+            import pstats
+            profiler.disable()
+            stats = pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE)
+            # Only the functions called by the main thread are captured, as cProfile doesn't follow other threads
+            for function in stats.fcn_list[:PROFILE_TOP]:
+                _, calls, ownTime, cumulativeTime, _ = stats.stats[function]
+                records.append({"type": "function", "name": pstats.func_std_string(function), "calls": calls,
+                                "own_seconds": round(ownTime, 6), "cumulative_seconds": round(cumulativeTime, 6)})
+        if "tracemalloc" in captures:
+            import tracemalloc
+            snapshot = tracemalloc.take_snapshot()
+            records.append({"type": "memory", "peak_kib": round(tracemalloc.get_traced_memory()[1] / 1024, 1)})
+            tracemalloc.stop()
+            for statistic in snapshot.statistics("lineno")[:PROFILE_TOP]:
+                frame = statistic.traceback[0]
+                records.append({"type": "allocation", "name": f"{frame.filename}:{frame.lineno}",
+                                "kib": round(statistic.size / 1024, 1), "blocks": statistic.count})
+        METRICS.enabled = False
+
+        try:
+            file = open(output, "a") if output is not None else sys.stderr
+        except OSError as e:
+            print(f"Error while writing the profile to {output}: {e}")
+            return
+        try:
+            if format == "jsonl":
+                import json
+                for record in records:
+                    print(json.dumps(record), file=file)
+            else:
+                write_text_report(records=records, file=file)
+        finally:
+            if file is not sys.stderr:
+                file.close()
+
+    return stop_profiling
@@ -0,0 +1,81 @@
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+from .helpers import check_if_list, handle_dict_access_errors
+
+NODE_FIELDS = ("name", "image", "kind", "state", "ipv4_address", "ipv6_address", "ports", "method") # fields written to rendered JSON files
+MODEL_FIELDS = frozenset(NODE_FIELDS + ("clabHost", "group")) # fields read into the model; any others are kept as extra fields
+
+@dataclass(slots=True)
+class Node:
+    """A running Containerlab node, as rendered by the node-data commands"""
+    name: str
+    image: str
+    kind: str
+    state: str
+    ipv4_address: str
+    ipv6_address: str
+    ports: dict[str, int] = field(default_factory=lambda: {"ssh": 22})
+    method: str | None = None # "clabHost" if sessions must go through the Containerlab host (i.e., custom SSH port)
+    clabHost: str | None = None # the Containerlab host the node was retrieved from (API only)
+    group: str | None = None # the group of the node in the topology, if any
+    container: str | None = None # the ID of the node's container; kept in memory only, not written to rendered JSON files
+    extra: dict[str, Any] | None = None # any other fields of the node (e.g., from the API), written back as is
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Node":
+        """Returns the node for an entry of a rendered JSON file; raises KeyError/TypeError if the entry is malformed"""
+        if not isinstance(data["ports"], dict):
+            raise TypeError(f"ports for node {data['name']} are {type(data['ports']).__name__}, not a mapping")
+        return cls(name=data["name"], image=data["image"], kind=data["kind"], state=data["state"],
+                   ipv4_address=data["ipv4_address"], ipv6_address=data["ipv6_address"], ports=data["ports"],
+                   method=data["method"], clabHost=data.get("clabHost"), group=data.get("group") or None,
+                   extra=extra_fields(data=data))
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the entry for the node in a rendered JSON file"""
+        entry = {name: getattr(self, name) for name in NODE_FIELDS}
+        if self.clabHost is not None:
+            entry["clabHost"] = self.clabHost
+        if self.group is not None:
+            entry["group"] = self.group
+        if self.extra:
+            entry.update(self.extra)
+        return entry
+
+    def copy(self) -> "Node":
+        """Returns a copy of the node that can be changed (e.g., by injecting custom ports) without affecting this one"""
+        return replace(self, ports=dict(self.ports))
+
+@dataclass(slots=True)
+class Device:
+    """A lab device that sessions are launched to, with the address/credentials resolved by the launch commands"""
+    name: str
+    address: str
+    ports: dict[str, int]
+    username: str
+    password: str | None
+
+def extra_fields(data: dict[str, Any]) -> dict[str, Any] | None:
+    """Helper function to return the fields of a node (e.g., as returned by the Containerlab API or read from a rendered
+    JSON file) that aren't part of the node model, so that they can be kept as extra fields; None if there aren't any"""
+    if len(data) <= len(MODEL_FIELDS) and data.keys() <= MODEL_FIELDS:
+        return None
+    return {name: value for name, value in data.items() if name not in MODEL_FIELDS} or None
+
+def load_nodes(data: dict[str, Any], filename: str) -> dict[str, list[Node]]:
+    """Helper function to validate rendered node data (without metadata) read from a file and convert it into nodes,
+    grouped by lab; prints an error message identifying the malformed entry and exits if the data is invalid"""
+    nodes = {}
+    for lab, labNodes in data.items():
+        nodes[lab] = []
+        for idx, node in enumerate(check_if_list(data=labNodes, errorString=f"Error parsing node list for {lab} in {filename}")):
+            try:
+                nodes[lab].append(Node.from_dict(node))
+            except (KeyError, TypeError) as e:
+                handle_dict_access_errors(exception=e, errorString=f"Error parsing data for node #{idx + 1} in lab {lab} in {filename}")
+    return nodes
+
+def dump_nodes(nodes: dict[str, list[Node]]) -> dict[str, list[dict[str, Any]]]:
+    """Helper function to convert nodes grouped by lab into rendered node data (without metadata) for writing to a file"""
+    return {lab: [node.to_dict() for node in labNodes] for lab, labNodes in nodes.items()}
@@ -1,11 +1,11 @@
 import json
-import yaml
 import click
-from dotenv import dotenv_values
-import os
-from getpass import getpass
-from .helpers import process_response, write_common_metadata, write_output_to_file, ContainerlabAPI
+from typing import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from .helpers import check_running_nodes, find_topology_data, lazy_password, query_container_runtime, read_snapshot, read_topology_data, runtime_socket, APIConnection, PortOverrides, RenderedNodes, retrieve_host_nodes, stream_inspect_output, write_output_to_file, APIError, ContainerlabAPI, ResponseCache, TOKEN_CACHE_FILE
 from ..misc.helpers import read_object_from_structured_data, retrieve_and_delete_metadata, check_if_list, handle_dict_access_errors
+from ..misc.instrumentation import count, phase
+from ..misc.models import dump_nodes, extra_fields, load_nodes, Node
 
 
 @click.group()
@@ -16,10 +16,22 @@ def node_data() -> None:
     pass
 
 @node_data.command()
+@click.option("--ca-cert", "caCert",
+              help="With --https, specify the path to the CA certificate (or bundle) used to verify the certificate of the Containerlab API (e.g., if it is self-signed); default: the system's default CA certificates")
+@click.option("--cache/--no-cache", default=False,
+              help="Enable/disable writing a compact cache of the output next to the output file (with a .cache extension), which the launch commands load instead of parsing the JSON file again while it is unchanged (with their --cache option); default: disabled")
+@click.option("--concurrency", "-c", type=click.IntRange(min=1), default=8,
+              help="Specify the maximum number of labs to retrieve from the Containerlab API of each host at the same time when a list of labs is provided; default: 8 (use 1 to retrieve labs one at a time)")
+@click.option("--connect-timeout", "connectTimeout", type=click.FloatRange(min=0, min_open=True), default=5.0,
+              help="Specify the number of seconds to wait for a connection to the Containerlab API to be established before the attempt fails (and is retried, see --retries); default: 5")
 @click.option("--envfile", "-e",
               help="OPTIONAL; specify the path to the plain text Bash-style environment variable file where the password is contained as the CLABPASS variable; if specified, takes precedence over default behavior of using system-defined environment variable")
 @click.option("--host", "-h", "clabHost", default="localhost",
-              help="Specify the IP address/DNS hostname of the Containerlab host; defaults to localhost (you do not need to include this option if Containerlab is running locally)")
+              help="Specify the IP address/DNS hostname of the Containerlab host; specify multiple hosts as a comma-separated list to retrieve nodes from all of them at the same time; defaults to localhost (you do not need to include this option if Containerlab is running locally)")
+@click.option("--https", is_flag=True, default=False,
+              help="Connect to the Containerlab API using HTTPS rather than HTTP")
+@click.option("--incremental", "-I", is_flag=True, default=False,
+              help="Only rewrite the output file if the running nodes changed since the last incremental refresh, reporting the nodes that were added, removed or changed; a snapshot of the last refresh (including ETag/Last-Modified validators used to make conditional API requests) is kept next to the output file")
 @click.option("--labs", "-l", "labs",
               help="Specify labs to look for; specify multiple labs as a comma-separated list")
 @click.option("--outputfile", "-o", required=True,
@@ -28,133 +40,272 @@ def node_data() -> None:
               help="Specify the username of the Linux user used to authenticate to Containerlab")
 @click.option("--password", "-p",
               help="Specify the password of the Linux user used to authenticate to Containerlab; OPTIONAL. NOT RECOMMENDED. WARNING: INSECURE. USE THE CLABPASS ENVIRONMENT VARIABLE (EITHER EXPORTED THROUGH THE SHELL OR VIA A .ENV FILE IN THE LOCAL DIRECTORY) OR TYPE THE PASSWORD INTERACTIVELY. REFER TO THE DOCS FOR MORE DETAILS.")
-def retrieve_from_api(envfile: str | None, clabHost: str, outputfile: str, labs: str, username: str, password: str | None = None) -> None:
+@click.option("--port", "-P", type=click.IntRange(min=1, max=65535), default=8080,
+              help="Specify the port of the Containerlab API on each host; default: 8080")
+@click.option("--read-timeout", "readTimeout", type=click.FloatRange(min=0, min_open=True), default=30.0,
+              help="Specify the number of seconds to wait for the Containerlab API to respond to a request before the attempt fails (and, for requests that are safe to repeat, is retried, see --retries); default: 30")
+@click.option("--retries", type=click.IntRange(min=0), default=3,
+              help="Specify the number of times to retry a request to the Containerlab API that fails because of a connection error, timeout or temporary error status (e.g., 503), with a growing, randomized delay between attempts; only requests that are safe to repeat are retried once they reached the API; default: 3 (use 0 to disable retries)")
+@click.option("--token-cache/--no-token-cache", "tokenCache", default=True,
+              help=f"Enable/disable caching of Containerlab API tokens between runs in {TOKEN_CACHE_FILE} (readable only by the current user); while a cached token for the same user and host is still valid, the login (and password prompt) is skipped entirely; default: enabled")
+def retrieve_from_api(envfile: str | None, clabHost: str, outputfile: str, labs: str, username: str, concurrency: int = 8, password: str | None = None,
+                      tokenCache: bool = True, incremental: bool = False, cache: bool = False, port: int = 8080, https: bool = False,
+                      caCert: str | None = None, retries: int = 3, connectTimeout: float = 5.0, readTimeout: float = 30.0) -> bool:
     """Get details about running nodes from Containerlab API"""
-    api = ContainerlabAPI(baseURL=f"http://{clabHost}:8080")
-    # Authenticate to the API
-    print(f"Authenticating to the Containerlab API at host {clabHost}...")
+    return render_api_nodes(envfile=envfile, clabHost=clabHost, outputfile=outputfile, labs=labs, username=username, concurrency=concurrency,
+                            password=password, tokenCache=tokenCache, incremental=incremental, cache=cache, port=port, https=https,
+                            caCert=caCert, retries=retries, connectTimeout=connectTimeout, readTimeout=readTimeout).write()
+
+@phase(name="retrieve running nodes from the Containerlab API")
+def render_api_nodes(outputfile: str, username: str, envfile: str | None = None, clabHost: str = "localhost", labs: str | None = None,
+                     concurrency: int = 8, password: str | None = None, tokenCache: bool = True, incremental: bool = False,
+                     cache: bool = False, port: int = 8080, https: bool = False, caCert: str | None = None, retries: int = 3,
+                     connectTimeout: float = 5.0, readTimeout: float = 30.0, previous: RenderedNodes | None = None,
+                     sessions: dict[str, ContainerlabAPI] | None = None, exitOnError: bool = True) -> RenderedNodes:
+    """Retrieve the running nodes from the Containerlab API, returning the rendered node data without writing it to the
+    output file (takes the same arguments as the retrieve-from-api command, plus the state kept between polls by watch)"""
+    hosts = list(dict.fromkeys(host for host in clabHost.replace(" ", "").split(",") if host))
+    labList = list(dict.fromkeys(lab for lab in labs.replace(" ", "").split(",") if lab)) if labs else None
+    if not hosts:
+        if not exitOnError:
+            raise APIError(f"No Containerlab hosts were provided (host: {clabHost!r})")
+        print(f"Error, no Containerlab hosts were provided; specify at least one host (host: {clabHost!r})")
+        exit(-1)
 
-    if password is None:
-        if envfile is not None:
+    password = lazy_password(password=password, envfile=envfile)
+    connection = APIConnection(port=port, https=https, caCert=caCert, retries=retries, connectTimeout=connectTimeout, readTimeout=readTimeout)
+    snapshot = (previous.snapshot() if previous is not None else read_snapshot(outputfile=outputfile)) if incremental else None
+    responseCache = ResponseCache(responses=(snapshot or {}).get("responses")) if incremental else None
+
+    # Authenticate to the API and retrieve nodes for running labs on all hosts at the same time
+    with ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+        futures = {host: executor.submit(retrieve_host_nodes, host=host, username=username, password=password,
+                                         labs=labList, concurrency=concurrency,
+                                         tokenCacheFile=TOKEN_CACHE_FILE if tokenCache else None,
+                                         responseCache=responseCache, sessions=sessions, connection=connection) for host in hosts}
+
+    runningNodes = {}
+    failedHosts = []
+    for host, future in futures.items():
+        try:
+            allNodes = future.result()
+        except APIError as e:
+            print(f"{e}; skipping host {host}..." if len(hosts) > 1 else e)
+            failedHosts.append(host)
+            continue
+
+        # Filter for running nodes only, recording the host that each node is running on
+        for lab, nodes in allNodes.items():
+            labKey = lab if lab not in runningNodes else f"{lab}@{host}"
+            if labKey != lab:
+                print(f"WARNING: lab {lab} was found on multiple hosts; storing the lab from host {host} as {labKey}")
             try:
-                password = dotenv_values(envfile)["CLABPASS"]
-            except KeyError:
-                print(f"WARNING: CLABPASS variable not found in provided environment variable file {envfile}. Proceeding without it...")
-        else:
-            password = os.getenv("CLABPASS")
-        if password is not None:
-            print("Password retrieved via environment variable.")
-
-    api.headers["Authorization"] = f"Bearer {process_response(error="Error authenticating to the Containerlab API",
-                                                              host=clabHost,
-                                                              response=api.post(url="/login",
-                                                                                json={"username": username,
-                                                                                      "password": password if password is not None else getpass("Enter your Containerlab host password:")}))["token"]}"
-
-    # Retrieve nodes for running labs
-    allNodes = {}
-    if labs: # runs if there is a list of labs provided
-        for lab in labs.replace(" ", "").split(","):
-            print(f"Retrieving running nodes for lab {lab}...")
-            allNodes[lab] = process_response(error=f"Error retrieving lab nodes for lab {lab} - check to make sure the lab exists and is running",
-                                          host=clabHost,
-                                          response=api.get(url="/api/v1/labs/{lab}"))
-    else: # runs to retrieve all labs as a default behavior without a list of labs
-        print("Retrieving running nodes for all labs...")
-        allNodes = process_response(error="Error retrieving all running labs",
-                                 host=clabHost,
-                                 response=api.get(url="/api/v1/labs"))
-        if not allNodes:
-            print("No running labs found - check to make sure there are labs running")
-            exit(-1)
+                runningNodes[labKey] = [Node(name=node["name"], image=node["image"], kind=node["kind"], state=node["state"],
+                                             ipv4_address=node["ipv4_address"], ipv6_address=node["ipv6_address"], clabHost=host,
+                                             group=node.get("group") or None, container=node.get("container_id"),
+                                             extra=extra_fields(data=node))
+                                        for node in nodes if node["state"] == "running"]
+            except (KeyError, TypeError) as e:
+                handle_dict_access_errors(exception=e, errorString=f"Error while processing lab {lab} from the Containerlab API at host {host}")
 
-        print(f"Labs found: {", ".join(allNodes)}")
+    if len(failedHosts) == len(hosts):
+        if not exitOnError:
+            raise APIError(f"Unable to retrieve running nodes from {'any of the provided Containerlab hosts' if len(hosts) > 1 else f'host {hosts[0]}'}")
+        if len(hosts) > 1:
+            print("Unable to retrieve running nodes from any of the provided Containerlab hosts")
+        exit(-1)
 
-    # Filter for running nodes only
-    runningNodes = {k: [(node | {"ports": {"ssh": 22}, "method": None}) for node in v if node["state"] == "running"] for k, v in allNodes.items()}
-    write_output_to_file(outputfile=outputfile, data=write_common_metadata(host=clabHost, originalDict=runningNodes))
+    if failedHosts:
+        print(f"Retrieved running nodes from {len(hosts) - len(failedHosts)} of {len(hosts)} hosts; failed hosts: {", ".join(failedHosts)}")
+
+    count(name="running nodes retrieved", value=sum(map(len, runningNodes.values())))
+    return RenderedNodes(outputfile=outputfile, host=clabHost, nodes=runningNodes, incremental=incremental,
+                         snapshot=snapshot, responseCache=responseCache, cache=cache)
 
 @node_data.command()
+@click.option("--cache/--no-cache", default=False,
+              help="Enable/disable writing a compact cache of the output next to the output file (with a .cache extension), which the launch commands load instead of parsing the JSON file again while it is unchanged (with their --cache option); default: disabled")
 @click.option("--host", "-h", "clabHost", default="localhost",
               help="Specify the IP address/DNS hostname of the Containerlab host; defaults to localhost (you do not need to include this option if Containerlab is running locally)")
+@click.option("--incremental", "-I", is_flag=True, default=False,
+              help="Only rewrite the output file if the running nodes changed since the last incremental refresh, reporting the nodes that were added, removed or changed; a snapshot of the last refresh is kept next to the output file")
 @click.option("--inputfile", "-i", required=True,
               help="Specify the path to the input JSON file containing node(s) for one or more labs")
 @click.option("--outputfile", "-o", required=True,
               help="Specify the path to the output JSON file to which to write the output containing running node information in JSON format")
-def parse_inspect_output(inputfile: str, outputfile: str, clabHost: str) -> None:
+def parse_inspect_output(inputfile: str, outputfile: str, clabHost: str, incremental: bool = False, cache: bool = False) -> bool:
     """Process clab inspect output for details about running nodes"""
+    return render_inspect_nodes(inputfile=inputfile, outputfile=outputfile, clabHost=clabHost, incremental=incremental, cache=cache).write()
+
+@phase(name="parse running nodes from clab inspect output")
+def render_inspect_nodes(inputfile: str, outputfile: str, clabHost: str = "localhost", incremental: bool = False, cache: bool = False,
+                         previous: RenderedNodes | None = None, exitOnError: bool = True) -> RenderedNodes:
+    """Parse the running nodes from clab inspect output, returning the rendered node data without writing it to the
+    output file (takes the same arguments as the parse-inspect-output command, plus the state kept between polls by watch)"""
+    parsedOutput = {}
     try:
-        data = read_object_from_structured_data(filename=inputfile, expected_format="json")
+        # Stream the containers one at a time instead of loading the whole (potentially huge) output into memory
+        with open(inputfile, "r") as f:
+            for name, nodes in stream_inspect_output(file=f):
+                errorString = f"Error while processing lab {name} from the clab inspect output in {inputfile}"
+                print(f"Parsing output for lab {name}...")
+                if not isinstance(nodes, Iterator):
+                    check_if_list(data=nodes, errorString=errorString)
+                try:
+                    parsedOutput[name] = [Node(name=node["Labels"]["clab-node-longname"],
+                                               image=node["Image"],
+                                               kind=node["Labels"]["clab-node-kind"],
+                                               state=node["State"],
+                                               ipv4_address=node["NetworkSettings"]["IPv4addr"],
+                                               ipv6_address=node["NetworkSettings"]["IPv6addr"],
+                                               group=node["Labels"].get("clab-node-group") or None,
+                                               container=node.get("ID"))
+                                          for node in nodes if node["State"] == "running"]
+                except (KeyError, TypeError) as e:
+                    handle_dict_access_errors(exception=e, errorString=errorString)
+    except OSError as e:
+        if not exitOnError:
+            raise
+        print(f"Error while reading {inputfile}: {e}")
+        exit(-1)
     except (json.JSONDecodeError, ValueError) as e:
+        if not exitOnError:
+            raise
         print(f"Error while reading clab inspect output from {inputfile}: {e}")
         exit(-1)
 
-    parsedOutput = {}
-    for name, nodes in data.items():
-        errorString = f"Error while processing lab {name} from the clab inspect output in {inputfile}"
-        print(f"Parsing output for lab {name}...")
+    count(name="running nodes retrieved", value=sum(map(len, parsedOutput.values())))
+    snapshot = (previous.snapshot() if previous is not None else read_snapshot(outputfile=outputfile)) if incremental else None
+    return RenderedNodes(outputfile=outputfile, host=clabHost, nodes=parsedOutput, incremental=incremental,
+                         snapshot=snapshot, cache=cache)
+
+@node_data.command()
+@click.option("--cache/--no-cache", default=False,
+              help="Enable/disable writing a compact cache of the output next to the output file (with a .cache extension), which the launch commands load instead of parsing the JSON file again while it is unchanged (with their --cache option); default: disabled")
+@click.option("--host", "-h", "clabHost", default="localhost",
+              help="Specify the IP address/DNS hostname of the Containerlab host, as used to connect to nodes with custom ports; defaults to localhost (you do not need to include this option if you connect to the nodes from the Containerlab host itself)")
+@click.option("--incremental", "-I", is_flag=True, default=False,
+              help="Only rewrite the output file if the running nodes changed since the last incremental refresh, reporting the nodes that were added, removed or changed; a snapshot of the last refresh is kept next to the output file")
+@click.option("--labs", "-l", "labs",
+              help="Specify labs to look for; specify multiple labs as a comma-separated list")
+@click.option("--network", default="clab",
+              help="With --source runtime, specify the name of the management network that the addresses of the nodes are taken from, if they are connected to more than one network; default: clab")
+@click.option("--outputfile", "-o", required=True,
+              help="Specify the path to the output JSON file to which to write the output containing running node information in JSON format")
+@click.option("--socket", "socketPath",
+              help="Specify the path to the Unix socket of the container runtime, which the running nodes are read from with --source runtime, and which the nodes in the topology data are checked against with --source topology; default: the socket in the DOCKER_HOST environment variable, if set, otherwise /var/run/docker.sock")
+@click.option("--source", type=click.Choice(["topology", "runtime"], case_sensitive=False), default="topology",
+              help="Specify where to read the running nodes from: \"topology\" (the topology-data.json files that Containerlab writes to the lab directory of each deployed lab, checked against the container runtime, if it can be reached) or \"runtime\" (the local Docker-compatible container runtime); default: topology")
+@click.option("--topology", "-t", "topologies",
+              help="With --source topology, specify the Containerlab topology files, lab directories or topology-data.json files of the labs to read, as a comma-separated list (wildcards are supported); default: the topology files (*.clab.yml/*.clab.yaml) in the current directory")
+def read_local_labs(outputfile: str, clabHost: str = "localhost", source: str = "topology", topologies: str | None = None,
+                    labs: str | None = None, socketPath: str | None = None, network: str = "clab", incremental: bool = False,
+                    cache: bool = False) -> bool:
+    """Read details about running nodes from local labs, without the Containerlab API"""
+    return render_local_nodes(outputfile=outputfile, clabHost=clabHost, source=source, topologies=topologies, labs=labs,
+                              socketPath=socketPath, network=network, incremental=incremental, cache=cache).write()
+
+@phase(name="read running nodes from local labs")
+def render_local_nodes(outputfile: str, clabHost: str = "localhost", source: str = "topology", topologies: str | None = None,
+                       labs: str | None = None, socketPath: str | None = None, network: str = "clab", incremental: bool = False,
+                       cache: bool = False, previous: RenderedNodes | None = None, exitOnError: bool = True) -> RenderedNodes:
+    """Read the running nodes from the labs deployed on this machine (from their topology-data.json files or the container
+    runtime), returning the rendered node data without writing it to the output file (see the read-local-labs command)"""
+    labList = set(lab for lab in labs.replace(" ", "").split(",") if lab) if labs else None
+    runningNodes = {}
+    if source.lower() == "runtime":
+        socketPath = runtime_socket(socketPath=socketPath)
         try:
-            parsedOutput[name] = [{"name": node["Labels"]["clab-node-longname"],
-                                   "image": node["Image"],
-                                   "kind": node["Labels"]["clab-node-kind"],
-                                   "state": node["State"],
-                                   "ipv4_address": node["NetworkSettings"]["IPv4addr"],
-                                   "ipv6_address": node["NetworkSettings"]["IPv6addr"],
-                                   "ports": {
-                                       "ssh": 22
-                                   },
-                                   "method": None}
-                                  for node in check_if_list(data=nodes, errorString=errorString) if node["State"] == "running"]
-        except (KeyError, TypeError) as e:
-            handle_dict_access_errors(exception=e, errorString=errorString)
-
-    write_output_to_file(outputfile=outputfile, data=write_common_metadata(host=clabHost, originalDict=parsedOutput))
+            allNodes = query_container_runtime(socketPath=socketPath, network=network)
+        except (OSError, json.JSONDecodeError, ValueError, KeyError, TypeError) as e:
+            if not exitOnError:
+                raise OSError(f"Unable to retrieve running nodes from the container runtime at {socketPath}: {e}") from e
+            print(f"Error while retrieving running nodes from the container runtime at {socketPath}: {e}")
+            exit(-1)
+        runningNodes = {lab: labNodes for lab, labNodes in allNodes.items() if labList is None or lab in labList}
+    else:
+        for dataFile in find_topology_data(topologies=[path for path in topologies.split(",") if path.strip()] if topologies else None):
+            try:
+                lab, labNodes = read_topology_data(dataFile=dataFile)
+            except (OSError, ValueError) as e:
+                if not exitOnError:
+                    raise
+                print(f"Error while reading lab data from {dataFile}: {e}")
+                exit(-1)
+            except (KeyError, TypeError) as e:
+                handle_dict_access_errors(exception=e, errorString=f"Error while processing lab data from {dataFile}")
+            if labList is not None and lab not in labList:
+                continue
+            if lab in runningNodes:
+                print(f"WARNING: lab {lab} was found more than once; ignoring the lab data in {dataFile}")
+                continue
+            print(f"Reading nodes for lab {lab} from {dataFile}...")
+            runningNodes[lab] = labNodes
+
+        # topology-data.json files don't record whether the nodes are running (and are left behind when a lab is
+        # destroyed without --cleanup), so the nodes are checked against the container runtime whenever it's reachable
+        if runningNodes:
+            socketPath = runtime_socket(socketPath=socketPath)
+            try:
+                runningNodes = check_running_nodes(labs=runningNodes, running=query_container_runtime(socketPath=socketPath, network=network))
+            except (OSError, json.JSONDecodeError, ValueError, KeyError, TypeError) as e:
+                print(f"Warning: Unable to check which nodes are running with the container runtime at {socketPath}: {e}; assuming that all nodes in the topology data are running")
+
+    if labList is not None and labList - runningNodes.keys():
+        print(f"Warning: labs not found: {', '.join(sorted(labList - runningNodes.keys()))}")
+    if not runningNodes:
+        print("No running labs found - check to make sure the labs are deployed")
+
+    count(name="running nodes retrieved", value=sum(map(len, runningNodes.values())))
+    snapshot = (previous.snapshot() if previous is not None else read_snapshot(outputfile=outputfile)) if incremental else None
+    return RenderedNodes(outputfile=outputfile, host=clabHost, nodes=runningNodes, incremental=incremental,
+                         snapshot=snapshot, cache=cache)
 
 @node_data.command()
+@click.option("--cache/--no-cache", default=False,
+              help="Enable/disable writing a compact cache of the output next to the output file (with a .cache extension), which the launch commands load instead of parsing the JSON file again while it is unchanged (with their --cache option); default: disabled")
 @click.option("--datafile", "-d", required=True,
               help="Specify the path to the rendered JSON file containing running nodes that was generated by this utility using another node-data command")
 @click.option("--portfile", "-p", required=True,
               help="Specify the path to the input YAML file containing the port numbers for nodes with custom/non-default port numbers")
 @click.option("--output", "-o",
               help="Specify the output path for the new, rendered JSON file containing the custom ports for applicable running nodes; OPTIONAL, default is to replace the existing file. Only use this option if you care about keeping both the original and newly rendered JSON files")
-def inject_custom_ports(output: str | None, portfile: str, datafile: str) -> None:
+def inject_custom_ports(output: str | None, portfile: str, datafile: str, cache: bool = False) -> None:
     """Customize port numbers for sessions to lab devices in rendered output
 
     REQUIRES rendered output generated by this utility using another node-data command"""
     try:
         data = read_object_from_structured_data(filename=datafile, expected_format="json")
-        ports = read_object_from_structured_data(filename=portfile, expected_format="yaml")
     except (json.JSONDecodeError, ValueError) as e:
         print(f"Error while reading rendered JSON file from {datafile}: {e}")
         exit(-1)
-    except yaml.YAMLError as e:
-        print(f"Error while reading YAML file containing ports from {datafile}: {e}")
-        exit(-1)
 
     metadata = retrieve_and_delete_metadata(data=data, filename=datafile)
+    nodes = load_nodes(data=data, filename=datafile)
+    apply_custom_ports(nodes=nodes, portfile=portfile, datafile=datafile)
 
-    try:
-        nodeNames = {}
-        for lab, nodes in data.items():
-            nodeNames[lab] = [node["name"] for node in check_if_list(data=nodes, errorString=f"Error while processing lab {lab} from rendered JSON data")]
-    except (KeyError, TypeError) as e:
-        handle_dict_access_errors(exception=e, errorString=f"Error while processing nodes in lab {lab} from {datafile}")
-
-    for lab, nodes in ports.items():
-        if not isinstance(nodes, dict):
-            print(f"Error while processing lab {lab} from rendered JSON data: nodes not contained in a proper YAML mapping")
-            exit(-1)
+    fileName = output if output is not None else datafile
+    print(f"Writing output with custom port numbers to {fileName}...")
+    write_output_to_file(outputfile=fileName, data=({"_metadata_": metadata} | dump_nodes(nodes=nodes)), cache=cache)
 
-        try:
-            for name, ports in nodes.items():
-                print(f"Changing SSH port number for node {name} to {ports['ssh']}...")
-                data[lab][nodeNames[lab].index(name)]["ports"]["ssh"] = ports["ssh"]
-                data[lab][nodeNames[lab].index(name)]["method"] = "clabHost"
-        except (KeyError, TypeError) as e:
-            handle_dict_access_errors(exception=e, errorString=f"Error while processing nodes in lab {lab} from {portfile}")
-            exit(-1)
+@phase(name="inject custom ports")
+def apply_custom_ports(nodes: dict[str, list[Node]], portfile: str, datafile: str) -> None:
+    """Inject the custom ports from the port file into nodes grouped by lab in place; datafile only describes where
+    the nodes came from in messages"""
+    import yaml
+    try:
+        ports = read_object_from_structured_data(filename=portfile, expected_format="yaml")
+    except yaml.YAMLError as e:
+        print(f"Error while reading YAML file containing ports from {portfile}: {e}")
+        exit(-1)
 
+    overrides = PortOverrides(ports=ports)
+    if overrides.errors:
+        print(f"Error while processing custom ports from {portfile}:\n" + "\n".join(f"  {error}" for error in overrides.errors))
+        exit(-1)
 
-    fileName = output if output is not None else datafile
-    print(f"Writing output with custom port numbers to {fileName}...")
-    write_output_to_file(outputfile=fileName, data=({"_metadata_": metadata} | data))
+    changes, unknown = overrides.apply(nodes=nodes)
+    for change in changes:
+        print(f"Changing port numbers for {change}...")
+    if unknown:
+        print(f"Warning: skipped {len(unknown)} entries from {portfile} that don't match any running node in {datafile}: {', '.join(unknown)}")
@@ -1,32 +1,620 @@
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dotenv import dotenv_values
+from functools import cache
+from getpass import getpass
+from http.client import HTTPConnection
+from threading import Lock
+from typing import Any, Callable, Iterator, TextIO
+from urllib.parse import quote
 from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import requests.exceptions
+import base64
+import glob
 import json
+import os
+import socket
+import time
+
+from ..misc.helpers import write_cache
+from ..misc.instrumentation import count, observe, phase
+from ..misc.models import dump_nodes, Node
+
+TOKEN_CACHE_FILE = os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                                "clab-terminal-launcher", "tokens.json")
+TOKEN_EXPIRY_MARGIN = 30 # seconds before the real expiry time at which a cached token is no longer used
+INSPECT_CHUNK_SIZE = 1 << 16 # characters read at a time when streaming clab inspect output
+RETRY_STATUSES = [429, 502, 503, 504] # statuses of GET responses that are retried, as they are usually temporary
+RETRY_BACKOFF = 0.5 # base delay in seconds between retries, doubling for every further retry (the first retry is immediate)
+RETRY_JITTER = 0.5 # maximum random delay added to each retry, so that concurrent requests don't all retry at once
+TOPOLOGY_PATTERNS = ["*.clab.yml", "*.clab.yaml"] # topology files looked for in the current directory when none are provided
+TOPOLOGY_DATA_FILE = "topology-data.json" # file written by Containerlab to the lab directory of each deployed lab
+LAB_DIRECTORY_BASE_VARIABLE = "CLAB_LABDIR_BASE" # environment variable that Containerlab uses to relocate lab directories
+NON_CONTAINER_KINDS = {"bridge", "ovs-bridge", "host"} # kinds of topology nodes that don't run in a container
+RUNTIME_SOCKET = "/var/run/docker.sock" # default socket of the local Docker-compatible container runtime
+RUNTIME_TIMEOUT = 10 # seconds to wait for the container runtime to respond
+SNAPSHOT_FIELDS = ["image", "kind", "state", "ipv4_address", "ipv6_address", "clabHost", "group", "ports", "method"] # fields compared by incremental refreshes
+tokenCacheLock = Lock()
+
+class APIError(Exception):
+    """Raised in place of terminating the program when the caller handles Containerlab API errors itself"""
+    pass
+
+@dataclass(frozen=True, slots=True)
+class APIConnection:
+    """How to connect to the Containerlab API of each host: the port, scheme, CA certificate (bundle) for HTTPS (None for the
+    default CA certificates), number of retries for failed requests, and connect/read timeouts in seconds"""
+    port: int = 8080
+    https: bool = False
+    caCert: str | None = None
+    retries: int = 3
+    connectTimeout: float = 5.0
+    readTimeout: float = 30.0
+
+    def base_url(self, host: str) -> str:
+        return f"{'https' if self.https else 'http'}://{f'[{host}]' if ':' in host else host}:{self.port}"
 
 class ContainerlabAPI(Session):
-    def __init__(self, baseURL: str) -> None:
+    """Session for the Containerlab API of one host, with a connection pool sized for the concurrent requests, timeouts, and
+    retries with jittered exponential backoff (read errors and temporary error statuses are only retried for GET requests)"""
+    def __init__(self, baseURL: str, poolSize: int = 10, connection: APIConnection = APIConnection()) -> None:
         self.baseURL = baseURL
+        self.reauthenticate: Callable[[str | None], None] | None = None
+        self.timeout = (connection.connectTimeout, connection.readTimeout)
         super().__init__()
+        if connection.caCert is not None:
+            self.verify = connection.caCert
+        retry = Retry(total=connection.retries, connect=connection.retries, read=connection.retries, status=connection.retries,
+                      allowed_methods=["GET"], status_forcelist=RETRY_STATUSES, backoff_factor=RETRY_BACKOFF,
+                      backoff_jitter=RETRY_JITTER, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize, max_retries=retry)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
 
-    def request(self, method: str, url: str, *args, **kwargs) -> Response:
+    def request(self, method: str, url: str, *args, exitOnError: bool = True, **kwargs) -> Response:
+        kwargs.setdefault("timeout", self.timeout)
         try:
-            return super().request(method, f"{self.baseURL}{url}", *args, **kwargs)
+            staleToken = self.headers.get("Authorization")
+            response = self.timed_request(method, url, *args, **kwargs)
+            # Re-authenticate once and retry if the token was rejected (e.g., an expired or revoked cached token)
+            if response.status_code == 401 and self.reauthenticate is not None and url != "/login":
+                self.reauthenticate(staleToken)
+                response = self.timed_request(method, url, *args, **kwargs)
+            return response
         except requests.exceptions.RequestException as e:
+            if not exitOnError:
+                raise APIError(f"Error while attempting to connect to the Containerlab API: {e}") from e
             print(f"Error while attempting to connect to the Containerlab API: {e}")
             exit(-1)
+        except APIError as e:
+            if not exitOnError:
+                raise
+            print(e)
+            exit(-1)
+
+    def timed_request(self, method: str, url: str, *args, **kwargs) -> Response:
+        startTime = time.perf_counter()
+        response = super().request(method, f"{self.baseURL}{url}", *args, **kwargs)
+        observe(name="API request", seconds=time.perf_counter() - startTime)
+        count(name=f"API responses with status {response.status_code}")
+        return response
+
+class ResponseCache:
+    """Cache of Containerlab API response bodies and their validators (ETag/Last-Modified) from a previous run, used to make
+    conditional requests; only the responses used during the current run are kept when the cache is saved"""
+    def __init__(self, responses: dict[str, Any] | None = None) -> None:
+        self.previous = responses if isinstance(responses, dict) else {}
+        self.current = {}
+
+    def request_headers(self, key: str) -> dict[str, str]:
+        headers = {}
+        entry = self.previous.get(key)
+        if isinstance(entry, dict) and "body" in entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("lastModified"):
+                headers["If-Modified-Since"] = entry["lastModified"]
+        return headers
+
+    def reuse(self, key: str) -> Any:
+        self.current[key] = self.previous[key]
+        return self.current[key]["body"]
+
+    def store(self, key: str, response: Response, body: Any) -> None:
+        if "ETag" in response.headers or "Last-Modified" in response.headers:
+            self.current[key] = {"etag": response.headers.get("ETag"),
+                                 "lastModified": response.headers.get("Last-Modified"),
+                                 "body": body}
 
-def process_response(error: str, host: str, response: Response) -> dict[str, Any] | None:
+def process_response(error: str, host: str, response: Response, exitOnError: bool = True) -> dict[str, Any] | None:
     """Helper function to parse responses from the Containerlab API to determine the status of the
-    response and handle any API errors by outputting the error and terminating the program"""
+    response and handle any API errors (including non-JSON responses) by outputting the error and terminating the program"""
     if response.status_code == 200:
-        return response.json()
+        # A response that isn't JSON (e.g., an HTML page returned by a proxy) is handled the same way as an API error
+        try:
+            return response.json()
+        except ValueError as e:
+            message = f"{error}, host: {host}, status code: {response.status_code}, error: response is not valid JSON ({e})"
     else:
         try:
             returnedError = response.json()["error"]
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, KeyError, TypeError):
             returnedError = response.text
-        print(f"{error}, host: {host}, status code: {response.status_code}, error: {returnedError}")
-        exit(-1)
+        message = f"{error}, host: {host}, status code: {response.status_code}, error: {returnedError}"
+    if not exitOnError:
+        raise APIError(message)
+    print(message)
+    exit(-1)
+
+def conditional_get(api: ContainerlabAPI, url: str, error: str, host: str, responseCache: ResponseCache | None = None) -> Any:
+    """Helper function to send a GET request to the Containerlab API, made conditional on the ETag/Last-Modified of the cached
+    response (if a response cache is provided) so that an unchanged response is reused; raises an APIError if the request fails"""
+    cacheKey = f"{api.baseURL}{url}"
+    response = api.get(url=url, headers=(responseCache.request_headers(key=cacheKey) if responseCache is not None else None), exitOnError=False)
+    if response.status_code == 304 and responseCache is not None:
+        return responseCache.reuse(key=cacheKey)
+
+    body = process_response(error=error, host=host, response=response, exitOnError=False)
+    if responseCache is not None:
+        responseCache.store(key=cacheKey, response=response, body=body)
+    return body
+
+def retrieve_labs(api: ContainerlabAPI, host: str, labs: list[str], concurrency: int,
+                  responseCache: ResponseCache | None = None) -> tuple[dict[str, Any], dict[str, str]]:
+    """Helper function to concurrently retrieve the nodes for each of the provided labs from the Containerlab API;
+    returns the nodes for every lab that was retrieved, along with the error for every lab that wasn't"""
+    def retrieve_lab(lab: str) -> Any:
+        print(f"Retrieving running nodes for lab {lab}...")
+        return conditional_get(api=api, url=f"/api/v1/labs/{lab}", host=host, responseCache=responseCache,
+                               error=f"Error retrieving lab nodes for lab {lab} - check to make sure the lab exists and is running")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {lab: executor.submit(retrieve_lab, lab) for lab in labs}
+
+    retrievedLabs = {}
+    failedLabs = {}
+    for lab, future in futures.items():
+        try:
+            retrievedLabs[lab] = future.result()
+        except APIError as e:
+            failedLabs[lab] = str(e)
+
+    return retrievedLabs, failedLabs
+
+def lazy_password(password: str | None, envfile: str | None) -> Callable[[], str]:
+    """Helper function to return a callable that looks up the password for the Containerlab API (from the provided password,
+    the CLABPASS environment variable or an interactive prompt) only the first time it is needed"""
+    passwordLock = Lock()
+
+    @cache
+    def resolve_password() -> str:
+        if password is not None:
+            return password
+        if envfile is not None:
+            try:
+                envPassword = dotenv_values(envfile)["CLABPASS"]
+            except KeyError:
+                envPassword = None
+                print(f"WARNING: CLABPASS variable not found in provided environment variable file {envfile}. Proceeding without it...")
+        else:
+            envPassword = os.getenv("CLABPASS")
+        if envPassword is not None:
+            print("Password retrieved via environment variable.")
+            return envPassword
+        return getpass("Enter your Containerlab host password:")
+
+    def get_password() -> str:
+        with passwordLock:
+            return resolve_password()
+
+    return get_password
+
+def get_token_expiry(token: str) -> float | None:
+    """Helper function to read the expiry time from the payload of a JWT bearer token (without verifying the token);
+    returns None if the token doesn't contain a readable expiry time"""
+    try:
+        payload = token.split(".")[1]
+        return float(json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))["exp"])
+    except (IndexError, ValueError, KeyError, TypeError):
+        return None
+
+def read_token_cache(tokenCacheFile: str) -> dict[str, Any]:
+    """Helper function to read the on-disk bearer token cache; returns an empty cache if the file doesn't exist or is unreadable"""
+    try:
+        with open(tokenCacheFile, "r") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def load_cached_token(tokenCacheFile: str, cacheKey: str) -> str | None:
+    """Helper function to look up a bearer token in the on-disk token cache; returns None if there is no cached token
+    or if the cached token has expired (or is about to)"""
+    entry = read_token_cache(tokenCacheFile=tokenCacheFile).get(cacheKey)
+    if not isinstance(entry, dict) or not isinstance(entry.get("token"), str):
+        return None
+
+    expiry = entry.get("expires")
+    if isinstance(expiry, (int, float)) and expiry - TOKEN_EXPIRY_MARGIN <= time.time():
+        return None
+    return entry["token"]
+
+def store_cached_token(tokenCacheFile: str, cacheKey: str, token: str) -> None:
+    """Helper function to add a bearer token to the on-disk token cache, dropping any expired tokens; the cache file
+    is only readable/writable by the current user and is replaced atomically so that concurrent runs never see a partial file"""
+    with tokenCacheLock:
+        now = time.time()
+        cache = {key: entry for key, entry in read_token_cache(tokenCacheFile=tokenCacheFile).items()
+                 if isinstance(entry, dict) and not (isinstance(entry.get("expires"), (int, float)) and entry["expires"] <= now)}
+        cache[cacheKey] = {"token": token, "expires": get_token_expiry(token=token)}
+
+        tempFile = f"{tokenCacheFile}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(tokenCacheFile), mode=0o700, exist_ok=True)
+            with os.fdopen(os.open(tempFile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+                json.dump(cache, f)
+            os.replace(tempFile, tokenCacheFile)
+        except OSError as e:
+            print(f"WARNING: Unable to write the Containerlab API token cache to {tokenCacheFile}: {e}")
+
+def authenticate(api: ContainerlabAPI, host: str, username: str, password: Callable[[], str], tokenCacheFile: str | None = None) -> None:
+    """Helper function to authenticate to the Containerlab API (reusing a valid cached token, if a token cache file is provided)
+    and set up the API session to log in again if the token is rejected; raises an APIError if authentication fails"""
+    cacheKey = f"{username}@{api.baseURL}"
+    loginLock = Lock()
+
+    def login(staleToken: str | None = None) -> None:
+        with loginLock:
+            if staleToken is not None and api.headers.get("Authorization") != staleToken:
+                return # another request already replaced the rejected token
+            print(f"Authenticating to the Containerlab API at host {host}...")
+            token = process_response(error="Error authenticating to the Containerlab API",
+                                     host=host,
+                                     response=api.post(url="/login",
+                                                       json={"username": username, "password": password()},
+                                                       exitOnError=False),
+                                     exitOnError=False)["token"]
+            api.headers["Authorization"] = f"Bearer {token}"
+            if tokenCacheFile is not None:
+                store_cached_token(tokenCacheFile=tokenCacheFile, cacheKey=cacheKey, token=token)
+
+    cachedToken = load_cached_token(tokenCacheFile=tokenCacheFile, cacheKey=cacheKey) if tokenCacheFile is not None else None
+    if cachedToken is not None:
+        print(f"Using cached Containerlab API token for user {username} at host {host}")
+        api.headers["Authorization"] = f"Bearer {cachedToken}"
+    else:
+        login()
+
+    api.reauthenticate = login
+
+def retrieve_host_nodes(host: str, username: str, password: Callable[[], str], labs: list[str] | None, concurrency: int,
+                        tokenCacheFile: str | None = None, responseCache: ResponseCache | None = None,
+                        sessions: dict[str, ContainerlabAPI] | None = None, connection: APIConnection = APIConnection()) -> dict[str, Any]:
+    """Helper function to authenticate to the Containerlab API of a single host (reusing its session from sessions, if any)
+    and retrieve the nodes for the provided labs (or all labs); raises an APIError if the host can't be used at all"""
+    api = sessions.get(host) if sessions is not None else None
+    if api is None:
+        api = ContainerlabAPI(baseURL=connection.base_url(host=host), poolSize=concurrency, connection=connection)
+        with phase(name="authenticate to the Containerlab API"):
+            authenticate(api=api, host=host, username=username, password=password, tokenCacheFile=tokenCacheFile)
+        if sessions is not None:
+            sessions[host] = api
+
+    if labs: # runs if there is a list of labs provided
+        allNodes, failedLabs = retrieve_labs(api=api, host=host, labs=labs, concurrency=concurrency, responseCache=responseCache)
+        for lab, error in failedLabs.items():
+            print(f"{error}; skipping lab {lab}...")
+
+        if not allNodes:
+            raise APIError(f"Unable to retrieve any of the provided labs from host {host} - check to make sure the labs exist and are running")
+
+        if failedLabs:
+            print(f"Retrieved {len(allNodes)} of {len(allNodes) + len(failedLabs)} labs from host {host}; failed labs: {", ".join(failedLabs)}")
+    else: # runs to retrieve all labs as a default behavior without a list of labs
+        print(f"Retrieving running nodes for all labs from host {host}...")
+        allNodes = conditional_get(api=api, url="/api/v1/labs", error="Error retrieving all running labs", host=host, responseCache=responseCache)
+        if not allNodes:
+            raise APIError(f"No running labs found on host {host} - check to make sure there are labs running")
+
+        print(f"Labs found on host {host}: {", ".join(allNodes)}")
+
+    return allNodes
+
+class JSONStream:
+    """Reads a JSON document from a file in chunks, decoding one value at a time so that only the value being decoded
+    (plus at most one chunk) is held in memory; the caller walks the document using expect/peek and decode_value"""
+    WHITESPACE = " \t\n\r"
+    NUMBER_CONTINUATION = "0123456789.eE+-" # characters that may continue a number that was decoded
+
+    def __init__(self, file: TextIO, chunkSize: int = INSPECT_CHUNK_SIZE) -> None:
+        self.file = file
+        self.chunkSize = chunkSize
+        self.buffer = ""
+        self.pos = 0
+        self.consumed = 0 # characters discarded from the start of the buffer, to report positions within the file
+        self.exhausted = False
+        self.decoder = json.JSONDecoder()
+
+    def fill(self) -> bool:
+        """Read the next chunk, discarding the consumed part of the buffer (the amount read grows with the size of the value
+        being decoded, so retrying a large value isn't quadratic); returns whether anything was read"""
+        if self.exhausted:
+            return False
+        chunk = self.file.read(max(self.chunkSize, len(self.buffer) - self.pos))
+        if not chunk:
+            self.exhausted = True
+            return False
+        self.consumed += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it (an empty string at the end of the file)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in self.WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, characters: str) -> str:
+        """Consume and return the next non-whitespace character, which must be one of the provided characters"""
+        character = self.peek()
+        if not character or character not in characters:
+            raise self.error(message=f"Expecting one of {', '.join(repr(c) for c in characters)}", pos=self.pos)
+        self.pos += 1
+        return character
+
+    def error(self, message: str, pos: int) -> ValueError:
+        """Return an exception for invalid JSON at the provided position in the buffer"""
+        return ValueError(f"{message} at character {self.consumed + pos + 1}")
+
+    def decode_value(self) -> Any:
+        """Decode and consume the next complete JSON value, reading more chunks while the value is incomplete"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number that ends at the end of the buffer, or is followed by what could be the rest of it (e.g.,
+                # "1." followed by "5" in the next chunk, which decodes as 1), may continue in the next chunk
+                if (self.exhausted or not isinstance(value, (int, float))
+                        or (end < len(self.buffer) and self.buffer[end] not in self.NUMBER_CONTINUATION)):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.exhausted:
+                    raise self.error(message=e.msg, pos=e.pos)
+            self.fill()
+
+def stream_inspect_output(file: TextIO, chunkSize: int = INSPECT_CHUNK_SIZE) -> Iterator[tuple[str, Iterator[Any]]]:
+    """Helper function to stream the labs in clab inspect output from an open file, yielding each lab name with an iterator
+    over its containers (which must be consumed before the next lab); lab values that aren't lists are yielded as-is"""
+    stream = JSONStream(file=file, chunkSize=chunkSize)
+
+    def containers() -> Iterator[Any]:
+        if stream.peek() != "]":
+            while True:
+                yield stream.decode_value()
+                if stream.expect(",]") == "]":
+                    return
+        stream.expect("]")
+
+    if stream.peek() != "{":
+        raise ValueError("Invalid format: NOT a JSON object")
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.expect("}")
+    else:
+        while True:
+            if stream.peek() != "\"":
+                raise stream.error(message="Expecting property name enclosed in double quotes", pos=stream.pos)
+            lab = stream.decode_value()
+            stream.expect(":")
+            if stream.peek() == "[":
+                stream.expect("[")
+                labContainers = containers()
+                yield lab, labContainers
+                # Skip whatever the caller didn't consume so that the stream is positioned after the list
+                for _ in labContainers:
+                    pass
+            else:
+                yield lab, stream.decode_value()
+            if stream.expect(",}") == "}":
+                break
+    if stream.peek():
+        raise stream.error(message="Extra data", pos=stream.pos)
+
+def find_topology_data(topologies: list[str] | None) -> list[str]:
+    """Helper function to find the topology-data.json file of each deployed lab from the provided topology files, lab directories
+    or topology-data.json files (wildcards allowed; the topology files in the current directory by default)"""
+    paths = []
+    for pattern in topologies if topologies else TOPOLOGY_PATTERNS:
+        matches = sorted(glob.glob(os.path.expanduser(pattern)))
+        if not matches and topologies:
+            print(f"Warning: No topology files, lab directories or {TOPOLOGY_DATA_FILE} files found matching {pattern}")
+        paths.extend(matches)
+
+    dataFiles = []
+    for path in dict.fromkeys(paths):
+        if os.path.isdir(path):
+            dataFile = os.path.join(path, TOPOLOGY_DATA_FILE)
+        elif path.endswith(".json"):
+            dataFile = path
+        else:
+            # Only the name of the lab is needed from the topology file, as the lab directory is always named after it
+            # (with a "clab-" prefix) and is next to the topology file, unless Containerlab was told to put it elsewhere
+            import yaml # only imported when topology files are actually read, as it is slow to import
+            try:
+                with open(path, "r") as f:
+                    name = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))["name"]
+            except (OSError, yaml.YAMLError, KeyError, TypeError) as e:
+                print(f"Warning: Unable to read the lab name from topology file {path}: {e}; skipping topology...")
+                continue
+            baseDirectory = os.environ.get(LAB_DIRECTORY_BASE_VARIABLE) or os.path.dirname(os.path.abspath(path))
+            dataFile = os.path.join(baseDirectory, f"clab-{name}", TOPOLOGY_DATA_FILE)
+
+        if os.path.isfile(dataFile):
+            dataFiles.append(dataFile)
+        else:
+            print(f"No {TOPOLOGY_DATA_FILE} found for {path} (expected {dataFile}); the lab may not be deployed, or its lab directory may be elsewhere, skipping...")
+    return list(dict.fromkeys(dataFiles))
+
+def read_topology_data(dataFile: str) -> tuple[str, list[Node]]:
+    """Helper function to read the name of a lab and its containerized nodes from its topology-data.json file, which doesn't
+    record their state (see check_running_nodes); raises OSError/ValueError if it can't be read and KeyError/TypeError if malformed"""
+    with open(dataFile, "r") as f:
+        data = json.load(f)
+    nodes = [Node(name=node["longname"], image=node["image"], kind=node["kind"], state="running",
+                  ipv4_address=node.get("mgmt-ipv4-address", ""), ipv6_address=node.get("mgmt-ipv6-address", ""),
+                  group=node.get("group") or None)
+             for node in data["nodes"].values() if node["kind"] not in NON_CONTAINER_KINDS]
+    return data["name"], nodes
+
+def check_running_nodes(labs: dict[str, list[Node]], running: dict[str, list[Node]]) -> dict[str, list[Node]]:
+    """Helper function to keep only the nodes from topology data that the container runtime reports as running (as
+    retrieved by query_container_runtime), taking their state and container from the runtime"""
+    checkedLabs = {}
+    for lab, labNodes in labs.items():
+        containers = {node.name: node for node in running.get(lab, [])}
+        checkedNodes = []
+        for node in labNodes:
+            if node.name in containers:
+                node.state, node.container = containers[node.name].state, containers[node.name].container
+                checkedNodes.append(node)
+        if checkedNodes:
+            checkedLabs[lab] = checkedNodes
+        else:
+            print(f"No running nodes found for lab {lab}; the lab may have been destroyed, skipping...")
+    return checkedLabs
+
+class UnixHTTPConnection(HTTPConnection):
+    """HTTP connection over a Unix socket, as used by the API of the local container runtime (e.g., Docker, Podman)"""
+    def __init__(self, socketPath: str, timeout: float = RUNTIME_TIMEOUT) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socketPath = socketPath
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socketPath)
+
+def runtime_socket(socketPath: str | None) -> str:
+    """Helper function to return the socket of the local container runtime: the provided socket, the socket in the
+    DOCKER_HOST environment variable (if it is a Unix socket) or the default Docker socket"""
+    if socketPath:
+        return socketPath.removeprefix("unix://")
+    dockerHost = os.environ.get("DOCKER_HOST", "")
+    return dockerHost.removeprefix("unix://") if dockerHost.startswith("unix://") else RUNTIME_SOCKET
+
+def query_container_runtime(socketPath: str, network: str) -> dict[str, list[Node]]:
+    """Helper function to retrieve the running Containerlab nodes, grouped by lab, from the local Docker-compatible container
+    runtime in a single request; raises OSError if the runtime can't be reached and ValueError if its response is invalid"""
+    connection = UnixHTTPConnection(socketPath=socketPath)
+    try:
+        connection.request("GET", "/containers/json?filters=" + quote(json.dumps({"label": ["containerlab"], "status": ["running"]})))
+        response = connection.getresponse()
+        body = response.read()
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise ValueError(f"the container runtime responded with status {response.status}: {body.decode(errors='replace').strip()}")
+
+    labs: dict[str, list[Node]] = {}
+    for container in json.loads(body):
+        networks = container["NetworkSettings"]["Networks"] or {}
+        addressed = [settings for settings in networks.values() if settings.get("IPAddress") or settings.get("GlobalIPv6Address")]
+        settings = networks.get(network) or (addressed[0] if len(addressed) == 1 else {})
+        labels = container["Labels"]
+        labs.setdefault(labels["containerlab"], []).append(
+            Node(name=labels["clab-node-longname"], image=container["Image"], kind=labels["clab-node-kind"],
+                 state=container["State"], ipv4_address=settings.get("IPAddress") or "",
+                 ipv6_address=settings.get("GlobalIPv6Address") or "", group=labels.get("clab-node-group") or None,
+                 container=container["Id"]))
+
+    # The runtime lists the most recently created containers first, so the nodes are sorted by name, as with clab inspect
+    return {lab: sorted(labNodes, key=lambda node: node.name) for lab, labNodes in sorted(labs.items())}
+
+class PortOverrides:
+    """Custom port numbers from a port file (per node, or per kind=/image= filter globally or within a lab), indexed so that
+    they can be applied to rendered node data in linear time; invalid entries are collected in self.errors"""
+    FILTERS = ("kind", "image")
+
+    def __init__(self, ports: dict[str, Any]) -> None:
+        self.errors: list[str] = []
+        self.patterns: dict[str | None, dict[str, dict[str, dict[str, int]]]] = {}
+        self.nodes: dict[str, dict[str, dict[str, int]]] = {}
+
+        for key, entry in ports.items():
+            if self.index_pattern(scope=None, key=str(key), entry=entry):
+                continue
+            if not isinstance(entry, dict):
+                self.errors.append(f"lab {key}: nodes not contained in a proper YAML mapping")
+                continue
+            self.nodes[key] = {}
+            for name, nodePorts in entry.items():
+                if not self.index_pattern(scope=key, key=str(name), entry=nodePorts):
+                    self.nodes[key][name] = self.validate_ports(description=f"node {name} in lab {key}", entry=nodePorts)
+
+    def index_pattern(self, scope: str | None, key: str, entry: Any) -> bool:
+        """Index the entry as a kind=/image= pattern for the provided scope (None for all labs) if the key is a pattern;
+        returns whether it was one"""
+        filterType, separator, value = key.partition("=")
+        if not separator or filterType not in self.FILTERS:
+            return False
+        description = f"{key}{f' in lab {scope}' if scope is not None else ''}"
+        self.patterns.setdefault(scope, {name: {} for name in self.FILTERS})[filterType][value] = self.validate_ports(description=description, entry=entry)
+        return True
+
+    def validate_ports(self, description: str, entry: Any) -> dict[str, int]:
+        if not isinstance(entry, dict):
+            self.errors.append(f"{description}: ports not contained in a proper YAML mapping")
+            return {}
+        validPorts = {}
+        for protocol, port in entry.items():
+            if isinstance(port, str) and port.isdigit():
+                port = int(port)
+            if isinstance(port, bool) or not isinstance(port, int) or not 1 <= port <= 65535:
+                self.errors.append(f"{description}: invalid port number for {protocol}, {port!r}")
+                continue
+            validPorts[str(protocol)] = port
+        return validPorts
+
+    def apply(self, nodes: dict[str, list[Node]]) -> tuple[list[str], list[str]]:
+        """Apply the custom ports to nodes grouped by lab in place, indexing each lab's nodes by name once; returns the
+        descriptions of the changes that were made and of the entries that matched no node"""
+        changes = []
+        patternCounts: dict[tuple[str | None, str, str], int] = {}
+        unknown = [f"lab {lab}" for lab in self.nodes if lab not in nodes]
+        for lab, labNodes in nodes.items():
+            scopes = [scope for scope in (None, lab) if scope in self.patterns]
+            index = {}
+            for node in labNodes:
+                index[node.name] = node
+                for scope in scopes:
+                    for filterType in self.FILTERS:
+                        value = getattr(node, filterType)
+                        patternPorts = self.patterns[scope][filterType].get(value)
+                        if patternPorts:
+                            node.ports = node.ports | patternPorts
+                            patternKey = (scope, filterType, value)
+                            patternCounts[patternKey] = patternCounts.get(patternKey, 0) + 1
+
+            for name, nodePorts in self.nodes.get(lab, {}).items():
+                node = index.get(name)
+                if node is None:
+                    unknown.append(f"node {name} in lab {lab}")
+                    continue
+                node.ports = node.ports | nodePorts
+                if "ssh" in nodePorts:
+                    node.method = "clabHost"
+                changes.append(f"node {name}: {', '.join(f'{protocol} {port}' for protocol, port in nodePorts.items())}")
+
+        patternChanges = [f"{filterType}={value}{f' in lab {scope}' if scope is not None else ''} ({count} nodes): "
+                          f"{', '.join(f'{protocol} {port}' for protocol, port in self.patterns[scope][filterType][value].items())}"
+                          for (scope, filterType, value), count in patternCounts.items()]
+        return patternChanges + changes, unknown
 
 def write_common_metadata(host: str, originalDict: dict[str, Any]) -> dict[str, Any]:
     """Helper function to write a common set of Containerlab metadata to the rendered JSON file"""
@@ -38,12 +626,89 @@ def write_common_metadata(host: str, originalDict: dict[str, Any]) -> dict[str,
 
     return metadata | originalDict
 
-def write_output_to_file(outputfile: str, data: dict[str, Any]) -> None:
-    """Helper function to write rendered JSON output to an output file and report the status"""
+@phase(name="write node data")
+def write_output_to_file(outputfile: str, data: dict[str, Any], cache: bool = False) -> None:
+    """Helper function to write rendered JSON output to an output file and report the status; if cache is set,
+    a compact cache of the output is also written next to the output file for the launch commands to load"""
     try:
         with open(outputfile, "w") as file:
             file.write(json.dumps(data, indent=4))
     except OSError as e:
         print(f"Error, unable to write output to file {outputfile}: {e}")
         exit(-1)
-    print(f"Output successfully written to {outputfile}")
\ No newline at end of file
+    if cache:
+        write_cache(filename=outputfile, data=data)
+    print(f"Output successfully written to {outputfile}")
+
+def read_snapshot(outputfile: str) -> dict[str, Any] | None:
+    """Helper function to read the snapshot kept next to a rendered JSON file by incremental refreshes; returns None if there
+    is no usable snapshot, or if the rendered JSON file it describes no longer exists"""
+    if not os.path.exists(outputfile):
+        return None
+    try:
+        with open(f"{outputfile}.snapshot", "r") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return snapshot if isinstance(snapshot, dict) and isinstance(snapshot.get("nodes"), dict) else None
+
+def diff_nodes(previous: dict[str, Any], current: dict[str, Any]) -> tuple[list[str], list[str], list[str]]:
+    """Helper function to compare two sets of rendered lab nodes by node name; returns the names of the added, removed and
+    changed nodes, where only the fields relevant to launching sessions (e.g., not uptime/status strings) are compared"""
+    def index_nodes(labs: dict[str, Any]) -> dict[str, dict[str, Any]]:
+        return {node["name"]: {"lab": lab} | {field: node.get(field) for field in SNAPSHOT_FIELDS}
+                for lab, nodes in labs.items() if isinstance(nodes, list) for node in nodes if isinstance(node, dict) and "name" in node}
+
+    previousNodes = index_nodes(labs=previous)
+    currentNodes = index_nodes(labs=current)
+    added = [name for name in currentNodes if name not in previousNodes]
+    removed = [name for name in previousNodes if name not in currentNodes]
+    changed = [name for name, node in currentNodes.items() if name in previousNodes and previousNodes[name] != node]
+    return added, removed, changed
+
+class RenderedNodes:
+    """Rendered data for the running nodes retrieved by a node-data command, kept in memory (along with the output file and
+    the diff against the previous snapshot) so that the quick command can use it without reading it from a file again"""
+    def __init__(self, outputfile: str, host: str, nodes: dict[str, list[Node]], incremental: bool = False,
+                 snapshot: dict[str, Any] | None = None, responseCache: ResponseCache | None = None, cache: bool = False) -> None:
+        self.outputfile = outputfile
+        self.host = host
+        self.nodes = nodes
+        self.incremental = incremental
+        self.responseCache = responseCache
+        self.cache = cache
+        self.records = dump_nodes(nodes=nodes) # written to the output file and snapshot, and compared with the snapshot
+
+        self.changed = True
+        if snapshot is not None:
+            added, removed, modified = diff_nodes(previous=snapshot["nodes"], current=self.records)
+            self.changed = bool(added or removed or modified)
+            print(f"Changes since the last refresh: {len(added)} added, {len(removed)} removed, {len(modified)} changed")
+            for symbol, names in (("+", added), ("-", removed), ("~", modified)):
+                for name in names:
+                    print(f"  {symbol} {name}")
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns the snapshot of the rendered nodes (and of the API responses they were retrieved from) that the next
+        incremental refresh is compared against"""
+        return {"nodes": self.records, "responses": self.responseCache.current if self.responseCache is not None else {}}
+
+    def write(self, nodes: dict[str, list[Node]] | None = None, cache: bool | None = None, force: bool = False) -> bool:
+        """Write the rendered nodes (or the provided nodes, e.g., with custom ports injected) to the output file unless nothing
+        changed since the last incremental refresh (and force isn't set); returns whether the output file was (re)written"""
+        written = self.changed or force
+        if written:
+            write_output_to_file(outputfile=self.outputfile,
+                                 data=write_common_metadata(host=self.host, originalDict=dump_nodes(nodes=nodes) if nodes is not None else self.records),
+                                 cache=cache if cache is not None else self.cache)
+        else:
+            print(f"No changes to running nodes; leaving {self.outputfile} unchanged")
+
+        if self.incremental:
+            try:
+                with open(f"{self.outputfile}.snapshot", "w") as f:
+                    json.dump(self.snapshot(), f)
+            except OSError as e:
+                print(f"WARNING: Unable to write the incremental refresh snapshot to {self.outputfile}.snapshot: {e}")
+
+        return written
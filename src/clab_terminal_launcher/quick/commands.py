@@ -1,28 +1,156 @@
 import click
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from dotenv import dotenv_values
+from threading import Lock
+from typing import Any, Callable
 
-from .helpers import validate_required_keys, parse_settings, run_command
-from ..node_data.commands import retrieve_from_api, parse_inspect_output, inject_custom_ports
-from ..launch.commands import SecureCRT, PuTTY, MTPuTTY, native_OpenSSH
+from .helpers import capture_output, hold_output, print_profile_report, validate_required_keys, load_settings, run_command, BackgroundWriter, ProfileStatus
+from ..node_data.commands import retrieve_from_api, render_api_nodes, parse_inspect_output, render_inspect_nodes, read_local_labs, render_local_nodes, inject_custom_ports, apply_custom_ports
+from ..node_data.helpers import write_common_metadata, write_output_to_file, RenderedNodes
+from ..misc.models import dump_nodes, Node
+from ..launch.commands import SecureCRT, PuTTY, MTPuTTY, native_OpenSSH, OpenSSH_config, tmux
+from ..launch.selectors import NodeSelector, NodeSelectorType
 
 
+PORT_KEYS = ["RETRIEVE_PORTS_FILE", "RETRIEVE_PORTS_OUTPUT", "RETRIEVE_PORTS_CACHE"] # settings that port injection depends on
+SERIAL_LAUNCH_METHODS = ["mtputty", "openssh-config", "tmux"] # launch methods that update shared files/sessions, run one at a time
+
 @click.command()
-@click.option("--config", "-c", default="config.env",
-              help="Specify the path to the config file in plain text environment variable/Bash format (see docs for more details); default: config.env in the local directory")
+@click.option("--config", "-c", "configs", multiple=True, default=["config.env"],
+              help="Specify the path to the config file in plain text environment variable/Bash format (see docs for more details); specify more than once to run several profiles, one per config file, sharing the retrieval of the running nodes between profiles with the same retrieval settings and launching the sessions for the profiles in parallel; default: config.env in the local directory")
+@click.option("--parallel", type=click.IntRange(min=1), default=4,
+              help="With more than one config file, specify the maximum number of profiles to launch sessions for at the same time; profiles using the MTPuTTY, OpenSSH config or tmux launch methods always run one at a time, as they may update the same files/sessions; default: 4")
+@click.option("--select", "selector", type=NodeSelectorType(),
+              help="Only launch sessions to the lab devices that match a selector (e.g., lab=core,kind=nokia_srlinux,name=spine*), in place of the LAUNCH_*_SELECT setting for the launch method; the node data for all running nodes is still written. See the launch commands for the selector syntax")
 @click.pass_context
-def quick(ctx: click.Context, config: str) -> None:
+def quick(ctx: click.Context, configs: tuple[str, ...], selector: NodeSelector | None, parallel: int = 4) -> None:
     """Quickly perform all commands required to launch sessions to connect to lab devices,
     based on a configuration file"""
+    configs = list(dict.fromkeys(configs))
+    if len(configs) > 1:
+        run_profiles(ctx=ctx, configs=configs, selector=selector, parallel=parallel)
+        return
+    config = configs[0]
 
     # Import defined variables and validate that basic, required variables are present
+    settings = load_basic_settings(config=config)
+
+    # Retrieve nodes based on retrieval method
+    task, func, render, requiredKeys, optionalKeys = select_retrieval_method(settings=settings)
+    writeNodeData = load_write_node_data(settings=settings, config=config, ctx=ctx)
+
+    # The rendered node data is kept in memory and passed directly to the port injection and launch steps, rather than
+    # being written to the output file and parsed again by each step; the output file(s) are written in the background
+    # while the sessions are launched, and are waited for when the sessions have been launched (or launching exits early)
+    rendered = render(**load_settings(task=task, settings=settings, config=config, ctx=ctx, func=func,
+                                      requiredKeys=requiredKeys, optionalKeys=optionalKeys))
+    with hold_output(), BackgroundWriter() as writer:
+        nodes = prepare_node_data(rendered=rendered, settings=settings, config=config, ctx=ctx, writeNodeData=writeNodeData, submit=writer.submit)
+
+        # Launch sessions to connect to lab devices in Containerlab, based on the provided launch method
+        func, requiredKeys, optionalKeys = select_launch_method(settings=settings)
+        if selector is not None:
+            settings = settings | {optionalKeys["selector"]: selector}
+        run_command(task=f"validating {func.__dict__["name"].replace('_', ' ')} settings", settings=settings, config=config,
+                    ctx=ctx, func=func, requiredKeys=requiredKeys, optionalKeys=optionalKeys,
+                    nodeData=write_common_metadata(host=rendered.host, originalDict=nodes))
+
+def load_basic_settings(config: str) -> dict[str, str | None]:
+    """Helper function to import the variables defined in a config file and validate that the basic, required variables
+    are present; error and exit if any are missing"""
     settings = dotenv_values(config)
     validate_required_keys(task="validating basic settings",
                            requiredKeys={"retrieval_method": "BASIC_RETRIEVAL_METHOD",
                                          "launch_method": "BASIC_LAUNCH_METHOD"},
                            settings=settings,
                            config=config)
+    return settings
 
-    # Retrieve nodes based on retrieval method
+def run_profiles(ctx: click.Context, configs: list[str], selector: NodeSelector | None, parallel: int) -> None:
+    """Helper function to run the quick command for several profiles, retrieving (and injecting custom ports into) the nodes
+    once per distinct set of settings and launching each profile's sessions in the background; exits with an error if any failed"""
+    profiles = [(config, load_basic_settings(config=config)) for config in configs]
+    serialLock = Lock()
+    retrievals: dict[tuple, RenderedNodes | None] = {}
+    prepared: dict[tuple, dict[str, list[Node]] | None] = {}
+    statuses = []
+
+    def launch_profile(status: ProfileStatus, launchFunc: click.Command, launchSettings: dict[str, Any], nodeData: dict[str, Any]) -> None:
+        startTime = time.perf_counter()
+        with serialLock if status.launchMethod in SERIAL_LAUNCH_METHODS else nullcontext():
+            status.output, error = capture_output(ctx.invoke, launchFunc, **launchSettings, nodeData=nodeData)
+        status.seconds += time.perf_counter() - startTime
+        status.status = "ok" if error is None or (isinstance(error, SystemExit) and not error.code) else "failed while launching"
+        if error is not None and not isinstance(error, SystemExit):
+            status.output += f"Error while launching sessions: {error}\n"
+
+    # The messages printed by each profile's launch step (which run in parallel) are held back and printed once all of
+    # the profiles have finished, so that the messages of different profiles aren't interleaved
+    with hold_output(), BackgroundWriter() as writer:
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            for number, (config, settings) in enumerate(profiles, start=1):
+                print(f"Running profile {config} ({number} of {len(profiles)})...")
+                status = ProfileStatus(config=config, launchMethod=settings["BASIC_LAUNCH_METHOD"].lower())
+                statuses.append(status)
+                startTime = time.perf_counter()
+                stage = "validating settings"
+                try:
+                    task, func, render, requiredKeys, optionalKeys = select_retrieval_method(settings=settings)
+                    writeNodeData = load_write_node_data(settings=settings, config=config, ctx=ctx)
+                    retrievalSettings = load_settings(task=task, settings=settings, config=config, ctx=ctx, func=func,
+                                                      requiredKeys=requiredKeys, optionalKeys=optionalKeys)
+                    launchFunc, launchRequiredKeys, launchOptionalKeys = select_launch_method(settings=settings)
+                    if selector is not None:
+                        settings = settings | {launchOptionalKeys["selector"]: selector}
+                    launchSettings = load_settings(task=launchFunc.name, settings=settings, config=config, ctx=ctx, func=launchFunc,
+                                                   requiredKeys=launchRequiredKeys, optionalKeys=launchOptionalKeys)
+
+                    # Steps are identified by the settings they depend on, so that profiles with the same settings share them
+                    retrievalKey = (render.__name__, tuple(sorted((key, repr(value)) for key, value in retrievalSettings.items())))
+                    portKey = (retrievalKey, writeNodeData, tuple(settings.get(key) for key in PORT_KEYS))
+                    status.retrieval = task if retrievalKey not in retrievals else f"{task} (shared)"
+                    stage = "retrieving nodes"
+                    if retrievalKey not in retrievals:
+                        retrievals[retrievalKey] = None # recorded up front, so that a retrieval that fails isn't repeated
+                        retrievals[retrievalKey] = render(**retrievalSettings)
+                    else:
+                        print(f"Reusing the running nodes already retrieved for a previous profile with the same {task} settings")
+                    rendered = retrievals[retrievalKey]
+                    if rendered is None:
+                        raise SystemExit(-1)
+
+                    stage = "injecting custom ports"
+                    if portKey not in prepared:
+                        prepared[portKey] = None
+                        prepared[portKey] = prepare_node_data(rendered=rendered, settings=settings, config=config, ctx=ctx,
+                                                              writeNodeData=writeNodeData, submit=writer.submit)
+                    nodes = prepared[portKey]
+                    if nodes is None:
+                        raise SystemExit(-1)
+                except SystemExit:
+                    status.status = f"failed while {stage}"
+                    status.seconds = time.perf_counter() - startTime
+                    continue
+
+                status.seconds = time.perf_counter() - startTime
+                status.status = "launching"
+                executor.submit(launch_profile, status=status, launchFunc=launchFunc, launchSettings=launchSettings,
+                                nodeData=write_common_metadata(host=rendered.host, originalDict=nodes))
+
+        for status in statuses:
+            if status.output:
+                print(f"\nOutput of profile {status.config} ({status.launchMethod}):")
+                print(status.output, end="")
+        print_profile_report(statuses=statuses)
+        if any(status.status != "ok" for status in statuses):
+            exit(-1)
+
+def select_retrieval_method(settings: dict[str, str | None]) -> tuple[str, click.Command, Callable[..., RenderedNodes], dict[str, str], dict[str, str]]:
+    """Helper function to return the task name, node-data command, render function, and required and optional settings
+    keys for the retrieval method in the settings; error and exit if the retrieval method isn't valid"""
     match settings["BASIC_RETRIEVAL_METHOD"].lower():
         case "api":
             requiredKeys = {"username": "RETRIEVE_API_USERNAME",
@@ -30,63 +158,195 @@ def quick(ctx: click.Context, config: str) -> None:
             optionalKeys = {"password": "RETRIEVE_API_PASSWORD",
                             "clabHost": "RETRIEVE_API_HOST",
                             "labs": "RETRIEVE_API_LABS",
-                            "envfile": "RETRIEVE_API_ENVFILE"}
+                            "envfile": "RETRIEVE_API_ENVFILE",
+                            "concurrency": "RETRIEVE_API_CONCURRENCY",
+                            "tokenCache": "RETRIEVE_API_TOKEN_CACHE",
+                            "port": "RETRIEVE_API_PORT",
+                            "https": "RETRIEVE_API_HTTPS",
+                            "caCert": "RETRIEVE_API_CA_CERT",
+                            "retries": "RETRIEVE_API_RETRIES",
+                            "connectTimeout": "RETRIEVE_API_CONNECT_TIMEOUT",
+                            "readTimeout": "RETRIEVE_API_READ_TIMEOUT",
+                            "incremental": "RETRIEVE_API_INCREMENTAL",
+                            "cache": "RETRIEVE_API_CACHE"}
             task = "API"
             func = retrieve_from_api
+            render = render_api_nodes
         case "inspect":
             requiredKeys = {"inputfile": "RETRIEVE_INSPECT_INPUT",
                             "outputfile": "RETRIEVE_INSPECT_OUTPUT"}
-            optionalKeys = {"clabHost": "RETRIEVE_INSPECT_HOST"}
+            optionalKeys = {"clabHost": "RETRIEVE_INSPECT_HOST",
+                            "incremental": "RETRIEVE_INSPECT_INCREMENTAL",
+                            "cache": "RETRIEVE_INSPECT_CACHE"}
             task = "inspect output parser"
             func = parse_inspect_output
+            render = render_inspect_nodes
+        case "local":
+            requiredKeys = {"outputfile": "RETRIEVE_LOCAL_OUTPUT"}
+            optionalKeys = {"source": "RETRIEVE_LOCAL_SOURCE",
+                            "topologies": "RETRIEVE_LOCAL_TOPOLOGY",
+                            "labs": "RETRIEVE_LOCAL_LABS",
+                            "socketPath": "RETRIEVE_LOCAL_SOCKET",
+                            "network": "RETRIEVE_LOCAL_NETWORK",
+                            "clabHost": "RETRIEVE_LOCAL_HOST",
+                            "incremental": "RETRIEVE_LOCAL_INCREMENTAL",
+                            "cache": "RETRIEVE_LOCAL_CACHE"}
+            task = "local lab reader"
+            func = read_local_labs
+            render = render_local_nodes
         case _:
             print(f"Error, the retrieval method provided under the \"BASIC_RETRIEVAL_METHOD\" option ({settings['BASIC_RETRIEVAL_METHOD']}) is not valid")
             exit(-1)
 
-    run_command(task=task, settings=settings, config=config, ctx=ctx, func=func, requiredKeys=requiredKeys, optionalKeys=optionalKeys)
+    return task, func, render, requiredKeys, optionalKeys
+
+def load_write_node_data(settings: dict[str, str | None], config: str, ctx: click.Context) -> bool:
+    """Helper function to read the BASIC_WRITE_NODE_DATA setting (enabled by default); error and exit if it is invalid"""
+    try:
+        return click.BOOL.convert(settings.get("BASIC_WRITE_NODE_DATA") or "true", None, ctx)
+    except click.BadParameter as e:
+        print(f"Error while validating basic settings, invalid value in {config} for BASIC_WRITE_NODE_DATA: {e.format_message()}")
+        exit(-1)
 
-    # Inject custom ports if a port file is provided
+def prepare_node_data(rendered: RenderedNodes, settings: dict[str, str | None], config: str, ctx: click.Context,
+                      writeNodeData: bool, submit: Callable[..., None]) -> dict[str, list[Node]]:
+    """Helper function to inject custom ports into the retrieved nodes if a port file is provided, and to write the rendered
+    node data (unless disabled) using the provided submit function; returns the nodes to launch sessions to"""
+    # Inject custom ports if a port file is provided, into a copy of each node so that the original retrieved data (and
+    # the snapshot of incremental refreshes) are unchanged
+    portedNodes = rendered.nodes
     if "RETRIEVE_PORTS_FILE" in settings:
         requiredKeys = {"portfile": "RETRIEVE_PORTS_FILE"}
-        optionalKeys = {"output": "RETRIEVE_PORTS_OUTPUT"}
-        ctx.invoke(inject_custom_ports, **(parse_settings(settings=settings,
-                                                          searchKeys=(requiredKeys | optionalKeys)) | {"datafile": parse_settings(settings=settings,
-                                                                                                                                  searchKeys=requiredKeys["outputfile"])["outputfile"]}))
+        optionalKeys = {"output": "RETRIEVE_PORTS_OUTPUT",
+                        "cache": "RETRIEVE_PORTS_CACHE"}
+        portSettings = load_settings(task="port injection", settings=settings, config=config, ctx=ctx, func=inject_custom_ports,
+                                     requiredKeys=requiredKeys, optionalKeys=optionalKeys)
+        portedNodes = {lab: [node.copy() for node in nodes] for lab, nodes in rendered.nodes.items()}
+        apply_custom_ports(nodes=portedNodes, portfile=portSettings["portfile"], datafile="the retrieved node data")
+
+        # The file with the custom ports only needs to be rewritten if the running nodes or the port file changed since
+        # it was last written
+        portsOutput = portSettings.get("output", rendered.outputfile)
+        try:
+            portsCurrent = not rendered.changed and os.path.getmtime(portsOutput) >= os.path.getmtime(portSettings["portfile"])
+        except OSError:
+            portsCurrent = False
 
-    # Launch sessions to connect to lab devices in Containerlab, based on the provided launch method
+        if writeNodeData and portsOutput == rendered.outputfile:
+            submit(rendered.write, nodes=portedNodes, cache=portSettings.get("cache", False), force=not portsCurrent)
+        elif writeNodeData:
+            submit(rendered.write)
+            if portsCurrent:
+                print(f"Running nodes are unchanged and custom ports are already injected; leaving {portsOutput} unchanged")
+            else:
+                submit(write_output_to_file, outputfile=portsOutput, cache=portSettings.get("cache", False),
+                       data=write_common_metadata(host=rendered.host, originalDict=dump_nodes(nodes=portedNodes)))
+    elif writeNodeData:
+        submit(rendered.write)
+
+    if not writeNodeData:
+        print("Not writing the rendered node data to a file (BASIC_WRITE_NODE_DATA is disabled)")
+
+    return portedNodes
+
+def select_launch_method(settings: dict[str, str | None]) -> tuple[click.Command, dict[str, str], dict[str, str]]:
+    """Helper function to return the launch command, and required and optional settings keys for the launch method in
+    the settings; error and exit if the launch method isn't valid"""
     match settings["BASIC_LAUNCH_METHOD"].lower():
         case "securecrt":
-            requiredKeys = {"creds": "LAUNCH_SECURECRT_CREDS",
-                            "inputfile": "LAUNCH_SECURECRT_INPUT"}
+            requiredKeys = {"creds": "LAUNCH_SECURECRT_CREDS"}
             optionalKeys = {"method": "LAUNCH_SECURECRT_METHOD",
                             "jumphost": "LAUNCH_SECURECRT_JUMPHOST",
-                            "executable": "LAUNCH_SECURECRT_EXECUTABLE"}
+                            "executable": "LAUNCH_SECURECRT_EXECUTABLE",
+                            "maxInFlight": "LAUNCH_SECURECRT_MAX_IN_FLIGHT",
+                            "rate": "LAUNCH_SECURECRT_RATE",
+                            "probe": "LAUNCH_SECURECRT_PROBE",
+                            "probeTimeout": "LAUNCH_SECURECRT_PROBE_TIMEOUT",
+                            "probeBanner": "LAUNCH_SECURECRT_PROBE_BANNER",
+                            "wait": "LAUNCH_SECURECRT_WAIT",
+                            "batch": "LAUNCH_SECURECRT_BATCH",
+                            "dryRun": "LAUNCH_SECURECRT_DRY_RUN",
+                            "exportFile": "LAUNCH_SECURECRT_EXPORT",
+                            "exportFormat": "LAUNCH_SECURECRT_EXPORT_FORMAT",
+                            "selector": "LAUNCH_SECURECRT_SELECT",
+                            "cache": "LAUNCH_SECURECRT_CACHE"}
             func = SecureCRT
         case "putty":
-            requiredKeys = {"creds": "LAUNCH_PUTTY_CREDS",
-                            "inputfile": "LAUNCH_PUTTY_INPUT"}
+            requiredKeys = {"creds": "LAUNCH_PUTTY_CREDS"}
             optionalKeys = {"method": "LAUNCH_PUTTY_METHOD",
                             "jumphost": "LAUNCH_PUTTY_JUMPHOST",
-                            "executable": "LAUNCH_PUTTY_EXECUTABLE"}
+                            "executable": "LAUNCH_PUTTY_EXECUTABLE",
+                            "maxInFlight": "LAUNCH_PUTTY_MAX_IN_FLIGHT",
+                            "rate": "LAUNCH_PUTTY_RATE",
+                            "probe": "LAUNCH_PUTTY_PROBE",
+                            "probeTimeout": "LAUNCH_PUTTY_PROBE_TIMEOUT",
+                            "probeBanner": "LAUNCH_PUTTY_PROBE_BANNER",
+                            "wait": "LAUNCH_PUTTY_WAIT",
+                            "batch": "LAUNCH_PUTTY_BATCH",
+                            "dryRun": "LAUNCH_PUTTY_DRY_RUN",
+                            "exportFile": "LAUNCH_PUTTY_EXPORT",
+                            "exportFormat": "LAUNCH_PUTTY_EXPORT_FORMAT",
+                            "selector": "LAUNCH_PUTTY_SELECT",
+                            "cache": "LAUNCH_PUTTY_CACHE"}
             func = PuTTY
         case "mtputty":
-            requiredKeys = {"creds": "LAUNCH_MTPUTTY_CREDS",
-                            "inputfile": "LAUNCH_MTPUTTY_INPUT"}
+            requiredKeys = {"creds": "LAUNCH_MTPUTTY_CREDS"}
             optionalKeys = {"method": "LAUNCH_MTPUTTY_METHOD",
                             "jumphost": "LAUNCH_MTPUTTY_JUMPHOST",
-                            "config": "LAUNCH_MTPUTTY_CONFIG"}
+                            "config": "LAUNCH_MTPUTTY_CONFIG",
+                            "backups": "LAUNCH_MTPUTTY_BACKUPS",
+                            "selector": "LAUNCH_MTPUTTY_SELECT",
+                            "cache": "LAUNCH_MTPUTTY_CACHE"}
             func = MTPuTTY
         case "native-openssh":
             requiredKeys = {"creds": "LAUNCH_OPENSSH_CREDS",
-                            "inputfile": "LAUNCH_OPENSSH_INPUT",
                             "terminal": "LAUNCH_OPENSSH_TERMINAL"}
-            optionalKeys = {"method": "LAUNCH_SECURECRT_METHOD",
-                            "jumphost": "LAUNCH_SECURECRT_JUMPHOST",
-                            "executable": "LAUNCH_SECURECRT_EXECUTABLE"}
+            optionalKeys = {"method": "LAUNCH_OPENSSH_METHOD",
+                            "jumphost": "LAUNCH_OPENSSH_JUMPHOST",
+                            "executable": "LAUNCH_OPENSSH_EXECUTABLE",
+                            "maxInFlight": "LAUNCH_OPENSSH_MAX_IN_FLIGHT",
+                            "rate": "LAUNCH_OPENSSH_RATE",
+                            "probe": "LAUNCH_OPENSSH_PROBE",
+                            "probeTimeout": "LAUNCH_OPENSSH_PROBE_TIMEOUT",
+                            "probeBanner": "LAUNCH_OPENSSH_PROBE_BANNER",
+                            "wait": "LAUNCH_OPENSSH_WAIT",
+                            "batch": "LAUNCH_OPENSSH_BATCH",
+                            "dryRun": "LAUNCH_OPENSSH_DRY_RUN",
+                            "exportFile": "LAUNCH_OPENSSH_EXPORT",
+                            "exportFormat": "LAUNCH_OPENSSH_EXPORT_FORMAT",
+                            "sshconfig": "LAUNCH_OPENSSH_SSHCONFIG",
+                            "selector": "LAUNCH_OPENSSH_SELECT",
+                            "cache": "LAUNCH_OPENSSH_CACHE"}
             func = native_OpenSSH
+        case "openssh-config":
+            requiredKeys = {"creds": "LAUNCH_SSHCONFIG_CREDS"}
+            optionalKeys = {"method": "LAUNCH_SSHCONFIG_METHOD",
+                            "jumphost": "LAUNCH_SSHCONFIG_JUMPHOST",
+                            "outputfile": "LAUNCH_SSHCONFIG_OUTPUT",
+                            "controlPath": "LAUNCH_SSHCONFIG_CONTROL_PATH",
+                            "controlPersist": "LAUNCH_SSHCONFIG_CONTROL_PERSIST",
+                            "includeUserConfig": "LAUNCH_SSHCONFIG_INCLUDE_USER_CONFIG",
+                            "selector": "LAUNCH_SSHCONFIG_SELECT",
+                            "cache": "LAUNCH_SSHCONFIG_CACHE"}
+            func = OpenSSH_config
+        case "tmux":
+            requiredKeys = {"creds": "LAUNCH_TMUX_CREDS"}
+            optionalKeys = {"method": "LAUNCH_TMUX_METHOD",
+                            "jumphost": "LAUNCH_TMUX_JUMPHOST",
+                            "executable": "LAUNCH_TMUX_EXECUTABLE",
+                            "ssh": "LAUNCH_TMUX_SSH",
+                            "name": "LAUNCH_TMUX_SESSION_NAME",
+                            "sshconfig": "LAUNCH_TMUX_SSHCONFIG",
+                            "attach": "LAUNCH_TMUX_ATTACH",
+                            "probe": "LAUNCH_TMUX_PROBE",
+                            "probeTimeout": "LAUNCH_TMUX_PROBE_TIMEOUT",
+                            "probeBanner": "LAUNCH_TMUX_PROBE_BANNER",
+                            "dryRun": "LAUNCH_TMUX_DRY_RUN",
+                            "selector": "LAUNCH_TMUX_SELECT",
+                            "cache": "LAUNCH_TMUX_CACHE"}
+            func = tmux
         case _:
             print(f"Error, the launch method provided under the \"BASIC_LAUNCH_METHOD\" option ({settings['BASIC_LAUNCH_METHOD']}) is not valid")
             exit(-1)
 
-    run_command(task=f"validating {func.__dict__["name"].replace('_', ' ')} settings", settings=settings, config=config,
-                ctx=ctx, func=func, requiredKeys=requiredKeys, optionalKeys=optionalKeys)
\ No newline at end of file
+    return func, requiredKeys, optionalKeys
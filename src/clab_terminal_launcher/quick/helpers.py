@@ -1,4 +1,15 @@
 import click
+import io
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import redirect_stdout
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, TextIO
+
+from ..misc.instrumentation import phase
+
+HELD_OUTPUT: ContextVar[io.StringIO | None] = ContextVar("heldOutput", default=None) # where the messages printed by the function run by capture_output() are held back
 
 def validate_required_keys(task: str, settings: dict[str, str | None], requiredKeys: dict[str, str], config: str) -> None:
     """Helper function to validate that all required keys are in a settings dictionary; error and exit if any key(s) is/are missing"""
@@ -24,13 +35,110 @@ def parse_settings(settings: dict[str, str | None], searchKeys: dict[str, str])
     print(f"Found values for: {', '.join(parsedSettings)}")
     return parsedSettings
 
-def run_command(task: str, settings: dict[str, str | None], requiredKeys: dict[str, str], optionalKeys: dict[str, str],
-         config: str, ctx: click.Context, func: click.Command) -> None:
-    """Helper/runner function to, for a given task, validate that all required keys are present,
-    parse all relevant/available settings, and run the relevant Click command given the Click context object"""
+def cast_settings(task: str, parsedSettings: dict[str, str], config: str, ctx: click.Context, func: click.Command) -> dict[str, Any]:
+    """Helper function to convert the values of parsed settings (which are always strings) to the types expected by
+    the options of the provided Click command (e.g., "true"/"false" for flags), exiting if any value is invalid"""
+    params = {param.name: param for param in func.params}
+    try:
+        return {key: (params[key].type_cast_value(ctx, value) if key in params else value)
+                for key, value in parsedSettings.items()}
+    except click.BadParameter as e:
+        print(f"Error while validating {task} settings, invalid value in {config}: {e.format_message()}")
+        exit(-1)
+
+def load_settings(task: str, settings: dict[str, str | None], requiredKeys: dict[str, str], optionalKeys: dict[str, str],
+                  config: str, ctx: click.Context, func: click.Command) -> dict[str, Any]:
+    """Helper function to, for a given task, validate that all required keys are present, parse all relevant/available
+    settings and convert them to the types expected by the options of the provided Click command"""
     validate_required_keys(task=f"validating {task} settings",
                            requiredKeys=requiredKeys,
                            settings=settings,
                            config=config)
 
-    ctx.invoke(func, **parse_settings(settings=settings, searchKeys=(requiredKeys | optionalKeys)))
\ No newline at end of file
+    return cast_settings(task=task, config=config, ctx=ctx, func=func,
+                         parsedSettings=parse_settings(settings=settings, searchKeys=(requiredKeys | optionalKeys)))
+
+def run_command(task: str, settings: dict[str, str | None], requiredKeys: dict[str, str], optionalKeys: dict[str, str],
+         config: str, ctx: click.Context, func: click.Command, **kwargs) -> Any:
+    """Helper/runner function to, for a given task, load the settings for the relevant Click command (see load_settings)
+    and run it given the Click context object, returning its return value; any keyword arguments are passed as is"""
+    return ctx.invoke(func, **load_settings(task=task, settings=settings, requiredKeys=requiredKeys, optionalKeys=optionalKeys,
+                                            config=config, ctx=ctx, func=func), **kwargs)
+
+class HeldOutputStream:
+    """Stand-in for stdout (installed by hold_output) that holds back the messages printed in the context of capture_output(),
+    writing all other messages to the original stdout"""
+    def __init__(self, stdout: TextIO) -> None:
+        self.stdout = stdout
+
+    def write(self, text: str) -> int:
+        output = HELD_OUTPUT.get()
+        return (output if output is not None else self.stdout).write(text)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stdout, name)
+
+def hold_output() -> redirect_stdout:
+    """Helper function to return a context manager that, for the duration of its with block, holds back the messages
+    printed by the functions run by capture_output(), even when they are run in parallel"""
+    return redirect_stdout(HeldOutputStream(stdout=sys.stdout))
+
+def capture_output(func: Callable, *args, **kwargs) -> tuple[str, BaseException | None]:
+    """Helper function to run the provided function, returning the messages that it printed (while output is held back,
+    see hold_output) and the exception that it raised, if any (including SystemExit, as the commands exit on errors)"""
+    output = io.StringIO()
+    token = HELD_OUTPUT.set(output)
+    try:
+        func(*args, **kwargs)
+        return output.getvalue(), None
+    except BaseException as e:
+        return output.getvalue(), e
+    finally:
+        HELD_OUTPUT.reset(token)
+
+class BackgroundWriter:
+    """Writes the rendered output files in a background thread, one at a time, while the quick command carries on; messages
+    printed by the writes are held back until the end of the with block"""
+    def __init__(self) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.writes: list[Future] = []
+
+    def submit(self, func: Callable, **kwargs) -> None:
+        self.writes.append(self.executor.submit(capture_output, func, **kwargs))
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, *excInfo) -> None:
+        """Wait for all of the writes to finish and print their messages; exits if any of the writes failed"""
+        with phase(name="wait for node data to be written"):
+            self.executor.shutdown(wait=True)
+        results = [write.result() for write in self.writes]
+        for output, _ in results:
+            print(output, end="")
+        for _, error in results:
+            if error is not None:
+                raise error
+
+@dataclass(slots=True)
+class ProfileStatus:
+    """The outcome of one profile (i.e., config file) of a multi-profile quick run, for the combined status report"""
+    config: str
+    launchMethod: str
+    retrieval: str = "N/A"
+    status: str = "not run"
+    seconds: float = 0.0
+    output: str = ""
+
+def print_profile_report(statuses: list[ProfileStatus]) -> None:
+    """Helper function to print the combined status report of a multi-profile quick run, with a line per profile"""
+    columns = [("Profile", [status.config for status in statuses]),
+               ("Retrieval", [status.retrieval for status in statuses]),
+               ("Launch method", [status.launchMethod for status in statuses]),
+               ("Status", [status.status for status in statuses]),
+               ("Time", [f"{status.seconds:.2f} s" for status in statuses])]
+    widths = [max(len(title), *map(len, values)) for title, values in columns]
+    print("\nProfile summary:")
+    print("  " + "  ".join(title.ljust(width) for (title, _), width in zip(columns, widths)).rstrip())
+    for row in zip(*(values for _, values in columns)):
+        print("  " + "  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip())
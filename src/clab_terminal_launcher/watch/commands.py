@@ -0,0 +1,115 @@
+import click
+import os
+import time
+from dotenv import dotenv_values
+
+from .helpers import run_quietly, LaunchedNodes, PollInterval
+from ..misc.instrumentation import count, phase
+from ..node_data.commands import render_api_nodes
+from ..node_data.helpers import write_common_metadata, APIError
+from ..quick.commands import load_write_node_data, prepare_node_data, select_launch_method, select_retrieval_method
+from ..quick.helpers import load_settings, validate_required_keys
+
+CONFIG_LAUNCH_METHODS = ["mtputty", "openssh-config"] # launch methods that write a configuration for all running nodes, rather than launching sessions
+
+@click.command()
+@click.option("--config", "-c", default="config.env",
+              help="Specify the path to the config file in plain text environment variable/Bash format, the same as for the quick command (see docs for more details); default: config.env in the local directory")
+@click.option("--interval", "-n", type=click.FloatRange(min=0, min_open=True), default=2.0,
+              help="Specify the number of seconds between polls for running nodes right after a change is found; while nothing changes, the interval grows gradually up to the maximum interval; default: 2")
+@click.option("--max-interval", "maxInterval", type=click.FloatRange(min=0, min_open=True), default=30.0,
+              help="Specify the maximum number of seconds between polls for running nodes while nothing changes; default: 30")
+@click.option("--launch-existing", "launchExisting", is_flag=True, default=False,
+              help="Also launch sessions to the nodes that are already running when the watch starts; by default, sessions are only launched to nodes that start running after that (e.g., because sessions to the running nodes were already launched using the quick command)")
+@click.pass_context
+def watch(ctx: click.Context, config: str, interval: float, maxInterval: float, launchExisting: bool) -> None:
+    """Keep watching for running nodes and automatically launch sessions to nodes
+    as they start running, based on a configuration file"""
+
+    # Import defined variables and validate that basic, required variables are present
+    settings = dotenv_values(config)
+    validate_required_keys(task="validating basic settings",
+                           requiredKeys={"retrieval_method": "BASIC_RETRIEVAL_METHOD",
+                                         "launch_method": "BASIC_LAUNCH_METHOD"},
+                           settings=settings,
+                           config=config)
+
+    # All of the settings are loaded up front, so that any invalid settings are reported straight away rather than once
+    # the first node starts running. Running nodes are always compared with the previous poll (i.e., incrementally),
+    # and the API session for each host is kept open between polls, so that a poll that finds no changes normally
+    # costs a single conditional request per lab over an existing connection
+    task, func, render, requiredKeys, optionalKeys = select_retrieval_method(settings=settings)
+    writeNodeData = load_write_node_data(settings=settings, config=config, ctx=ctx)
+    retrievalSettings = load_settings(task=task, settings=settings, config=config, ctx=ctx, func=func,
+                                      requiredKeys=requiredKeys, optionalKeys=optionalKeys) | {"incremental": True, "exitOnError": False}
+    sessions = {}
+    if render is render_api_nodes:
+        retrievalSettings["sessions"] = sessions
+
+    launchMethod = settings["BASIC_LAUNCH_METHOD"].lower()
+    launchFunc, requiredKeys, optionalKeys = select_launch_method(settings=settings)
+    launchSettings = load_settings(task=launchFunc.name, settings=settings, config=config, ctx=ctx, func=launchFunc,
+                                   requiredKeys=requiredKeys, optionalKeys=optionalKeys)
+
+    launched = LaunchedNodes()
+    pollInterval = PollInterval(minimum=interval, maximum=maxInterval)
+    rendered = None
+    nodes = {}
+    host = None
+    inputState = None
+    print(f"Watching for running nodes every {interval:g} to {max(interval, maxInterval):g} seconds; press Ctrl+C to stop...")
+    try:
+        while True:
+            retrieved = None
+            try:
+                # clab inspect output is only parsed again once the input file has changed (e.g., when the output of
+                # clab inspect is saved to it periodically)
+                newState = None
+                if "inputfile" in retrievalSettings:
+                    stat = os.stat(retrievalSettings["inputfile"])
+                    newState = (stat.st_mtime_ns, stat.st_size)
+                if newState is None or newState != inputState:
+                    # The messages from polls that find no changes are dropped, so that an idle watch stays quiet
+                    with phase(name="poll for running nodes"):
+                        retrieved, messages = run_quietly(render, previous=rendered, **retrievalSettings)
+                    inputState = newState
+            except (APIError, OSError, ValueError) as e:
+                print(f"Error while retrieving running nodes: {e}")
+
+            # Nodes are checked for having started running after every poll, as a redeployed node (i.e., running in a
+            # new container) may look exactly the same as before in the rendered node data
+            started = launched.update(nodes=retrieved.nodes) if retrieved is not None else set()
+            changed = retrieved is not None and (rendered is None or retrieved.changed or bool(started))
+            if changed:
+                count(name="polls that found changes")
+                print(messages, end="")
+                nodes = prepare_node_data(rendered=retrieved, settings=settings, config=config, ctx=ctx,
+                                          writeNodeData=writeNodeData, submit=lambda func, **kwargs: func(**kwargs))
+                host = retrieved.host
+
+            if changed and rendered is None and not launchExisting:
+                print(f"Found {len(started)} running nodes; sessions will be launched to nodes that start running from now on")
+            elif changed and launchMethod in CONFIG_LAUNCH_METHODS:
+                ctx.invoke(launchFunc, **launchSettings, nodeData=write_common_metadata(host=host, originalDict=nodes))
+            elif started or launched.pending:
+                # Nodes that sessions couldn't be launched to after an earlier poll (e.g., running, but not accepting
+                # SSH connections yet) are tried again along with the nodes that just started running, and are only
+                # recorded as launched once sessions to them are launched
+                retrying = launched.pending - started
+                launching = started | launched.pending
+                launchNodes = {lab: [node for node in labNodes if (lab, node.name) in launching] for lab, labNodes in nodes.items()}
+                if started:
+                    print(f"Nodes that started running: {', '.join(node.name for lab, labNodes in launchNodes.items() for node in labNodes if (lab, node.name) in started)}")
+                if retrying:
+                    print(f"Retrying nodes that sessions couldn't be launched to: {', '.join(node.name for lab, labNodes in launchNodes.items() for node in labNodes if (lab, node.name) in retrying)}")
+                skipped = ctx.invoke(launchFunc, **launchSettings, nodeData=write_common_metadata(host=host, originalDict=launchNodes))
+                launched.record_launch(nodes=launchNodes, skipped=skipped or set())
+
+            if retrieved is not None:
+                rendered = retrieved
+            time.sleep(pollInterval.next(changed=changed))
+    except KeyboardInterrupt:
+        print("Stopped watching for running nodes")
+    finally:
+        for api in sessions.values():
+            api.close()
@@ -0,0 +1,57 @@
+import io
+from contextlib import redirect_stdout
+from typing import Any, Callable
+
+from ..misc.models import Node
+
+class PollInterval:
+    """Interval between the polls of the watch command, which grows after every poll that finds no changes (up to the
+    maximum interval) and drops back to the minimum as soon as something changes"""
+    GROWTH = 1.5
+
+    def __init__(self, minimum: float, maximum: float) -> None:
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.current = minimum
+
+    def next(self, changed: bool) -> float:
+        """Returns the number of seconds to wait before the next poll, given whether the last poll found changes"""
+        self.current = self.minimum if changed else min(self.current * self.GROWTH, self.maximum)
+        return self.current
+
+class LaunchedNodes:
+    """Running nodes (by name and container, grouped by lab) that sessions were launched to, so that sessions are only launched
+    to nodes that started running (or were redeployed) since the last poll; nodes that failed to launch are kept pending"""
+    def __init__(self) -> None:
+        self.labs: dict[str, dict[str, str | None]] = {}
+        self.pending: set[tuple[str, str]] = set()
+
+    def update(self, nodes: dict[str, list[Node]]) -> set[tuple[str, str]]:
+        """Record the running nodes from a poll, grouped by lab; returns the (lab, name) of the nodes that started running"""
+        started = set()
+        for lab, labNodes in nodes.items():
+            known = self.labs.get(lab, {})
+            running = {}
+            for node in labNodes:
+                running[node.name] = node.container
+                if node.name not in known or (node.container is not None and known[node.name] != node.container):
+                    started.add((lab, node.name))
+            self.labs[lab] = running
+            self.pending = {(pendingLab, name) for pendingLab, name in self.pending if pendingLab != lab or name in running}
+        return started
+
+    def record_launch(self, nodes: dict[str, list[Node]], skipped: set[str]) -> None:
+        """Record the nodes (grouped by lab) that sessions were just launched to, keeping the ones that sessions couldn't
+        be launched to (by name) pending, so that launching sessions to them is tried again after the next poll"""
+        self.pending = {(lab, node.name) for lab, labNodes in nodes.items() for node in labNodes if node.name in skipped}
+
+def run_quietly(func: Callable, **kwargs) -> tuple[Any, str]:
+    """Helper function to run the provided function with the messages that it prints held back, returning its result
+    along with the messages; if the function raises an exception (or exits), the messages are printed straight away"""
+    output = io.StringIO()
+    try:
+        with redirect_stdout(output):
+            return func(**kwargs), output.getvalue()
+    except BaseException:
+        print(output.getvalue(), end="")
+        raise
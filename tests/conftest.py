@@ -0,0 +1,76 @@
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+def make_token(subject: str, expires: float) -> str:
+    """Returns an unsigned JWT with the provided subject and expiry time, as issued by the fake Containerlab API"""
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'none'})}.{encode({'sub': subject, 'exp': expires})}.signature"
+
+class FakeAPI:
+    """State of the fake Containerlab API: the tokens it accepts, the labs it serves and the requests it received"""
+    def __init__(self) -> None:
+        self.tokens: set[str] = set()
+        self.labs: dict[str, dict] = {}
+        self.etags: dict[str, str] = {}
+        self.acceptTokens = True
+        self.logins = 0
+        self.requests: list[tuple[str, str, dict[str, str]]] = []
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+    def reply(self, status: int, body: dict | None = None, headers: dict[str, str] | None = None) -> None:
+        content = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_POST(self) -> None:
+        api = self.server.api
+        api.requests.append(("POST", self.path, dict(self.headers)))
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path != "/login":
+            return self.reply(404, {"error": "not found"})
+        api.logins += 1
+        token = make_token(subject=f"login-{api.logins}", expires=time.time() + 3600)
+        api.tokens.add(token)
+        self.reply(200, {"token": token})
+
+    def do_GET(self) -> None:
+        api = self.server.api
+        api.requests.append(("GET", self.path, dict(self.headers)))
+        if not api.acceptTokens or self.headers.get("Authorization", "").removeprefix("Bearer ") not in api.tokens:
+            return self.reply(401, {"error": "invalid token"})
+        lab = self.path.removeprefix("/api/v1/labs/")
+        if self.path == "/api/v1/labs":
+            return self.reply(200, api.labs)
+        if lab not in api.labs:
+            return self.reply(404, {"error": f"lab {lab} not found"})
+        etag = api.etags.get(lab)
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            return self.reply(304)
+        self.reply(200, api.labs[lab], headers={"ETag": etag} if etag is not None else None)
+
+@pytest.fixture
+def fake_api():
+    """Runs a fake Containerlab API on a local port; yields its state and base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeAPIHandler)
+    server.api = FakeAPI()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server.api, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
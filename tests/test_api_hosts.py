@@ -0,0 +1,40 @@
+import pytest
+
+from clab_terminal_launcher.node_data.commands import render_api_nodes
+from clab_terminal_launcher.node_data.helpers import APIError
+
+def container(name: str, state: str = "running") -> dict:
+    return {"name": name, "image": "ceos:4.33", "kind": "ceos", "state": state, "ipv4_address": "172.20.20.2/24",
+            "ipv6_address": "", "container_id": f"id-{name}", "owner": "admin"}
+
+def render(clabHost: str, port: int, tmp_path, **kwargs):
+    return render_api_nodes(outputfile=str(tmp_path / "nodes.json"), username="admin", password="secret", clabHost=clabHost,
+                            tokenCache=False, port=port, retries=0, connectTimeout=1.0, **kwargs)
+
+def test_nodes_are_retrieved_from_every_host(fake_api, tmp_path, capsys):
+    api, baseURL = fake_api
+    api.labs["lab1"] = [container("n1"), container("n2", state="exited")]
+    port = int(baseURL.rsplit(":", 1)[1])
+
+    # 127.0.0.2 is a loopback address that nothing listens on, so that host fails
+    rendered = render(clabHost="127.0.0.1, 127.0.0.2, localhost, 127.0.0.1", port=port, tmp_path=tmp_path)
+
+    assert list(rendered.nodes) == ["lab1", "lab1@localhost"]
+    assert [(node.name, node.clabHost, node.container) for node in rendered.nodes["lab1"]] == [("n1", "127.0.0.1", "id-n1")]
+    assert rendered.nodes["lab1@localhost"][0].extra == {"container_id": "id-n1", "owner": "admin"}
+    assert "failed hosts: 127.0.0.2" in capsys.readouterr().out
+    assert api.logins == 2 # duplicate hosts are only used once
+
+@pytest.mark.parametrize("clabHost", ["", ",", " , "])
+def test_empty_host_list(clabHost, tmp_path, capsys):
+    with pytest.raises(SystemExit) as e:
+        render(clabHost=clabHost, port=8080, tmp_path=tmp_path)
+    assert e.value.code == -1
+    assert "no Containerlab hosts were provided" in capsys.readouterr().out
+
+    with pytest.raises(APIError):
+        render(clabHost=clabHost, port=8080, tmp_path=tmp_path, exitOnError=False)
+
+def test_every_host_failing(tmp_path):
+    with pytest.raises(APIError, match="any of the provided Containerlab hosts"):
+        render(clabHost="127.0.0.2,127.0.0.3", port=9, tmp_path=tmp_path, exitOnError=False)
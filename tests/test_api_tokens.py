@@ -0,0 +1,79 @@
+import os
+import time
+
+from clab_terminal_launcher.node_data.helpers import (authenticate, conditional_get, ContainerlabAPI, get_token_expiry,
+                                                      load_cached_token, read_token_cache, store_cached_token)
+from conftest import make_token
+
+def no_password() -> str:
+    raise AssertionError("the password was requested although no login was needed")
+
+def test_token_expiry_is_read_from_the_payload():
+    assert get_token_expiry(token=make_token(subject="admin", expires=1234.0)) == 1234.0
+    assert get_token_expiry(token="not-a-jwt") is None
+
+def test_cached_token_round_trip(tmp_path):
+    tokenCacheFile = str(tmp_path / "cache" / "tokens.json")
+    token = make_token(subject="admin", expires=time.time() + 3600)
+    store_cached_token(tokenCacheFile=tokenCacheFile, cacheKey="admin@http://host:8080", token=token)
+
+    assert load_cached_token(tokenCacheFile=tokenCacheFile, cacheKey="admin@http://host:8080") == token
+    assert load_cached_token(tokenCacheFile=tokenCacheFile, cacheKey="other@http://host:8080") is None
+    assert os.stat(tokenCacheFile).st_mode & 0o777 == 0o600
+
+def test_expired_tokens_are_neither_loaded_nor_kept(tmp_path):
+    tokenCacheFile = str(tmp_path / "tokens.json")
+    store_cached_token(tokenCacheFile=tokenCacheFile, cacheKey="old", token=make_token(subject="old", expires=time.time() - 1))
+    assert load_cached_token(tokenCacheFile=tokenCacheFile, cacheKey="old") is None
+
+    # Tokens that are about to expire aren't used either
+    store_cached_token(tokenCacheFile=tokenCacheFile, cacheKey="soon", token=make_token(subject="soon", expires=time.time() + 5))
+    assert load_cached_token(tokenCacheFile=tokenCacheFile, cacheKey="soon") is None
+    assert set(read_token_cache(tokenCacheFile=tokenCacheFile)) == {"soon"}
+
+def test_valid_cached_token_skips_login(fake_api, tmp_path):
+    api, baseURL = fake_api
+    api.labs["lab1"] = {"n1": {}}
+    token = make_token(subject="cached", expires=time.time() + 3600)
+    api.tokens.add(token)
+    tokenCacheFile = str(tmp_path / "tokens.json")
+    store_cached_token(tokenCacheFile=tokenCacheFile, cacheKey=f"admin@{baseURL}", token=token)
+
+    session = ContainerlabAPI(baseURL=baseURL)
+    authenticate(api=session, host="host", username="admin", password=no_password, tokenCacheFile=tokenCacheFile)
+
+    assert conditional_get(api=session, url="/api/v1/labs/lab1", error="Error", host="host") == {"n1": {}}
+    assert api.logins == 0
+
+def test_rejected_cached_token_logs_in_again_once(fake_api, tmp_path):
+    api, baseURL = fake_api
+    api.labs["lab1"] = {"n1": {}}
+    tokenCacheFile = str(tmp_path / "tokens.json")
+    revoked = make_token(subject="revoked", expires=time.time() + 3600)
+    store_cached_token(tokenCacheFile=tokenCacheFile, cacheKey=f"admin@{baseURL}", token=revoked)
+    passwords = []
+
+    session = ContainerlabAPI(baseURL=baseURL)
+    authenticate(api=session, host="host", username="admin", password=lambda: passwords.append(1) or "secret",
+                 tokenCacheFile=tokenCacheFile)
+    assert api.logins == 0 and passwords == []
+
+    assert conditional_get(api=session, url="/api/v1/labs/lab1", error="Error", host="host") == {"n1": {}}
+    assert api.logins == 1 and passwords == [1]
+    assert [request[:2] for request in api.requests] == [("GET", "/api/v1/labs/lab1"), ("POST", "/login"),
+                                                        ("GET", "/api/v1/labs/lab1")]
+
+    # The new token replaces the rejected one in the cache, so the next run doesn't log in
+    newToken = load_cached_token(tokenCacheFile=tokenCacheFile, cacheKey=f"admin@{baseURL}")
+    assert newToken != revoked and newToken in api.tokens
+
+def test_token_rejected_after_login_is_not_retried_forever(fake_api):
+    api, baseURL = fake_api
+    api.labs["lab1"] = {"n1": {}}
+    session = ContainerlabAPI(baseURL=baseURL)
+    authenticate(api=session, host="host", username="admin", password=lambda: "secret")
+    api.acceptTokens = False # every token is rejected from now on
+
+    response = session.get(url="/api/v1/labs/lab1", exitOnError=False)
+    assert response.status_code == 401
+    assert api.logins == 2 # the initial login and a single re-authentication
@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from clab_terminal_launcher.launch.helpers import rotate_backups
+from clab_terminal_launcher.misc.helpers import write_file_atomically
+
+def test_backups_are_rotated_and_bounded(tmp_path):
+    filename = tmp_path / "sessions.xml"
+    backupName = str(tmp_path / "sessions.xml.{}.bak")
+    for version in range(1, 5):
+        filename.write_text(f"v{version}")
+        assert rotate_backups(filename=str(filename), backupName=backupName, count=3) == backupName.format(1)
+
+    assert [open(backupName.format(index)).read() for index in range(1, 4)] == ["v4", "v3", "v2"]
+    assert not os.path.exists(backupName.format(4))
+
+def test_no_backup_is_made_with_a_count_of_zero(tmp_path):
+    (tmp_path / "sessions.xml").write_text("v1")
+    assert rotate_backups(filename=str(tmp_path / "sessions.xml"), backupName=str(tmp_path / "{}.bak"), count=0) is None
+    assert os.listdir(tmp_path) == ["sessions.xml"]
+
+def test_existing_backups_are_kept_if_the_file_is_missing(tmp_path):
+    backupName = str(tmp_path / "{}.bak")
+    (tmp_path / "1.bak").write_text("old")
+    with pytest.raises(FileNotFoundError):
+        rotate_backups(filename=str(tmp_path / "missing.xml"), backupName=backupName, count=3)
+    assert sorted(os.listdir(tmp_path)) == ["1.bak"]
+
+def test_atomic_write_keeps_the_permissions(tmp_path):
+    filename = tmp_path / "sessions.xml"
+    filename.write_text("old")
+    filename.chmod(0o600)
+    write_file_atomically(filename=str(filename), content=b"new")
+
+    assert filename.read_bytes() == b"new"
+    assert filename.stat().st_mode & 0o777 == 0o600
+    assert os.listdir(tmp_path) == ["sessions.xml"] # no temporary files are left behind
+
+    write_file_atomically(filename=str(tmp_path / "new.xml"), content=b"new", mode=0o640)
+    assert (tmp_path / "new.xml").stat().st_mode & 0o777 == 0o640
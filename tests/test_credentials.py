@@ -0,0 +1,84 @@
+import pytest
+
+from clab_terminal_launcher.launch.credentials import SecretReference
+from clab_terminal_launcher.launch.helpers import CredentialResolver
+
+CREDS = {
+    "default": {"username": "admin", "password": "default"},
+    "kind=ceos": {"username": "admin", "password": "ceos"},
+    "image=ceos:4.33": {"username": "admin", "password": "ceos-4.33"},
+    "node=spine*": {"username": "spine", "password": "glob"},
+    "node~^leaf[0-9]+$": {"username": "leaf", "password": "regex"},
+    "node=spine1": {"username": "spine1", "password": "exact"},
+    "lab=core": {
+        "kind=ceos": {"username": "core", "password": "core-ceos"},
+        "node=spine2": {"username": "core-spine2", "password": "core-exact"},
+    },
+}
+
+def resolver(creds: dict) -> CredentialResolver:
+    return CredentialResolver(creds=creds, credsFile="creds.yml")
+
+@pytest.mark.parametrize("lab, name, image, kind, expected", [
+    ("edge", "spine1", "ceos:4.33", "ceos", ("spine1", "exact")), # node= beats patterns
+    ("edge", "spine2", "ceos:4.33", "ceos", ("spine", "glob")), # node patterns beat image=
+    ("edge", "leaf12", "ceos:4.33", "ceos", ("leaf", "regex")),
+    ("edge", "leaf12a", "ceos:4.33", "ceos", ("admin", "ceos-4.33")), # this regex is anchored with ^ and $
+    ("edge", "border1", "ceos:4.34", "ceos", ("admin", "ceos")), # image= beats kind=
+    ("edge", "border1", "srlinux:25", "nokia_srlinux", ("admin", "default")),
+    ("core", "spine2", "ceos:4.33", "ceos", ("core-spine2", "core-exact")), # lab-scoped filters beat global ones
+    ("core", "border1", "ceos:4.34", "ceos", ("core", "core-ceos")),
+    ("core", "border1", "ceos:4.33", "ceos", ("admin", "ceos-4.33")), # ... of the same type only
+    ("core", "spine3", "ceos:4.33", "ceos", ("spine", "glob")),
+])
+def test_most_specific_filter_wins(lab, name, image, kind, expected):
+    assert resolver(CREDS).resolve(lab=lab, name=name, image=image, kind=kind) == expected
+
+def test_entries_without_a_username_fall_through():
+    creds = {"default": {"username": "admin", "password": "default"}, "node=n1": {"password": "no-username"}}
+    assert resolver(creds).resolve(lab="lab", name="n1", image="ceos", kind="ceos") == ("admin", "default")
+
+def test_entries_without_a_password_are_a_fallback():
+    creds = {"kind=ceos": {"username": "ceos"}, "node=n1": {"username": "n1"}, "default": {"username": "admin", "password": "default"}}
+    assert resolver(creds).resolve(lab="lab", name="n1", image="ceos", kind="ceos") == ("admin", "default")
+    del creds["default"]
+    assert resolver(creds).resolve(lab="lab", name="n1", image="ceos", kind="ceos") == ("n1", None)
+
+def test_empty_entries_exclude_devices():
+    creds = {"default": {"username": "admin", "password": "default"}, "node=n1": None}
+    credentialResolver = resolver(creds)
+    assert credentialResolver.resolve(lab="lab", name="n1", image="ceos", kind="ceos") is None
+    assert credentialResolver.resolve(lab="lab", name="n2", image="ceos", kind="ceos") == ("admin", "default")
+
+def test_no_matching_filter():
+    assert resolver({"kind=ceos": {"username": "admin", "password": "ceos"}}).resolve(lab="lab", name="n1", image="srl", kind="srl") is None
+
+def test_shared_entries_are_cached_per_lab_image_and_kind():
+    credentialResolver = resolver(CREDS)
+    credentialResolver.resolve(lab="edge", name="border1", image="ceos:4.34", kind="ceos")
+    credentialResolver.resolve(lab="edge", name="border2", image="ceos:4.34", kind="ceos")
+    assert list(credentialResolver.cache) == [("edge", "ceos:4.34", "ceos")]
+    # Node filters are still checked for every device sharing the cached entries
+    assert credentialResolver.resolve(lab="edge", name="spine1", image="ceos:4.34", kind="ceos") == ("spine1", "exact")
+
+def test_password_references():
+    creds = {"default": {"username": "admin", "password": {"keyring": "clab"}}}
+    assert resolver(creds).resolve(lab="lab", name="n1", image="ceos", kind="ceos") == \
+        ("admin", SecretReference(backend="keyring", reference="clab", username="admin"))
+
+@pytest.mark.parametrize("creds", [
+    {"default": {"username": "admin", "password": {"vault": "clab"}}},
+    {"default": {"username": "admin", "password": {"file": "passwords.yml"}}},
+    {"node~[": {"username": "admin", "password": "admin"}},
+    {"lab=core": ["not", "a", "mapping"]},
+])
+def test_invalid_entries_exit(creds, capsys):
+    with pytest.raises(SystemExit):
+        resolver(creds)
+    assert "creds.yml" in capsys.readouterr().out
+
+def test_credentials_file_is_read_without_a_cache(tmp_path):
+    credsFile = tmp_path / "creds.yml"
+    credsFile.write_text("default:\n  username: admin\n  password: admin\n")
+    assert CredentialResolver.from_file(credsFile=str(credsFile)).resolve(lab="lab", name="n1", image="i", kind="k") == ("admin", "admin")
+    assert [path.name for path in tmp_path.iterdir()] == ["creds.yml"]
@@ -0,0 +1,90 @@
+import json
+import os
+
+from clab_terminal_launcher.misc.models import Node
+from clab_terminal_launcher.node_data.helpers import (authenticate, conditional_get, ContainerlabAPI, diff_nodes, read_snapshot,
+                                                      RenderedNodes, ResponseCache)
+
+def node(name: str, **fields) -> dict:
+    return {"name": name, "image": "ceos:4.33", "kind": "ceos", "state": "running", "ipv4_address": f"172.20.20.{len(name)}",
+            "ipv6_address": "", "ports": {"ssh": 22}, "method": "direct"} | fields
+
+def lab_session(fake_api) -> tuple:
+    api, baseURL = fake_api
+    session = ContainerlabAPI(baseURL=baseURL)
+    authenticate(api=session, host="host", username="admin", password=lambda: "secret")
+    return api, baseURL, session
+
+def test_unchanged_response_is_reused(fake_api):
+    api, baseURL, session = lab_session(fake_api)
+    api.labs["lab1"] = {"n1": {"state": "running"}}
+    api.etags["lab1"] = '"v1"'
+
+    firstRun = ResponseCache()
+    assert conditional_get(api=session, url="/api/v1/labs/lab1", error="Error", host="host", responseCache=firstRun) == {"n1": {"state": "running"}}
+    assert "If-None-Match" not in api.requests[-1][2]
+
+    # The next run sends the validator from the snapshot and reuses the body when the API answers 304
+    secondRun = ResponseCache(responses=json.loads(json.dumps(firstRun.current)))
+    api.labs["lab1"] = {"body": "not sent again"}
+    assert conditional_get(api=session, url="/api/v1/labs/lab1", error="Error", host="host", responseCache=secondRun) == {"n1": {"state": "running"}}
+    assert api.requests[-1][2]["If-None-Match"] == '"v1"'
+    assert secondRun.current == firstRun.current
+
+def test_changed_response_replaces_the_cached_one(fake_api):
+    api, baseURL, session = lab_session(fake_api)
+    api.labs["lab1"] = {"n1": {}}
+    api.etags["lab1"] = '"v1"'
+    firstRun = ResponseCache()
+    conditional_get(api=session, url="/api/v1/labs/lab1", error="Error", host="host", responseCache=firstRun)
+
+    api.labs["lab1"] = {"n1": {}, "n2": {}}
+    api.etags["lab1"] = '"v2"'
+    secondRun = ResponseCache(responses=firstRun.current)
+    assert conditional_get(api=session, url="/api/v1/labs/lab1", error="Error", host="host", responseCache=secondRun) == {"n1": {}, "n2": {}}
+    assert secondRun.current[f"{baseURL}/api/v1/labs/lab1"]["etag"] == '"v2"'
+
+def test_responses_without_validators_are_not_cached(fake_api):
+    api, baseURL, session = lab_session(fake_api)
+    api.labs["lab1"] = {"n1": {}}
+    responseCache = ResponseCache()
+    conditional_get(api=session, url="/api/v1/labs/lab1", error="Error", host="host", responseCache=responseCache)
+    assert responseCache.current == {}
+    assert ResponseCache(responses="invalid").request_headers(key="anything") == {}
+
+def test_diff_nodes_reports_added_removed_and_changed_nodes():
+    previous = {"lab1": [node("n1"), node("n2"), node("n3")]}
+    current = {"lab1": [node("n1"), node("n3", state="exited"), node("n4")]}
+    assert diff_nodes(previous=previous, current=current) == (["n4"], ["n2"], ["n3"])
+
+def test_diff_nodes_ignores_fields_irrelevant_to_sessions():
+    previous = {"lab1": [node("n1", status="Up 2 minutes")]}
+    current = {"lab1": [node("n1", status="Up 3 minutes")]}
+    assert diff_nodes(previous=previous, current=current) == ([], [], [])
+
+    # A node that moved to another lab has changed, even if nothing else did
+    assert diff_nodes(previous=previous, current={"lab2": [node("n1")]}) == ([], [], ["n1"])
+
+def test_unchanged_refresh_leaves_the_output_file_alone(tmp_path):
+    outputfile = str(tmp_path / "nodes.json")
+    nodes = {"lab1": [Node.from_dict(node("n1")), Node.from_dict(node("n2"))]}
+    assert read_snapshot(outputfile=outputfile) is None
+
+    first = RenderedNodes(outputfile=outputfile, host="host", nodes=nodes, incremental=True, snapshot=None)
+    assert first.changed and first.write()
+    modified = os.stat(outputfile).st_mtime_ns
+
+    snapshot = read_snapshot(outputfile=outputfile)
+    second = RenderedNodes(outputfile=outputfile, host="host", nodes=nodes, incremental=True, snapshot=snapshot)
+    assert not second.changed and not second.write()
+    assert os.stat(outputfile).st_mtime_ns == modified
+
+    third = RenderedNodes(outputfile=outputfile, host="host", nodes={"lab1": nodes["lab1"][:1]}, incremental=True,
+                          snapshot=read_snapshot(outputfile=outputfile))
+    assert third.changed and third.write()
+
+def test_snapshot_is_ignored_without_its_output_file(tmp_path):
+    outputfile = str(tmp_path / "nodes.json")
+    RenderedNodes(outputfile=outputfile, host="host", nodes={"lab1": [Node.from_dict(node("n1"))]}, incremental=True).write()
+    os.remove(outputfile)
+    assert read_snapshot(outputfile=outputfile) is None
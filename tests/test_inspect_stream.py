@@ -0,0 +1,54 @@
+import io
+import json
+from typing import Iterator
+
+import pytest
+
+from clab_terminal_launcher.node_data.helpers import stream_inspect_output
+
+INSPECT_OUTPUT = {
+    "lab1": [
+        {"lab_name": "lab1", "name": "clab-lab1-n1", "image": "ceos:4.33", "kind": "ceos", "state": "running",
+         "ipv4_address": "172.20.20.2/24", "ipv6_address": "3fff:172:20:20::2/64", "labels": {"clab-node-name": "n1"}},
+        {"lab_name": "lab1", "name": "clab-lab1-n2", "image": "srlinux:25.3", "kind": "nokia_srlinux", "state": "exited",
+         "ports": [1234567, -0.5, 1.5e10, True, None], "description": "café \"quoted\" \\ 🚀"},
+    ],
+    "lab2": [],
+    "lab3": [{"name": "clab-lab3-n1", "numbers": [10, 200, 3000, 4.25, 1e-3]}],
+}
+
+def collect(file: io.StringIO, chunkSize: int) -> dict:
+    return {lab: list(value) if isinstance(value, Iterator) else value
+            for lab, value in stream_inspect_output(file=file, chunkSize=chunkSize)}
+
+@pytest.mark.parametrize("chunkSize", [1, 2, 3, 7, 64, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_stream_matches_json_load(chunkSize, indent):
+    document = json.dumps(INSPECT_OUTPUT, indent=indent, ensure_ascii=indent is None)
+    assert collect(file=io.StringIO(document), chunkSize=chunkSize) == INSPECT_OUTPUT
+
+@pytest.mark.parametrize("chunkSize", [1, 4, 1 << 16])
+def test_unconsumed_containers_are_skipped(chunkSize):
+    labs = []
+    for lab, containers in stream_inspect_output(file=io.StringIO(json.dumps(INSPECT_OUTPUT)), chunkSize=chunkSize):
+        labs.append((lab, next(containers, None)))
+    assert labs == [("lab1", INSPECT_OUTPUT["lab1"][0]), ("lab2", None), ("lab3", INSPECT_OUTPUT["lab3"][0])]
+
+def test_values_that_are_not_lists_are_yielded_as_is():
+    assert collect(file=io.StringIO('{"lab1": {"not": "a list"}, "lab2": 5, "lab3": [1]}'), chunkSize=2) == \
+        {"lab1": {"not": "a list"}, "lab2": 5, "lab3": [1]}
+
+def test_empty_output():
+    assert collect(file=io.StringIO(" {  } \n"), chunkSize=1) == {}
+
+@pytest.mark.parametrize("document, message", [
+    ("[]", "NOT a JSON object"),
+    ("", "NOT a JSON object"),
+    ('{"lab1": [{"name": "n1"}]} {}', "Extra data at character 28"),
+    ('{"lab1": [{"name": "n1"}', "Expecting one of ',', ']' at character 25"),
+    ('{"lab1": [{"name": n1}]}', "Expecting value at character 20"),
+    ('{lab1: []}', "Expecting property name enclosed in double quotes at character 2"),
+])
+def test_invalid_output_raises_value_error(document, message):
+    with pytest.raises(ValueError, match=message):
+        collect(file=io.StringIO(document), chunkSize=3)
@@ -0,0 +1,175 @@
+import json
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from clab_terminal_launcher.launch.helpers import batch_securecrt, LaunchPlan, LaunchStep, Password, quote_argument, variable
+from clab_terminal_launcher.misc.models import Device
+
+PASSWORDS = ["pl@in", "with space", 'qu"ote', "back\\slash\\", 'tr\\"icky\\\\"', "$HOME `id` 'single' %PATH% ;&|"]
+
+def putty_command(device: Device) -> list[str]:
+    return ["putty", "-ssh", "-P", str(device.ports["ssh"]), device.address, "-l", device.username,
+            "-pw", Password(device.password), "-loghost", device.name]
+
+def securecrt_command(device: Device) -> list[str]:
+    return ["securecrt", "/T", "/ssh2", device.address, "/l", device.username, "/password", Password(device.password),
+            "/P", str(device.ports["ssh"]), "/accepthostkeys"]
+
+def devices(passwords: list[str]) -> list[Device]:
+    return [Device(name=f"n{index}", address=f"172.20.20.{index}", ports={"ssh": 22}, username="admin", password=password)
+            for index, password in enumerate(passwords, start=1)]
+
+def parse_windows_arguments(line: str) -> list[str]:
+    """Splits a command line the way the Microsoft C runtime does (CommandLineToArgvW)"""
+    arguments, current, inQuotes, started, index = [], [], False, False, 0
+    while index < len(line):
+        character = line[index]
+        if character == "\\":
+            count = len(line[index:]) - len(line[index:].lstrip("\\"))
+            index += count
+            if line[index:index + 1] == '"':
+                current.append("\\" * (count // 2))
+                if count % 2:
+                    current.append('"')
+                    index += 1
+            else:
+                current.append("\\" * count)
+            started = True
+            continue
+        if character == '"':
+            inQuotes = not inQuotes
+            started = True
+        elif character in " \t" and not inQuotes:
+            if started:
+                arguments.append("".join(current))
+            current, started = [], False
+        else:
+            current.append(character)
+            started = True
+        index += 1
+    if started:
+        arguments.append("".join(current))
+    return arguments
+
+@pytest.fixture
+def recorder(tmp_path):
+    """An executable that records the arguments it was run with; returns its path and a function returning the records"""
+    records = tmp_path / "records"
+    records.mkdir()
+    executable = tmp_path / "record-arguments"
+    executable.write_text(f"#!{sys.executable}\nimport json, os, sys\n"
+                          f"json.dump(sys.argv[1:], open(os.path.join({str(records)!r}, f'{{os.getpid()}}.json'), 'w'))\n")
+    executable.chmod(0o755)
+    return str(executable), lambda: sorted(json.loads(path.read_text()) for path in records.iterdir())
+
+def run_shell_plan(plan: LaunchPlan, tmp_path, environment: dict[str, str]) -> None:
+    script = tmp_path / "plan.sh"
+    plan.export(filename=str(script), format="sh")
+    subprocess.run(["sh", "-c", '. "$0"; wait', str(script)], env={"PATH": "/usr/bin:/bin"} | environment, check=True)
+
+@pytest.mark.parametrize("value", PASSWORDS + ["", "trailing\\\\"])
+def test_quote_argument_round_trips(value):
+    assert parse_windows_arguments(f"/password {quote_argument(value=value)} /P 22") == ["/password", value, "/P", "22"]
+
+def test_quote_argument_escapes():
+    assert quote_argument(value='a"b') == '"a\\"b"'
+    assert quote_argument(value='a\\"b') == '"a\\\\\\"b"'
+    assert quote_argument(value="a\\") == '"a\\\\"'
+    assert quote_argument(value="a\\b") == '"a\\b"'
+
+def test_only_password_tokens_are_masked(capsys):
+    plan = LaunchPlan(launcher="putty")
+    for device in devices(["admin", "secret", "admin"]):
+        plan.add(device=device, cmd=putty_command(device))
+
+    assert plan.passwords() == {"admin": "CLAB_PASSWORD_1", "secret": "CLAB_PASSWORD_2"}
+    masked = [step.cmd for step in plan.commands(mask=True)]
+    assert masked[0][6:9] == ["admin", "-pw", variable("CLAB_PASSWORD_1")] # the username isn't masked
+    assert (masked[1][8], masked[2][8]) == (variable("CLAB_PASSWORD_2"), variable("CLAB_PASSWORD_1"))
+    assert [step.cmd for step in plan.commands()] == [step.cmd for step in plan.steps]
+
+    plan.print()
+    output = capsys.readouterr().out
+    assert "secret" not in output and output.count("*****") == 3
+
+def test_json_export_contains_no_passwords(tmp_path):
+    plan = LaunchPlan(launcher="putty")
+    for device in devices(PASSWORDS):
+        plan.add(device=device, cmd=putty_command(device))
+    plan.export(filename=str(tmp_path / "plan.json"), format="json")
+
+    content = json.loads((tmp_path / "plan.json").read_text())
+    assert all(password not in json.dumps(content["commands"]) for password in PASSWORDS)
+    assert content["variables"] == {f"CLAB_PASSWORD_{index}": [f"n{index}"] for index in range(1, len(PASSWORDS) + 1)}
+    assert content["commands"][0]["cmd"][8] == "${CLAB_PASSWORD_1}"
+
+def test_shell_export_passes_passwords_unchanged(tmp_path, recorder):
+    executable, records = recorder
+    plan = LaunchPlan(launcher="putty")
+    for device in devices(PASSWORDS):
+        plan.add(device=device, cmd=[executable] + putty_command(device)[1:])
+    run_shell_plan(plan=plan, tmp_path=tmp_path,
+                   environment={f"CLAB_PASSWORD_{index}": password for index, password in enumerate(PASSWORDS, start=1)})
+
+    assert sorted(record[7] for record in records()) == sorted(PASSWORDS)
+
+def test_shell_export_requires_the_password_variables(tmp_path, recorder):
+    executable, records = recorder
+    plan = LaunchPlan(launcher="putty")
+    device = devices(["secret"])[0]
+    plan.add(device=device, cmd=[executable] + putty_command(device)[1:])
+    with pytest.raises(subprocess.CalledProcessError):
+        run_shell_plan(plan=plan, tmp_path=tmp_path, environment={})
+    assert records() == []
+
+def test_powershell_export_escapes_tokens(tmp_path):
+    assert LaunchPlan.render(token='a"b$c`d', style="ps1") == '"a`"b`$c``d"'
+    assert LaunchPlan.render(token=f"pre{variable('CLAB_PASSWORD_1')}post", style="ps1") == '"pre$env:CLAB_PASSWORD_1post"'
+
+    plan = LaunchPlan(launcher="putty")
+    device = devices(['s"ecret'])[0]
+    plan.add(device=device, cmd=putty_command(device))
+    plan.export(filename=str(tmp_path / "plan.ps1"), format="ps1")
+    content = (tmp_path / "plan.ps1").read_bytes().decode()
+    assert 's"ecret' not in content and "\r\n" in content
+    assert '"-pw" "$env:CLAB_PASSWORD_1"' in content
+
+@pytest.mark.skipif(shutil.which("pwsh") is None, reason="PowerShell isn't installed")
+def test_powershell_export_passes_passwords_unchanged(tmp_path, recorder):
+    executable, records = recorder
+    plan = LaunchPlan(launcher="putty")
+    for device in devices(PASSWORDS):
+        plan.add(device=device, cmd=[executable] + putty_command(device)[1:])
+    plan.export(filename=str(tmp_path / "plan.ps1"), format="ps1")
+    subprocess.run(["pwsh", "-NoProfile", "-File", str(tmp_path / "plan.ps1")], check=True,
+                   env={"PATH": "/usr/bin:/bin"} | {f"CLAB_PASSWORD_{index}": password for index, password in enumerate(PASSWORDS, start=1)})
+    assert sorted(record[7] for record in records()) == sorted(PASSWORDS)
+
+def test_securecrt_batch_quotes_each_argument():
+    steps = [LaunchStep(devices=[device.name], cmd=securecrt_command(device)) for device in devices(PASSWORDS)]
+    batched = batch_securecrt(steps=steps, executable="securecrt")
+
+    assert batched.devices == [f"n{index}" for index in range(1, len(PASSWORDS) + 1)]
+    assert batched.cmd[:3] == ["securecrt", "/SCRIPT", variable("CLAB_SECURECRT_SCRIPT")]
+    assert set(batched.files) == {"CLAB_SECURECRT_SCRIPT"}
+    connectionArguments = batched.cmd[4::2]
+    assert all(argument == "/ARG" for argument in batched.cmd[3::2])
+    for device, arguments in zip(devices(PASSWORDS), connectionArguments):
+        assert parse_windows_arguments(arguments) == ["/ssh2", device.address, "/l", "admin", "/password", device.password,
+                                                      "/P", "22", "/accepthostkeys"]
+
+def test_masked_securecrt_batch_escapes_passwords_when_run(tmp_path, recorder):
+    executable, records = recorder
+    plan = LaunchPlan(launcher="securecrt", batcher=lambda steps: batch_securecrt(steps=steps, executable=executable))
+    for device in devices(PASSWORDS):
+        plan.add(device=device, cmd=securecrt_command(device))
+    assert '"' + variable("CLAB_PASSWORD_1_ESCAPED") + '"' in plan.commands(mask=True)[0].cmd[4]
+
+    run_shell_plan(plan=plan, tmp_path=tmp_path,
+                   environment={f"CLAB_PASSWORD_{index}": password for index, password in enumerate(PASSWORDS, start=1)})
+    (record,) = records()
+    assert record[0] == "/SCRIPT"
+    assert [parse_windows_arguments(arguments)[5] for arguments in record[3::2]] == PASSWORDS
@@ -0,0 +1,51 @@
+import json
+import os
+
+import pytest
+
+from clab_terminal_launcher.launch.helpers import parse_lab_devices
+from clab_terminal_launcher.misc import helpers
+from clab_terminal_launcher.misc.helpers import CACHE_SUFFIX, read_object_from_structured_data
+from clab_terminal_launcher.misc.models import Node
+from clab_terminal_launcher.node_data.helpers import RenderedNodes
+
+@pytest.fixture
+def rendered_file(tmp_path):
+    nodes = {"lab1": [Node(name="n1", image="ceos:4.33", kind="ceos", state="running", ipv4_address="172.20.20.2",
+                           ipv6_address="", method="direct")]}
+    RenderedNodes(outputfile=str(tmp_path / "nodes.json"), host="host", nodes=nodes).write()
+    os.chmod(tmp_path / "nodes.json", 0o640)
+    return str(tmp_path / "nodes.json")
+
+def test_cache_is_not_used_by_default(rendered_file):
+    read_object_from_structured_data(expected_format="json", filename=rendered_file)
+    assert not os.path.exists(f"{rendered_file}{CACHE_SUFFIX}")
+
+def test_fresh_cache_is_used_instead_of_the_file(rendered_file, monkeypatch):
+    data = read_object_from_structured_data(expected_format="json", filename=rendered_file, useCache=True)
+    assert os.stat(f"{rendered_file}{CACHE_SUFFIX}").st_mode & 0o777 == 0o640
+
+    monkeypatch.setattr(helpers.json, "load", lambda f: pytest.fail("the file was parsed although its cache is fresh"))
+    assert read_object_from_structured_data(expected_format="json", filename=rendered_file, useCache=True) == data
+
+def test_stale_or_corrupted_cache_is_ignored(rendered_file):
+    read_object_from_structured_data(expected_format="json", filename=rendered_file, useCache=True)
+    with open(rendered_file, "r") as f:
+        data = json.load(f)
+    data["lab1"][0]["name"] = "renamed"
+    with open(rendered_file, "w") as f:
+        json.dump(data, f)
+    assert read_object_from_structured_data(expected_format="json", filename=rendered_file, useCache=True)["lab1"][0]["name"] == "renamed"
+
+    with open(f"{rendered_file}{CACHE_SUFFIX}", "wb") as f:
+        f.write(b"\x05\x00")
+    assert read_object_from_structured_data(expected_format="json", filename=rendered_file, useCache=True)["lab1"][0]["name"] == "renamed"
+
+def test_credentials_file_is_never_cached(rendered_file, tmp_path):
+    credsFile = tmp_path / "creds.yml"
+    credsFile.write_text("default:\n  username: admin\n  password: admin\n")
+    devices = parse_lab_devices(devicesFile=rendered_file, credsFile=str(credsFile), method="ipv4", useCache=True)
+
+    assert (devices["n1"].address, devices["n1"].username, devices["n1"].password) == ("172.20.20.2", "admin", "admin")
+    assert os.path.exists(f"{rendered_file}{CACHE_SUFFIX}")
+    assert not os.path.exists(f"{credsFile}{CACHE_SUFFIX}")
@@ -0,0 +1,58 @@
+from clab_terminal_launcher.misc.models import Node
+from clab_terminal_launcher.node_data.helpers import PortOverrides
+
+def node(name: str, kind: str = "ceos", image: str = "ceos:4.33") -> Node:
+    return Node(name=name, image=image, kind=kind, state="running", ipv4_address="172.20.20.2", ipv6_address="",
+                ports={"ssh": 22}, method="direct")
+
+def test_node_ports_are_applied_through_the_containerlab_host():
+    nodes = {"lab1": [node("n1"), node("n2")]}
+    changes, unknown = PortOverrides(ports={"lab1": {"n1": {"ssh": 2201, "netconf": "8301"}}}).apply(nodes=nodes)
+
+    assert (nodes["lab1"][0].ports, nodes["lab1"][0].method) == ({"ssh": 2201, "netconf": 8301}, "clabHost")
+    assert (nodes["lab1"][1].ports, nodes["lab1"][1].method) == ({"ssh": 22}, "direct")
+    assert changes == ["node n1: ssh 2201, netconf 8301"]
+    assert unknown == []
+
+def test_patterns_set_ports_without_changing_the_connection_method():
+    nodes = {"lab1": [node("n1"), node("n2", kind="nokia_srlinux", image="srlinux:25.3")]}
+    changes, unknown = PortOverrides(ports={"kind=nokia_srlinux": {"ssh": 2022}}).apply(nodes=nodes)
+
+    assert nodes["lab1"][1].ports == {"ssh": 2022}
+    assert nodes["lab1"][1].method == "direct"
+    assert nodes["lab1"][0].ports == {"ssh": 22}
+    assert changes == ["kind=nokia_srlinux (1 nodes): ssh 2022"]
+
+def test_more_specific_entries_override_patterns():
+    ports = {
+        "kind=ceos": {"ssh": 1000, "netconf": 1001, "gnmi": 1002},
+        "image=ceos:4.33": {"netconf": 2001},
+        "lab1": {"kind=ceos": {"gnmi": 3002}, "n1": {"ssh": 4000}},
+    }
+    nodes = {"lab1": [node("n1"), node("n2")], "lab2": [node("n1")]}
+    PortOverrides(ports=ports).apply(nodes=nodes)
+
+    assert nodes["lab1"][0].ports == {"ssh": 4000, "netconf": 2001, "gnmi": 3002}
+    assert nodes["lab1"][1].ports == {"ssh": 1000, "netconf": 2001, "gnmi": 3002}
+    assert nodes["lab2"][0].ports == {"ssh": 1000, "netconf": 2001, "gnmi": 1002}
+
+def test_entries_that_match_no_node_are_reported():
+    nodes = {"lab1": [node("n1")]}
+    _, unknown = PortOverrides(ports={"lab1": {"n9": {"ssh": 2201}}, "lab9": {"n1": {"ssh": 2201}}}).apply(nodes=nodes)
+    assert sorted(unknown) == ["lab lab9", "node n9 in lab lab1"]
+
+def test_invalid_entries_are_collected():
+    overrides = PortOverrides(ports={
+        "lab1": {"n1": {"ssh": 0, "netconf": "830a", "gnmi": True, "telnet": 23}, "n2": [22]},
+        "lab2": "n1",
+        "kind=ceos": {"ssh": 70000},
+    })
+    assert overrides.errors == [
+        "node n1 in lab lab1: invalid port number for ssh, 0",
+        "node n1 in lab lab1: invalid port number for netconf, '830a'",
+        "node n1 in lab lab1: invalid port number for gnmi, True",
+        "node n2 in lab lab1: ports not contained in a proper YAML mapping",
+        "lab lab2: nodes not contained in a proper YAML mapping",
+        "kind=ceos: invalid port number for ssh, 70000",
+    ]
+    assert overrides.nodes["lab1"]["n1"] == {"telnet": 23}
@@ -0,0 +1,14 @@
+from clab_terminal_launcher.misc.models import Node
+from clab_terminal_launcher.node_data.helpers import check_running_nodes
+
+def node(name: str, state: str = "", container: str | None = None) -> Node:
+    return Node(name=name, image="ceos:4.33", kind="ceos", state=state, ipv4_address="172.20.20.2", ipv6_address="", container=container)
+
+def test_only_running_nodes_are_kept(capsys):
+    labs = {"lab1": [node("n1"), node("n2")], "lab2": [node("n1")]}
+    running = {"lab1": [node("n2", state="running", container="id-n2")], "lab3": [node("n1", state="running")]}
+    checked = check_running_nodes(labs=labs, running=running)
+
+    assert list(checked) == ["lab1"]
+    assert [(n.name, n.state, n.container, n.ipv4_address) for n in checked["lab1"]] == [("n2", "running", "id-n2", "172.20.20.2")]
+    assert "No running nodes found for lab lab2" in capsys.readouterr().out
@@ -0,0 +1,69 @@
+import click
+import pytest
+
+from clab_terminal_launcher.launch.selectors import NodeSelector, NodeSelectorType
+from clab_terminal_launcher.misc.models import Node
+
+def node(name: str, kind: str = "ceos", image: str = "ceos:4.33", group: str | None = None) -> Node:
+    return Node(name=name, image=image, kind=kind, state="running", ipv4_address="", ipv6_address="", group=group)
+
+NODES = {
+    "core": [node("spine1", group="spines"), node("spine2", group="spines"), node("leaf1", kind="nokia_srlinux", image="srlinux:25.3")],
+    "edge": [node("leaf1"), node("leaf10", kind="nokia_srlinux", image="srlinux:24.10"), node("border1", group="borders")],
+    "lab": [node("spine1", kind="linux", image="alpine:3")],
+}
+
+def names(selected: dict[str, list[Node]]) -> list[str]:
+    return [f"{lab}/{node.name}" for lab, labNodes in selected.items() for node in labNodes]
+
+@pytest.mark.parametrize("expression, expected", [
+    ("kind=nokia_srlinux", ["core/leaf1", "edge/leaf10"]),
+    ("name=spine*", ["core/spine1", "core/spine2", "lab/spine1"]),
+    ("node=spine1", ["core/spine1", "lab/spine1"]), # node is an alias of name
+    ("image=srlinux:2[45].*", ["core/leaf1", "edge/leaf10"]),
+    ("name~eaf1", ["core/leaf1", "edge/leaf1", "edge/leaf10"]), # regular expressions aren't anchored
+    ("name~^leaf1$", ["core/leaf1", "edge/leaf1"]),
+    ("kind!=ceos", ["core/leaf1", "edge/leaf10", "lab/spine1"]),
+    ("name!~^(spine|leaf)", ["edge/border1"]),
+    ("lab=core,lab=edge,kind=ceos", ["core/spine1", "core/spine2", "edge/leaf1", "edge/border1"]), # OR within a field
+    ("lab=core,name=spine*,name!=spine2", ["core/spine1"]), # AND across fields
+    ("lab~^(core|edge)$,kind=nokia_srlinux", ["core/leaf1", "edge/leaf10"]),
+    ("lab!=core, kind != ceos", ["edge/leaf10", "lab/spine1"]),
+    ("group=spines", ["core/spine1", "core/spine2"]),
+    ("group=*", ["core/spine1", "core/spine2", "edge/border1"]), # nodes without a group never match
+    ("group!=spines,lab=edge", ["edge/leaf1", "edge/leaf10", "edge/border1"]),
+    ("name=missing", []),
+])
+def test_select(expression, expected):
+    assert names(NodeSelector(expression=expression).select(nodes=NODES)) == expected
+
+@pytest.mark.parametrize("expression", ["kind=ceos", "name=leaf*,kind!=ceos", "lab!=lab,name~1$,image=*4*", "group!=borders",
+                                        "lab=edge,lab=core,name!~0", "image~srlinux,group!=x"])
+def test_indexed_selection_matches_checking_every_node(expression):
+    selector = NodeSelector(expression=expression)
+    expected = [f"{lab}/{node.name}" for lab, labNodes in NODES.items() for node in labNodes
+                if all(selector.match_field(field=field, value=lab if field == "lab" else getattr(node, field)) for field in selector.terms)]
+    assert names(selector.select(nodes=NODES)) == expected
+
+def test_labs_without_matching_nodes_are_skipped():
+    assert NodeSelector(expression="lab=c*,lab!=cloud,kind=ceos").labs(labs=["core", "cloud", "edge"]) == ["core"]
+    assert NodeSelector(expression="kind=ceos").labs(labs=["core", "edge"]) == ["core", "edge"]
+
+@pytest.mark.parametrize("expression, message", [
+    ("", "doesn't contain any conditions"),
+    (" , ", "doesn't contain any conditions"),
+    ("kind", "invalid condition kind"),
+    ("colour=red", "unknown field colour"),
+    ("name~[", "invalid regular expression"),
+])
+def test_invalid_selectors(expression, message):
+    with pytest.raises(ValueError, match=message):
+        NodeSelector(expression=expression)
+
+def test_click_parameter_type():
+    selectorType = NodeSelectorType()
+    selector = selectorType.convert(value="kind=ceos", param=None, ctx=None)
+    assert str(selector) == "kind=ceos"
+    assert selectorType.convert(value=selector, param=None, ctx=None) is selector
+    with pytest.raises(click.BadParameter, match="invalid node selector 'colour=red'"):
+        selectorType.convert(value="colour=red", param=None, ctx=None)
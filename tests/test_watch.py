@@ -0,0 +1,29 @@
+from clab_terminal_launcher.misc.models import Node
+from clab_terminal_launcher.watch.helpers import LaunchedNodes, PollInterval
+
+def node(name: str, container: str | None = None) -> Node:
+    return Node(name=name, image="ceos:4.33", kind="ceos", state="running", ipv4_address="", ipv6_address="", container=container)
+
+def test_poll_interval_backs_off_until_something_changes():
+    interval = PollInterval(minimum=2, maximum=5)
+    assert [interval.next(changed=False) for _ in range(4)] == [3, 4.5, 5, 5]
+    assert interval.next(changed=True) == 2
+    assert PollInterval(minimum=10, maximum=5).next(changed=False) == 10
+
+def test_only_started_or_redeployed_nodes_are_reported():
+    launched = LaunchedNodes()
+    assert launched.update(nodes={"lab1": [node("n1", "a"), node("n2", "b")]}) == {("lab1", "n1"), ("lab1", "n2")}
+    assert launched.update(nodes={"lab1": [node("n1", "a"), node("n2", "b")]}) == set()
+    assert launched.update(nodes={"lab1": [node("n1", "c"), node("n2")], "lab2": [node("n1")]}) == {("lab1", "n1"), ("lab2", "n1")}
+    assert launched.update(nodes={"lab1": [node("n1", "c")]}) == set()
+    assert launched.update(nodes={"lab1": [node("n1", "c"), node("n2", "b")]}) == {("lab1", "n2")} # n2 stopped and started again
+
+def test_skipped_nodes_stay_pending_while_running():
+    launched = LaunchedNodes()
+    nodes = {"lab1": [node("n1", "a"), node("n2", "b")]}
+    launched.update(nodes=nodes)
+    launched.record_launch(nodes=nodes, skipped={"n2"})
+    assert launched.pending == {("lab1", "n2")}
+
+    launched.update(nodes={"lab1": [node("n1", "a")]})
+    assert launched.pending == set()